@@ -0,0 +1,79 @@
+#!/usr/bin/env python
+
+# Benchmark of reloading a parsed `AtomTable` from its memory-mapped binary
+# table file (`pdbtable.load_atom_table`, and `Pdb.from_table` for a `Pdb`
+# whose text is read on demand) against parsing the PDB text with
+# `PdbIO.coordsec_to_ary`. The ATOM and HETATM records of
+# tests/data/pdbs/3EIY.pdb are tiled up to the requested number of atoms;
+# the reloaded table must be identical to the parsed one. Memory-mapped
+# arrays are read from disk on first access.
+#
+# run
+# ./bench_atom_table_cache.py -h
+# for help
+#
+
+import argparse
+import os
+import shutil
+import tempfile
+import time
+
+import numpy as np
+import pyprot
+from pyprot.pdbtable import load_atom_table, TABLE_ARRAYS
+
+
+parser = argparse.ArgumentParser(
+    description='Benchmarks reloading cached atom tables.',
+    formatter_class=argparse.RawTextHelpFormatter
+    )
+
+parser.add_argument('-i', '--input', type=str,
+        default=os.path.join(os.path.dirname(__file__), '..', 'tests', 'data', 'pdbs', '3EIY.pdb'),
+        help='PDB file to tile (default: tests/data/pdbs/3EIY.pdb)')
+parser.add_argument('-n', '--natoms', type=str, default='1000,10000,100000',
+        help='comma separated atom counts (default: "1000,10000,100000")')
+parser.add_argument('-r', '--repeat', type=int, default=5,
+        help='number of timing repeats, best run is reported (default: 5)')
+
+args = parser.parse_args()
+
+
+def best_of(func, dest, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(dest)
+        elapsed = time.perf_counter() - start
+        if best is None or elapsed < best:
+            best = elapsed
+    return best
+
+
+with open(args.input, 'r') as in_file:
+    coord_lines = [line.rstrip('\n') for line in in_file if line.startswith(('ATOM', 'HETATM'))]
+
+print('%10s %14s %14s %9s %14s %9s' % ('atoms', 'parse (s)', 'reload (s)', 'speedup',
+                                       'Pdb (s)', 'speedup'))
+for natoms in [int(n) for n in args.natoms.split(',')]:
+    reps = natoms // len(coord_lines) + 1
+    tmp_dir = tempfile.mkdtemp()
+    pdb_file = os.path.join(tmp_dir, 'tiled.pdb')
+    try:
+        with open(pdb_file, 'w') as out:
+            out.write('\n'.join((coord_lines * reps)[:natoms]) + '\n')
+        pdb = pyprot.Pdb(pdb_file)
+        pdb.save_atom_table()
+
+        t_parse = best_of(pdb.coordsec_to_ary, pdb_file, args.repeat)
+        t_load = best_of(load_atom_table, pdb_file, args.repeat)
+        t_pdb = best_of(pyprot.Pdb.from_table, pdb_file, args.repeat)
+        table = load_atom_table(pdb_file)
+        for name in TABLE_ARRAYS:
+            assert np.array_equal(getattr(table, name), getattr(pdb.atom_table, name),
+                                  equal_nan=name == 'coords'), 'tables differ'
+    finally:
+        shutil.rmtree(tmp_dir)
+    print('%10d %14.4f %14.4f %8.1fx %14.4f %8.1fx' % (natoms, t_parse, t_load, t_parse / t_load,
+                                                       t_pdb, t_parse / t_pdb))
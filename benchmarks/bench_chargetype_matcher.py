@@ -0,0 +1,113 @@
+#!/usr/bin/env python
+
+# Benchmark of the compiled `mol2filter.ChargetypeMatcher` behind
+# `count_matches`/`match_all` against the previous line-by-line matcher
+# (`filter_atoms_loop` below) for growing numbers of random
+# atom type and charge range criteria.
+#
+# run
+# ./bench_chargetype_matcher.py -h
+# for help
+#
+
+import argparse
+import os
+import random
+import time
+
+from pyprot.mol2io import split_multimol2
+from pyprot.mol2filter import ChargetypeMatcher, count_matches
+
+
+parser = argparse.ArgumentParser(
+    description='Benchmarks MOL2 atom type and charge matching.',
+    formatter_class=argparse.RawTextHelpFormatter
+    )
+
+parser.add_argument('-i', '--input', type=str,
+        default=os.path.join(os.path.dirname(__file__), '..', 'tests', 'data', 'mol2s', 'confs.mol2'),
+        help='multi-mol2 file (default: tests/data/mol2s/confs.mol2)')
+parser.add_argument('-n', '--ncriteria', type=str, default='1,10,100,1000',
+        help='comma separated numbers of criteria (default: "1,10,100,1000")')
+parser.add_argument('-r', '--repeat', type=int, default=3,
+        help='number of timing repeats, best run is reported (default: 3)')
+
+args = parser.parse_args()
+
+
+def filter_atoms_loop(mol2_cont, chargetype_list):
+    """
+    Searches for atom types in a mol2 file line by line.
+    Returns the mol2 lines that contains matches as a list; the
+    implementation of `mol2filter._filter_atoms` before `ChargetypeMatcher`.
+
+    Parameters
+    ----------    
+
+    mol2_cont : `list`.
+      MOL2 file content as where each `list` item represents a line.
+      
+    chargetype_list : `list`. 
+      `list` of sub`list`s that consists of atom types as first sublist item, 
+      and the allowed charge range is given as 2nd and 3rd sublist items.
+      E.g., `[['O.2', -1.12, -0.792], ['O.2', -0.595, -0.315]]`
+
+
+    Returns
+    ---------- 
+
+    matched_lines : `list`.
+      The mol2 lines that contains matches as a `list`.
+
+    """
+    matched_lines = []
+    for line in mol2_cont:
+        fields = line.split()
+        for atom in chargetype_list:
+            if atom[0] in fields:
+                if len(atom) == 3: # optional: requires user defined charge range
+                    try:
+                        charge = float(fields[-1])
+                    except ValueError:
+                        print("Error: cannot get charge")
+                        continue
+                    if charge >= atom[1] \
+                            and charge <= atom[2]:
+                        matched_lines.append(line)
+                else:
+                    matched_lines.append(line)
+        if '@<TRIPOS>BOND' in fields:
+            break
+    return matched_lines
+
+
+
+def best_of(func, repeat):
+    best, result = None, None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        elapsed = time.perf_counter() - start
+        if best is None or elapsed < best:
+            best = elapsed
+    return best, result
+
+
+mol2s = [m[1].split('\n') for m in split_multimol2(args.input)]
+atom_types = sorted({line.split()[5] for m in mol2s for line in m
+                     if len(line.split()) == 9 and line.split()[0].isdigit()})
+random.seed(0)
+
+print('%10s %14s %14s %9s' % ('criteria', 'loop (s)', 'compiled (s)', 'speedup'))
+for ncriteria in [int(n) for n in args.ncriteria.split(',')]:
+    clist = []
+    for _ in range(ncriteria):
+        low = random.uniform(-1.0, 0.5)
+        clist.append([random.choice(atom_types), low, low + random.uniform(0.0, 0.5)])
+
+    t_loop, cnt_loop = best_of(lambda: [len(filter_atoms_loop(m, clist)) for m in mol2s], args.repeat)
+    matcher = ChargetypeMatcher(clist)
+    t_vec, cnt_vec = best_of(lambda: [count_matches(m, matcher) for m in mol2s], args.repeat)
+    assert cnt_loop == cnt_vec
+
+    print('%10d %14.4f %14.4f %8.1fx' % (ncriteria, t_loop, t_vec, t_loop / t_vec))
@@ -0,0 +1,150 @@
+#!/usr/bin/env python
+
+# Benchmark of the vectorized `PdbIO.coordsec_to_ary` parser against the
+# previous line-by-line parser (`coordsec_to_ary_loop` below).
+# The coordinate section of tests/data/pdbs/3B7V.pdb is tiled up
+# to the requested number of atoms and written to a temporary file.
+#
+# run
+# ./bench_coordsec_to_ary.py -h
+# for help
+#
+
+import argparse
+import os
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+import pyprot
+from pyprot.fileio import open_file
+
+
+parser = argparse.ArgumentParser(
+    description='Benchmarks PDB coordinate section parsing.',
+    formatter_class=argparse.RawTextHelpFormatter
+    )
+
+parser.add_argument('-i', '--input', type=str,
+        default=os.path.join(os.path.dirname(__file__), '..', 'tests', 'data', 'pdbs', '3B7V.pdb'),
+        help='PDB file to tile (default: tests/data/pdbs/3B7V.pdb)')
+parser.add_argument('-n', '--natoms', type=str, default='10000,100000,1000000',
+        help='comma separated atom counts (default: "10000,100000,1000000")')
+parser.add_argument('-r', '--repeat', type=int, default=3,
+        help='number of timing repeats, best run is reported (default: 3)')
+
+args = parser.parse_args()
+
+
+def coordsec_to_ary_loop(dest):
+    """
+    Parses a PDB file into a pandas DataFrame line by line; the
+    implementation of `PdbIO.coordsec_to_ary` before it was vectorized.
+
+    Parameters
+    ----------
+    dest : `str`.
+      Path to the target file. E.g., `"/home/.../desktop/my_pdb.pdb"`
+      or list of file contents. Compressed files (gzip, bzip2,
+      xz) are detected by their magic bytes.
+
+    Returns
+    ----------
+    df : DataFrame.
+
+    """
+    rec = [['record', 0, 6],
+         ['atomnum', 6, 11],
+         ['atomname', 12, 16],
+         ['altloc', 16, 17], 
+         ['residuename', 17, 20], 
+         ['chainid', 21, 22], 
+         ['residuenum', 22, 26], 
+         ['insertion', 26, 27],
+         ['xcoord', 30, 38], 
+         ['ycoord', 38, 46], 
+         ['zcoord', 47, 54], 
+         ['occupancy', 54, 60], 
+         ['bfactor', 60, 66],
+         ['segmentid', 72, 76], 
+         ['element', 76, 78], 
+         ['charge', 78, 80]]
+
+    coords = []
+
+    if isinstance(dest, str) and os.path.isfile(dest):
+        in_file = open_file(dest, 'r')
+    else:
+        in_file = dest
+
+
+    for line in in_file:
+        if not line.startswith(('ATOM', 'HETATM', 'ANISOU','TER')):
+            continue
+        row = []
+        for r in rec:
+            sline = line.strip()
+            try:
+                row.append(sline[r[1]:r[2]].strip())
+            except IndexError:
+                pass
+        row.append(line)
+        coords.append(row)
+
+    df = pd.DataFrame(coords, columns=[c[0] for c in rec] + ['origline'])
+    df.tail()
+
+    if isinstance(dest, str) and os.path.isfile(dest):
+        in_file.close()   
+
+
+    for c in ('atomnum', 'residuenum', 'segmentid', 'charge'):
+        try:
+            #df[c] = df[c].apply(lambda x: None if not x else x)
+            df[c] = df[c].astype(int)
+        except ValueError:
+            pass
+    for c in ('xcoord', 'ycoord', 'zcoord', 'occupancy', 'bfactor'):
+        try:
+            df[c] = df[c].apply(lambda x: np.nan if not x else x)
+            df[c] = df[c].astype(float)
+        except ValueError:
+            pass
+
+    return df
+
+
+
+def best_of(func, dest, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(dest)
+        elapsed = time.perf_counter() - start
+        if best is None or elapsed < best:
+            best = elapsed
+    return best
+
+
+with open(args.input, 'r') as in_file:
+    coord_lines = [line for line in in_file if line.startswith(('ATOM', 'HETATM'))]
+
+pdb = pyprot.Pdb()
+
+print('%10s %14s %14s %9s' % ('atoms', 'loop (s)', 'vectorized (s)', 'speedup'))
+for natoms in [int(n) for n in args.natoms.split(',')]:
+    reps = natoms // len(coord_lines) + 1
+    tiled = (coord_lines * reps)[:natoms]
+
+    with tempfile.NamedTemporaryFile('w', suffix='.pdb', delete=False) as tmp:
+        tmp.writelines(tiled)
+    try:
+        pd.testing.assert_frame_equal(pdb.coordsec_to_ary(tmp.name),
+                                      coordsec_to_ary_loop(tmp.name))
+        t_loop = best_of(coordsec_to_ary_loop, tmp.name, args.repeat)
+        t_vec = best_of(pdb.coordsec_to_ary, tmp.name, args.repeat)
+    finally:
+        os.remove(tmp.name)
+
+    print('%10d %14.4f %14.4f %8.1fx' % (natoms, t_loop, t_vec, t_loop / t_vec))
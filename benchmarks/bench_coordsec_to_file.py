@@ -0,0 +1,134 @@
+#!/usr/bin/env python
+
+# Benchmark of the vectorized `PdbIO.coordsec_to_file` writer against the
+# previous `pandas.Series.apply` writer (`coordsec_to_file_apply` below).
+# The ATOM and HETATM records of tests/data/pdbs/3EIY.pdb are tiled up to
+# the requested number of atoms; both writers must produce identical files.
+#
+# run
+# ./bench_coordsec_to_file.py -h
+# for help
+#
+
+import argparse
+import os
+import tempfile
+import time
+import warnings
+
+import numpy as np
+import pandas as pd
+import pyprot
+from pyprot.fileio import open_file
+
+
+parser = argparse.ArgumentParser(
+    description='Benchmarks writing the PDB coordinate section.',
+    formatter_class=argparse.RawTextHelpFormatter
+    )
+
+parser.add_argument('-i', '--input', type=str,
+        default=os.path.join(os.path.dirname(__file__), '..', 'tests', 'data', 'pdbs', '3EIY.pdb'),
+        help='PDB file to tile (default: tests/data/pdbs/3EIY.pdb)')
+parser.add_argument('-n', '--natoms', type=str, default='10000,100000,1000000',
+        help='comma separated atom counts (default: "10000,100000,1000000")')
+parser.add_argument('-r', '--repeat', type=int, default=3,
+        help='number of timing repeats, best run is reported (default: 3)')
+
+args = parser.parse_args()
+
+
+def coordsec_to_file_apply(pdb, dest):
+    """
+    Writes the contents of the `coord_ary` DataFrame of a `Pdb` to file
+    with per-column `pandas.Series.apply` padding; the implementation of
+    `PdbIO.coordsec_to_file` before it was vectorized. Shifts 4-character
+    atom names and the segment ID and element columns.
+
+    Parameters
+    ----------
+    dest : `str`.
+      Path to the target file. E.g., `"/home/.../desktop/my_pdb.pdb"`.
+      Compressed if the name ends with `.gz`, `.bz2`, or `.xz`.
+
+    """
+    df = pdb.coord_ary.copy()
+    df.drop('origline', axis=1, inplace=True)
+
+    df['record'] = df['record'].apply(lambda x: x + (6-len(x))*' ')
+    df['atomnum'] = df['atomnum'].apply(lambda x: (5-len(str(x)))*' ' + str(x))
+    df['atomname'] = df['atomname'].apply(lambda x: '  ' + str(x) + (3-len(str(x)))*' ' )
+    df['residuename'] = df['residuename'].apply(lambda x: str(x) + (3-len(str(x)))*' ' )
+    df['altloc'] = df['altloc'].apply(lambda x: ' ' if not x else x)
+    df['chainid'] = df['chainid'].apply(lambda x: ' ' + x)
+    df['residuenum'] = df['residuenum'].apply(lambda x: ' '*(4-len(str(x))) + str(x))
+    df['insertion'] = df['insertion'].apply(lambda x: ' ' if not x else x)
+    df['segmentid'] = df['segmentid'].apply(lambda x: ' '*(6-len(str(x))) + str(x))
+    df['element'] = df['element'].apply(lambda x: ' '*(6-len(str(x))) + str(x))
+    df['charge'] = df['charge'].apply(lambda x: ' '*(2-len(str(x))) + str(x))
+
+    # fix TER entries later
+    df_nt = df[df['record'] != 'TER']
+    df_nt['xcoord'] = df_nt['xcoord'].apply(lambda x: ' '*(11-len('%.3f' % x)) + '%.3f' % x)
+    df_nt['ycoord'] = df_nt['ycoord'].apply(lambda x: ' '*(8-len(str('%.3f' % x))) + '%.3f' % x)
+    df_nt['zcoord'] = df_nt['zcoord'].apply(lambda x: ' '*(8-len(str('%.3f' % x))) + '%.3f' % x)
+    df_nt['occupancy'] = df_nt['occupancy'].apply(lambda x: ' '*(6-len('%.2f' % x)) + '%.2f' % x)
+    df_nt['bfactor'] = df_nt['bfactor'].apply(lambda x: ' '*(6-len('%.2f' % x)) + '%.2f' % x)
+
+    df = df_nt[df_nt.index == df.index]        
+
+    # fix TER
+    df = df.where((pd.notnull(df)), ' ')
+    for r in ('xcoord','ycoord','zcoord','occupancy','bfactor'):
+        df.loc[df['record'] == 'TER   ', r] = df.loc[df['record'] == 'TER   ', r]\
+                .apply(lambda x: x.replace('nan', '   '))
+
+    with open_file(dest, 'w') as out:
+        np.savetxt(out,
+                   df.values,
+                   delimiter='',
+                   newline='\n',
+                   header='',
+                   footer='',
+                   fmt='%s',
+                   comments='# ')
+
+
+
+def best_of(func, dest, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(dest)
+        elapsed = time.perf_counter() - start
+        if best is None or elapsed < best:
+            best = elapsed
+    return best
+
+
+# the apply writer assigns to DataFrame slices
+warnings.simplefilter('ignore')
+
+with open(args.input, 'r') as in_file:
+    coord_lines = [line.rstrip('\n') for line in in_file if line.startswith(('ATOM', 'HETATM'))]
+
+print('%10s %14s %14s %9s' % ('atoms', 'apply (s)', 'vectorized (s)', 'speedup'))
+for natoms in [int(n) for n in args.natoms.split(',')]:
+    reps = natoms // len(coord_lines) + 1
+    pdb = pyprot.Pdb((coord_lines * reps)[:natoms])
+    pdb.coord_ary
+
+    tmp_dir = tempfile.mkdtemp()
+    ref_file, vec_file = os.path.join(tmp_dir, 'ref.pdb'), os.path.join(tmp_dir, 'vec.pdb')
+    try:
+        t_ref = best_of(lambda dest: coordsec_to_file_apply(pdb, dest), ref_file, args.repeat)
+        t_vec = best_of(pdb.coordsec_to_file, vec_file, args.repeat)
+        with open(ref_file, 'rb') as ref, open(vec_file, 'rb') as vec:
+            assert ref.read() == vec.read(), 'outputs differ'
+    finally:
+        for f in (ref_file, vec_file):
+            if os.path.exists(f):
+                os.remove(f)
+        os.rmdir(tmp_dir)
+
+    print('%10d %14.4f %14.4f %8.1fx' % (natoms, t_ref, t_vec, t_ref / t_vec))
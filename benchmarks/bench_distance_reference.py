@@ -0,0 +1,171 @@
+#!/usr/bin/env python
+
+# Benchmark of `mol2filter.DistanceReference.match_batch` against the
+# previous nested-loop `intermol_distance_match` (`intermol_distance_match_loop`
+# below), which re-parses the reference molecule for every query.
+# The first molecule of tests/data/mol2s/confs.mol2 is the reference,
+# the conformers are tiled up to the requested number of queries.
+#
+# run
+# ./bench_distance_reference.py -h
+# for help
+#
+
+import argparse
+import os
+import time
+
+from pyprot.mol2io import split_multimol2
+from pyprot.mol2filter import DistanceReference
+
+
+parser = argparse.ArgumentParser(
+    description='Benchmarks intermolecular functional group distance matching.',
+    formatter_class=argparse.RawTextHelpFormatter
+    )
+
+parser.add_argument('-i', '--input', type=str,
+        default=os.path.join(os.path.dirname(__file__), '..', 'tests', 'data', 'mol2s', 'confs.mol2'),
+        help='multi-mol2 file (default: tests/data/mol2s/confs.mol2)')
+parser.add_argument('-n', '--nqueries', type=str, default='200,2000',
+        help='comma separated numbers of query molecules (default: "200,2000")')
+parser.add_argument('-r', '--repeat', type=int, default=3,
+        help='number of timing repeats, best run is reported (default: 3)')
+
+args = parser.parse_args()
+
+CLIST = [['O.2', -1.0, 0.0], ['N.am', -0.8181, -0.2181], ['C.ar']]
+DISTANCE = [1.5, 4.0]
+
+
+def filter_atoms_loop(mol2_cont, chargetype_list):
+    """
+    Searches for atom types in a mol2 file line by line.
+    Returns the mol2 lines that contains matches as a list; the
+    implementation of `mol2filter._filter_atoms` before `ChargetypeMatcher`.
+
+    Parameters
+    ----------    
+
+    mol2_cont : `list`.
+      MOL2 file content as where each `list` item represents a line.
+      
+    chargetype_list : `list`. 
+      `list` of sub`list`s that consists of atom types as first sublist item, 
+      and the allowed charge range is given as 2nd and 3rd sublist items.
+      E.g., `[['O.2', -1.12, -0.792], ['O.2', -0.595, -0.315]]`
+
+
+    Returns
+    ---------- 
+
+    matched_lines : `list`.
+      The mol2 lines that contains matches as a `list`.
+
+    """
+    matched_lines = []
+    for line in mol2_cont:
+        fields = line.split()
+        for atom in chargetype_list:
+            if atom[0] in fields:
+                if len(atom) == 3: # optional: requires user defined charge range
+                    try:
+                        charge = float(fields[-1])
+                    except ValueError:
+                        print("Error: cannot get charge")
+                        continue
+                    if charge >= atom[1] \
+                            and charge <= atom[2]:
+                        matched_lines.append(line)
+                else:
+                    matched_lines.append(line)
+        if '@<TRIPOS>BOND' in fields:
+            break
+    return matched_lines
+
+
+def intermol_distance_match_loop(mol2_ref, mol2_query, chargetype_list, distance):
+    """
+    Searches for atom types in MOL2 file(s). Returns True if
+    2 atoms of the defined types are within a certain distance range;
+    the implementation of `mol2filter.intermol_distance_match` before
+    `DistanceReference`.
+
+    Parameters
+    ----------   
+    
+    mol2_ref (list) : `list`.
+        MOL2 file content of the reference molecule where each list item represents
+        a single line in the mol2 file.
+        mol2_query (list): mol2 file content of a query molecule where each list item represents
+                     a single line in the mol2 file.
+    chargetype_list : `list`.
+      `list` of sub`list`s that consists of atom types as first sublist item, 
+      and the allowed charge range is given as 2nd and 3rd sublist items.
+      E.g., `[['O.2', -1.12, -0.792], ['O.2', -0.595, -0.315]]`
+      
+    distance : `list`. 
+      List of 2 numbers that specify the allowed distance
+      between the 2 atoms in Angstrom. E.g., `[4, 12.5]`
+
+    Returns
+    ----------
+
+    match_dict : `dict`.
+      A dictionary with the count of chargetypes matched.
+      E.g., `{ 0: [['O.2', -1.0, 0.0], 3],         # 3 matches
+              1: [['N.am', -0.8181, -0.2181], 1]  # 1 match
+            }`
+
+    """
+    match_dict = {i:[chargetype_list[i], 0] for i in range(len(chargetype_list))}
+    
+    for idx,lst in enumerate(chargetype_list):
+        atom1_matches = filter_atoms_loop(mol2_ref, [lst])
+        atom2_matches = filter_atoms_loop(mol2_query, [lst])
+        coords_1 = []
+        coords_2 = []
+        for line in atom1_matches:
+            line = line.strip().split()
+            coords_1.append([float(i) for i in line[2:5]])
+            # expected format of a 'line':
+            # ['11', 'O1', '0.0847', '-6.3706', '-0.6593', 'O.2', '1', '<0>', '-0.0409']
+        for line in atom2_matches:
+            line = line.strip().split()
+            coords_2.append([float(i) for i in line[2:5]])
+        
+        for xyz_1 in coords_1:
+            for xyz_2 in coords_2:
+                dist = sum([(j-i)**2 for i,j in zip(xyz_1,xyz_2)])**0.5
+                if dist >= distance[0] and dist <= distance[1]:
+                    match_dict[idx][1] += 1
+                    break
+
+    return match_dict
+
+
+def best_of(func, repeat):
+    best, result = None, None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        elapsed = time.perf_counter() - start
+        if best is None or elapsed < best:
+            best = elapsed
+    return best, result
+
+
+mol2s = [m[1].split('\n') for m in split_multimol2(args.input)]
+ref = mol2s[0]
+
+print('%10s %14s %14s %9s' % ('queries', 'loop (s)', 'batch (s)', 'speedup'))
+for nqueries in [int(n) for n in args.nqueries.split(',')]:
+    queries = (mol2s * (nqueries // len(mol2s) + 1))[:nqueries]
+
+    t_loop, res_loop = best_of(lambda: [intermol_distance_match_loop(ref, q, CLIST, DISTANCE)
+                                        for q in queries], args.repeat)
+    t_vec, res_vec = best_of(lambda: DistanceReference(ref, CLIST).match_batch(queries, DISTANCE),
+                             args.repeat)
+    assert res_loop == res_vec
+
+    print('%10d %14.4f %14.4f %8.1fx' % (nqueries, t_loop, t_vec, t_loop / t_vec))
@@ -0,0 +1,119 @@
+#!/usr/bin/env python
+
+# Throughput benchmark (MB/s) of the streaming `mol2io.split_multimol2`
+# reader against the previous line-by-line reader
+# (`split_multimol2_lines` below). The molecules of tests/data/mol2s/confs.mol2
+# are tiled up to the requested file size and written to a temporary file.
+#
+# run
+# ./bench_split_multimol2.py -h
+# for help
+#
+
+import argparse
+import os
+import tempfile
+import time
+
+from pyprot.mol2io import split_multimol2
+
+
+parser = argparse.ArgumentParser(
+    description='Benchmarks multi-mol2 file splitting.',
+    formatter_class=argparse.RawTextHelpFormatter
+    )
+
+parser.add_argument('-i', '--input', type=str,
+        default=os.path.join(os.path.dirname(__file__), '..', 'tests', 'data', 'mol2s', 'confs.mol2'),
+        help='multi-mol2 file to tile (default: tests/data/mol2s/confs.mol2)')
+parser.add_argument('-s', '--sizes', type=str, default='10,100',
+        help='comma separated file sizes in MB (default: "10,100")')
+parser.add_argument('-r', '--repeat', type=int, default=3,
+        help='number of timing repeats, best run is reported (default: 3)')
+
+args = parser.parse_args()
+
+
+def split_multimol2_lines(multimol2):
+    """
+    Splits a multi-mol2 file (a mol2 file consisting of multiple mol2 entries)
+    into individual mol2-file contents line by line; the implementation
+    of `mol2io.split_multimol2` before it was buffered.
+
+    Parameters
+    ----------
+    
+    multimol2 : `str`.
+      Path to the multi-mol2 file.
+        
+    Returns:
+    ----------
+    
+    mol2 : generator of lists = `[molecule_id, mol2_cont]`.
+      `molecule_ide` is the name of the molecule specified after 
+       in the line following `@<TRIPOS>MOLECULE`. `mol2_cont` is 
+       the MOL2 file content in `str` format where each line is
+       separated by a newline (`\\n`) character.
+        
+    """
+    with open(multimol2, 'r') as mol2file:
+        line = ""
+        mol2cont = ""
+        single_mol2s = []
+        line = mol2file.readline()
+
+        while not mol2file.tell() == os.fstat(mol2file.fileno()).st_size:
+            if line.startswith("@<TRIPOS>MOLECULE"):
+                mol2cont = ""
+                mol2cont += line
+                line = mol2file.readline()
+                molecule_id = line.strip()
+
+                while not line.startswith("@<TRIPOS>MOLECULE"):
+                    mol2cont += line
+                    line = mol2file.readline()
+                    if mol2file.tell() == os.fstat(mol2file.fileno()).st_size:
+                        mol2cont += line
+                        break
+                
+                mol2 = [molecule_id, mol2cont]
+                yield mol2
+
+
+
+def best_of(func, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for mol2 in func():
+            pass
+        elapsed = time.perf_counter() - start
+        if best is None or elapsed < best:
+            best = elapsed
+    return best
+
+
+with open(args.input, 'rb') as in_file:
+    template = in_file.read()
+
+readers = [('reference', lambda path: split_multimol2_lines(path)),
+           ('str', lambda path: split_multimol2(path)),
+           ('lines', lambda path: split_multimol2(path, output='lines')),
+           ('bytes', lambda path: split_multimol2(path, output='bytes'))]
+
+print('%8s' % 'MB' + ''.join(['%16s' % ('%s MB/s' % name) for name, _ in readers]))
+for size in [float(s) for s in args.sizes.split(',')]:
+    reps = max(int(size * 2**20 / len(template)), 1)
+
+    with tempfile.NamedTemporaryFile('wb', suffix='.mol2', delete=False) as tmp:
+        for _ in range(reps):
+            tmp.write(template)
+    try:
+        megabytes = os.path.getsize(tmp.name) / 2**20
+        assert list(split_multimol2(tmp.name)) == list(split_multimol2_lines(tmp.name))
+        rates = [megabytes / best_of(lambda: reader(tmp.name), args.repeat)
+                 for _, reader in readers]
+    finally:
+        os.remove(tmp.name)
+
+    print('%8.1f' % megabytes + ''.join(['%16.1f' % rate for rate in rates]))
@@ -0,0 +1,277 @@
+#!/usr/bin/env python
+
+# Benchmark of the NumPy `statsbasic` functions against the previous
+# pure Python implementations (`median_`, `iqr_`, `std_dev_`, ... below)
+# on random B-factor-like values; both must return the same results.
+#
+# run
+# ./bench_statsbasic.py -h
+# for help
+#
+
+import argparse
+import random
+import time
+
+from pyprot import statsbasic
+
+
+parser = argparse.ArgumentParser(
+    description='Benchmarks the basic statistics functions.',
+    formatter_class=argparse.RawTextHelpFormatter
+    )
+
+parser.add_argument('-n', '--nvalues', type=str, default='10000,100000,1000000',
+        help='comma separated numbers of values (default: "10000,100000,1000000")')
+parser.add_argument('-r', '--repeat', type=int, default=3,
+        help='number of timing repeats, best run is reported (default: 3)')
+
+args = parser.parse_args()
+
+
+# pure Python implementations of `statsbasic` before it used NumPy
+
+def mean_(data_list):
+    """ 
+    Returns the sample mean of numbers in a list. 
+    
+    Parameters
+    ----------
+
+    data_list : `list`.
+      List of numeric items (`int` or `float`).
+
+    Returns
+    ----------
+    
+    sample_mean : `float`.  
+      Sample mean as `float`.
+    
+    """
+    if not data_list:
+        return None
+    total = 0
+    for ele in data_list:
+        total += ele
+    sample_mean = float(total)/len(data_list)
+    return sample_mean
+
+
+def median_(data_list):
+    """ 
+    Returns the sample median of numbers in a list. 
+    
+    Parameters
+    ----------
+
+    data_list : `list`.
+      List of numeric items (`int` or `float`).
+
+    Returns
+    ----------
+    
+    sample_median : `float`.  
+      Sample median as `float`.
+    
+    """
+    if not data_list:
+        return None
+    sorted_data = sorted(data_list)
+    length = len(sorted_data)
+    med_val = 0
+    if length % 2 != 0:
+        index = int((length - 1) / 2)
+        med_val = sorted_data[index]
+    else:
+        index_1 = int(length / 2)
+        index_2 = index_1 - 1
+        med_val = (sorted_data[index_1] + sorted_data[index_2]) / 2.0
+    return med_val
+
+
+def quartile1_(data_list):
+    """ 
+    Returns the first quartile of numbers in a list. 
+    
+    Parameters
+    ----------
+
+    data_list : `list`.
+      List of numeric items (`int` or `float`).
+
+    Returns
+    ----------
+    
+    q1_val : `float`.  
+      First quartile as `float`.
+    
+    """
+    sorted_data = sorted(data_list)
+    length = len(sorted_data)
+    if length % 2 != 0:
+        q1_val = median_(sorted_data[0:int((length-1)/2)])
+    else:
+        q1_val = median_(sorted_data[0:int((length)/2)])
+    return q1_val
+
+
+def quartile3_(data_list):
+    """ 
+    Returns the third quartile of numbers in a list. 
+    
+    Parameters
+    ----------
+
+    data_list : `list`.
+      List of numeric items (`int` or `float`).
+
+    Returns
+    ----------
+    
+    q3_val : `float`.  
+      Third quartile as `float`.
+    
+    """
+    sorted_data = sorted(data_list)
+    length = len(sorted_data)
+    if length % 2 != 0:
+        q3_val = median_(sorted_data[int( (length+1) / 2 ):])
+    else:
+        q3_val = median_(sorted_data[int((length) / 2):])
+    return q3_val
+
+
+def iqr_(data_list):
+    """ 
+    Returns the interquartile range of numbers in a list. 
+    
+    Parameters
+    ----------
+
+    data_list : `list`.
+      List of numeric items (`int` or `float`).
+
+    Returns
+    ----------
+    
+    iqr : `float`.  
+      Interquartile range as `float`.
+    
+    """
+    q1 = quartile1_(data_list)
+    q3 = quartile3_(data_list)
+    return q3 - q1
+
+
+def variance_(data_list, population=False):
+    """ 
+    Calculates the sample variance from a list of data.
+    
+    Parameters
+    ----------
+
+    data_list : `list`.
+      List of numeric items (`int` or `float`).
+      
+    population : `bool` (default=`False`)..
+      If False, calculates the sample variance
+      with Bessel's correction (n - 1) to account for higher
+      variability in sample distribution TO ESTIMATE the true population
+      variance.
+
+    Returns
+    ----------
+    
+    var : `float`.  
+      Sample variance as `float`.
+    
+    """
+    mean_val = sum(data_list) / float(len(data_list))
+    dev = sum([((i - mean_val)**2) for i in data_list])
+    if not population and len(data_list) > 2:
+        var = dev / (len(data_list) - 1)
+    else:
+        var = dev / len(data_list)
+    return var
+
+def std_dev_(data_list, population=False):
+    """ 
+    Calculates the sample standard deviation from a list of data.
+    
+    Parameters
+    ----------
+
+    data_list : `list`.
+      List of numeric items (`int` or `float`).
+      
+    population : `bool` (default=`False`).
+      If False, calculates the sample standard deviation
+      with Bessel's correction (n - 1) to account for higher
+      variability in sample distribution TO ESTIMATE the true population
+      standard deviation.
+
+    Returns
+    ----------
+    
+    stdev : `float`.  
+      Sample standard deviation as `float`.
+    
+    """
+    stdev = variance_(data_list, population)**0.5
+    return stdev
+
+
+def std_err_(data_list, population=False):
+    """ 
+    Calculates the sample standard error from a list of data.
+    
+    Parameters
+    ----------
+
+    data_list : `list`.
+      List of numeric items (`int` or `float`).
+      
+    population : `bool` (default=`False`).
+      If False, calculates the sample standard error
+      with Bessel's correction (n - 1) to account for higher
+      variability in sample distribution TO ESTIMATE the true population
+      standard error.
+
+    Returns
+    ----------
+    
+    sterr : `float`.  
+      Sample standard error as `float`.
+    
+    """
+    return std_dev_(data_list, population)/len(data_list)**0.5
+
+
+
+def best_of(func, data, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func(data)
+        elapsed = time.perf_counter() - start
+        if best is None or elapsed < best:
+            best = elapsed
+    return best, result
+
+
+def summary(funcs):
+    return lambda data: [func(data) for func in funcs]
+
+
+names = ('mean', 'median', 'iqr', 'std_dev')
+ref = summary([globals()[name + '_'] for name in names])
+new = summary([getattr(statsbasic, name) for name in names])
+
+random.seed(0)
+print('%10s %14s %14s %9s' % ('values', 'python (s)', 'numpy (s)', 'speedup'))
+for nvalues in [int(n) for n in args.nvalues.split(',')]:
+    data = [round(random.gammavariate(5, 6), 2) for _ in range(nvalues)]
+    t_ref, res_ref = best_of(ref, data, args.repeat)
+    t_new, res_new = best_of(new, data, args.repeat)
+    assert [round(v, 6) for v in res_ref] == [round(v, 6) for v in res_new], 'results differ'
+    print('%10d %14.4f %14.4f %8.1fx' % (nvalues, t_ref, t_new, t_ref / t_new))
@@ -0,0 +1,124 @@
+#!/usr/bin/env python
+
+# Benchmark of charge transfer from one template molecule onto many targets:
+# `mol2manip.ChargeTemplate.apply_batch` against the previous line-by-line
+# regex version (`swap_charge_regex` below). The conformers of tests/data/mol2s/confs.mol2 are
+# repeated up to the requested number of target molecules.
+#
+# run
+# ./bench_swap_charge.py -h
+# for help
+#
+
+import argparse
+import os
+import re
+import time
+
+from pyprot.mol2io import split_multimol2
+from pyprot.mol2manip import ChargeTemplate
+
+
+parser = argparse.ArgumentParser(
+    description='Benchmarks MOL2 charge transfer.',
+    formatter_class=argparse.RawTextHelpFormatter
+    )
+
+parser.add_argument('-i', '--input', type=str,
+        default=os.path.join(os.path.dirname(__file__), '..', 'tests', 'data', 'mol2s', 'confs.mol2'),
+        help='multi-mol2 file of conformers (default: tests/data/mol2s/confs.mol2)')
+parser.add_argument('-n', '--ntargets', type=str, default='1000,10000',
+        help='comma separated numbers of target molecules (default: "1000,10000")')
+parser.add_argument('-r', '--repeat', type=int, default=3,
+        help='number of timing repeats, best run is reported (default: 3)')
+
+args = parser.parse_args()
+
+
+def swap_charge_regex(template_mol2, target_mol2, template_col=-1, target_col=-1):
+    """
+    Transfers atom charges from one MOL2 file to a second MOL2 file line by line
+    (both files must have the same number of lines); the implementation of
+    `mol2manip.swap_charge` before `ChargeTemplate`.
+
+    Parameters
+    ----------
+
+    template_mol2 : `list`.
+      Template MOL2 file that contains the charges to be transfered. Every
+      list item in the `template_mol2` list represents one line of the MOL2
+      file.
+
+    target_mol2 : `list`.
+      Target MOL2 file that contains the charges to be received. Every
+      list item in the `template_mol2` list represents one line of the MOL2
+      file.
+
+    template_col : `int`.
+      Position of the charge information in the `re.split(r'(\\s+)', line)`
+      list of a template line, last item by default.
+
+    target_col : `int`.
+      Position of the charge information in the `re.split(r'(\\s+)', line)`
+      list of a target line, last item by default.
+
+    Returns:
+    ----------
+
+    out_mol2 : `list`
+      A new list of MOL2 contents for after the charge transfer. Every list item
+      in the list constitutes a single MOL2 line.
+
+    """
+    assert len(template_mol2) == len(target_mol2), 'Both Mol2 must be of same length.'
+    out_mol2 = []
+    atom_section = False
+    for r,f in zip(template_mol2, target_mol2):
+
+        # check if we are in atom coordinate section
+        if not atom_section and (r.startswith('@<TRIPOS>ATOM')
+                and f.startswith('@<TRIPOS>ATOM')):
+            atom_section = True
+        elif atom_section and (r.startswith('@<TRIPOS>') or
+                f.startswith('@<TRIPOS>')):
+            atom_section = False
+
+        # apply fix
+        if atom_section:
+            f_line = re.split(r'(\s+)', f)
+            r_line = re.split(r'(\s+)', r)
+            f_line[target_col] = r_line[template_col]
+            f = "".join(f_line)
+
+        out_mol2.append(f)
+
+    return out_mol2
+
+
+
+def best_of(func, repeat):
+    best, result = None, None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        elapsed = time.perf_counter() - start
+        if best is None or elapsed < best:
+            best = elapsed
+    return best, result
+
+
+# molecules with the same number of lines, as required by `swap_charge_regex`
+mol2s = [m[1].split('\n') for m in split_multimol2(args.input)]
+mol2s = [m for m in mol2s if len(m) == len(mol2s[0])]
+template = mol2s[0]
+
+print('%10s %14s %14s %9s' % ('targets', 'loop (s)', 'template (s)', 'speedup'))
+for ntargets in [int(n) for n in args.ntargets.split(',')]:
+    targets = (mol2s * (ntargets // len(mol2s) + 1))[:ntargets]
+
+    t_loop, out_loop = best_of(lambda: [swap_charge_regex(template, t) for t in targets], args.repeat)
+    charges = ChargeTemplate(template)
+    t_vec, out_vec = best_of(lambda: charges.apply_batch(targets), args.repeat)
+    assert out_loop == out_vec
+
+    print('%10d %14.4f %14.4f %8.1fx' % (ntargets, t_loop, t_vec, t_loop / t_vec))
@@ -10,4 +10,5 @@ file operations and protein analyses.
 __version__ = '1.0.4'
 
 from pyprot.pdbmain import Pdb
+from pyprot.mol2main import Mol2
 
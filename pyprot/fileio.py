@@ -0,0 +1,93 @@
+"""
+Opening plain and compressed (gzip, bzip2, xz) PDB and MOL2 files.
+Used by the readers and writers in `pdbmain`, `pdbio`, and `mol2io`.
+"""
+
+import bz2
+import gzip
+import lzma
+import os
+
+
+# leading bytes of compressed files: [compression, magic bytes]
+COMPRESSION_MAGIC = [['gz', b'\x1f\x8b'],
+                     ['bz2', b'BZh'],
+                     ['xz', b'\xfd7zXZ\x00']]
+
+# file name extensions of compressed output files
+COMPRESSION_EXT = {'.gz': 'gz', '.bz2': 'bz2', '.xz': 'xz'}
+
+_OPENERS = {'gz': lambda path, mode: gzip.open(path, mode, compresslevel=6),
+            'bz2': lambda path, mode: bz2.open(path, mode),
+            'xz': lambda path, mode: lzma.open(path, mode)}
+
+
+def detect_compression(path):
+    """
+    Detects the compression of a file from its first bytes.
+
+    Parameters
+    ----------
+
+    path : `str`.
+      Path to an existing file.
+
+    Returns
+    ----------
+
+    compression : `str` or `None`.
+      `'gz'`, `'bz2'`, `'xz'`, or `None` for uncompressed files.
+
+    """
+    with open(path, 'rb') as f:
+        head = f.read(6)
+    for compression, magic in COMPRESSION_MAGIC:
+        if head.startswith(magic):
+            return compression
+    return None
+
+
+def compression_from_ext(path):
+    """ `'gz'`, `'bz2'`, `'xz'`, or `None` from the file name extension. """
+    return COMPRESSION_EXT.get(os.path.splitext(path)[1].lower())
+
+
+def open_file(path, mode='rb', compression='infer'):
+    """
+    Opens a plain or compressed file. Files opened for reading are
+    decompressed as a stream if they start with gzip, bzip2, or xz magic
+    bytes (independent of the file name); files opened for writing are
+    compressed if the file name ends with `.gz`, `.bz2`, or `.xz`.
+
+    Parameters
+    ----------
+
+    path : `str`.
+      Path to the file.
+
+    mode : `str` (default: `'rb'`).
+      File mode as for `open`, e.g., `'r'`, `'rb'`, `'w'`, or `'wb'`.
+
+    compression : `str` or `None` (default: `'infer'`).
+      `'gz'`, `'bz2'`, `'xz'`, or `None` to override the detection.
+
+    Returns
+    ----------
+
+    file : file object.
+
+    """
+    if compression == 'infer':
+        if 'r' in mode:
+            compression = detect_compression(path)
+        else:
+            compression = compression_from_ext(path)
+    if compression is None:
+        return open(path, mode)
+    if compression not in _OPENERS:
+        raise ValueError('compression must be gz, bz2, xz, or None')
+
+    # the compression modules default to binary mode
+    if 'b' not in mode and 't' not in mode:
+        mode += 't'
+    return _OPENERS[compression](path, mode)
@@ -3,6 +3,11 @@ Sub-package for filtering MOL2 files by different criteria.
 """
 
 import os
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+from collections import deque
+import numpy as np
+from .pdbspatial import CellList
+from .mol2main import Mol2
 
 def mol2_to_coords(line):
     """ 
@@ -86,6 +91,171 @@ def create_chargetype_list(group_charge_pairs, atom_list=None):
     return atom_list
 
 
+class ChargetypeMatcher(object):
+    """
+    Compiled form of a `chargetype_list` for matching the atoms of many
+    molecules. The atom types and charge intervals of the criteria are
+    stored once in `numpy` arrays, so that all atoms of a molecule are
+    tested against all criteria in a single vectorized comparison.
+
+    Parameters
+    ----------
+
+    chargetype_list : `list`.
+      `list` of sub`list`s that consists of atom types as first sublist item, 
+      and the allowed charge range is given as 2nd and 3rd sublist items
+      (optional). E.g., `[['O.2', -1.12, -0.792], ['O.3']]`
+
+    Attributes
+    ----------
+
+    type_codes : `dict`.
+      Atom type -> integer code.
+
+    criterion_type : `ndarray`, shape `(len(chargetype_list),)`.
+      Atom type code of every criterion.
+
+    min_charge, max_charge : `ndarray`, shape `(len(chargetype_list),)`.
+      Charge interval of every criterion; criteria without a charge range
+      have an infinite interval.
+
+    ranged : `ndarray`, shape `(len(chargetype_list),)`.
+      `True` for the criteria with a charge range.
+
+    """
+
+    def __init__(self, chargetype_list):
+        self.chargetype_list = [list(atom) for atom in chargetype_list]
+        n_criteria = len(self.chargetype_list)
+
+        self.type_codes = dict()
+        self.criterion_type = np.empty(n_criteria, dtype=np.intp)
+        self.min_charge = np.full(n_criteria, -np.inf)
+        self.max_charge = np.full(n_criteria, np.inf)
+        self.ranged = np.zeros(n_criteria, dtype=bool)
+        for idx, atom in enumerate(self.chargetype_list):
+            self.criterion_type[idx] = self.type_codes.setdefault(atom[0], len(self.type_codes))
+            if len(atom) == 3: # optional: requires user defined charge range
+                self.min_charge[idx], self.max_charge[idx] = atom[1], atom[2]
+                self.ranged[idx] = True
+
+    def __len__(self):
+        return len(self.chargetype_list)
+
+    def match(self, mol2_cont):
+        """
+        Matches the atoms of a molecule against all criteria.
+
+        Parameters
+        ----------
+
+        mol2_cont : `list` or `Mol2`.
+          MOL2 file content as where each `list` item represents a line.
+
+        Returns
+        ----------
+
+        atom_lines : `list`.
+          Lines of the ATOM section as `str`.
+
+        hits : `ndarray`, shape `(len(atom_lines), len(chargetype_list))`.
+          `True` where an atom matches a criterion.
+
+        """
+        atom_lines, atom_types, charges = _atom_columns(mol2_cont)
+        return atom_lines, self.match_columns(atom_types, charges)
+
+    def match_columns(self, atom_types, charges):
+        """
+        Matches parsed atom type and charge columns against all criteria.
+
+        Parameters
+        ----------
+
+        atom_types : `list` or `ndarray`.
+          SYBYL atom types as `str`.
+
+        charges : `ndarray`, shape `(N,)`.
+          Atom charges.
+
+        Returns
+        ----------
+
+        hits : `ndarray`, shape `(N, len(chargetype_list))`.
+          `True` where an atom matches a criterion.
+
+        """
+        if isinstance(atom_types, np.ndarray):
+            # look up each distinct atom type only once
+            uniq, inverse = np.unique(atom_types, return_inverse=True)
+            codes = np.array([self.type_codes.get(t, -1) for t in uniq.tolist()], dtype=np.intp)
+            codes = codes[inverse.reshape(-1)]
+        else:
+            codes = np.array([self.type_codes.get(t, -1) for t in atom_types], dtype=np.intp)
+        charges = np.asarray(charges, dtype=np.float64)[:, np.newaxis]
+        in_range = (charges >= self.min_charge) & (charges <= self.max_charge)
+        hits = (codes[:, np.newaxis] == self.criterion_type) & (in_range | ~self.ranged)
+        return hits
+
+
+def _atom_columns(mol2_cont, coords=False):
+    """
+    Lines, SYBYL atom types, and charges (9th column, or the last column
+    of shorter lines; `nan` if invalid) of the ATOM section of a MOL2 file
+    content `list`, and if `coords` is `True` the XYZ coordinates as an
+    `(N, 3)` array. If there is no `@<TRIPOS>ATOM` line, all lines up to
+    the first `@<TRIPOS>` line are read. For a `Mol2` object, its parsed
+    arrays are returned.
+
+    """
+    if isinstance(mol2_cont, Mol2):
+        if coords:
+            return mol2_cont.atom_lines, mol2_cont.atom_type, mol2_cont.charge, mol2_cont.xyz
+        return mol2_cont.atom_lines, mol2_cont.atom_type, mol2_cont.charge
+
+    start = 0
+    for idx, line in enumerate(mol2_cont):
+        if line.startswith('@<TRIPOS>ATOM'):
+            start = idx + 1
+            break
+    section = mol2_cont[start:]
+    for idx, line in enumerate(section):
+        if line.startswith('@<TRIPOS>'):
+            section = section[:idx]
+            break
+
+    rows = [line.split() for line in section]
+    if not all([len(fields) >= 6 for fields in rows]):
+        section = [line for line, fields in zip(section, rows) if len(fields) >= 6]
+        rows = [fields for fields in rows if len(fields) >= 6]
+    atom_lines = section
+    atom_types = [fields[5] for fields in rows]
+    # the charge is followed by an optional status bit column, e.g., BACKBONE
+    charges = [fields[8] if len(fields) > 9 else fields[-1] for fields in rows]
+
+    try:
+        charges = np.array(charges, dtype=np.float64)
+    except ValueError:
+        values = np.empty(len(charges), dtype=np.float64)
+        for idx, charge in enumerate(charges):
+            try:
+                values[idx] = float(charge)
+            except ValueError:
+                values[idx] = np.nan
+        charges = values
+    if coords:
+        xyz = np.array([fields[2:5] for fields in rows], dtype=np.float64).reshape(-1, 3)
+        return atom_lines, atom_types, charges, xyz
+    return atom_lines, atom_types, charges
+
+
+def _as_matcher(chargetype_list):
+    """ Compiles a `chargetype_list` unless it is a `ChargetypeMatcher` already. """
+    if isinstance(chargetype_list, ChargetypeMatcher):
+        return chargetype_list
+    return ChargetypeMatcher(chargetype_list)
+
+
 def _filter_atoms(mol2_cont, chargetype_list):
     """
     Searches for atom types in a mol2 file.
@@ -97,7 +267,7 @@ def _filter_atoms(mol2_cont, chargetype_list):
     mol2_cont : `list`.
       MOL2 file content as where each `list` item represents a line.
       
-    chargetype_list : `list`. 
+    chargetype_list : `list` or `ChargetypeMatcher`. 
       `list` of sub`list`s that consists of atom types as first sublist item, 
       and the allowed charge range is given as 2nd and 3rd sublist items.
       E.g., `[['O.2', -1.12, -0.792], ['O.2', -0.595, -0.315]]`
@@ -107,27 +277,15 @@ def _filter_atoms(mol2_cont, chargetype_list):
     ---------- 
 
     matched_lines : `list`.
-      The mol2 lines that contains matches as a `list`.
+      The mol2 lines that contains matches as a `list`, a line
+      is repeated for every criterion that it matches.
 
     """
+    atom_lines, hits = _as_matcher(chargetype_list).match(mol2_cont)
+    counts = hits.sum(axis=1)
     matched_lines = []
-    for line in mol2_cont:
-        fields = line.split()
-        for atom in chargetype_list:
-            if atom[0] in fields:
-                if len(atom) == 3: # optional: requires user defined charge range
-                    try:
-                        charge = float(fields[-1])
-                    except ValueError:
-                        print("Error: cannot get charge")
-                        continue
-                    if charge >= atom[1] \
-                            and charge <= atom[2]:
-                        matched_lines.append(line)
-                else:
-                    matched_lines.append(line)
-        if '@<TRIPOS>BOND' in fields:
-            break
+    for idx in np.flatnonzero(counts):
+        matched_lines.extend([atom_lines[idx]] * int(counts[idx]))
     return matched_lines
 
 
@@ -141,7 +299,7 @@ def count_matches(mol2_cont, chargetype_list):
     mol2_cont : `list`.
       MOL2 file content as where each `list` item represents a line.
       
-    chargetype_list : `list`. 
+    chargetype_list : `list` or `ChargetypeMatcher`. 
       `list` of sub`list`s that consists of atom types as first sublist item, 
       and the allowed charge range is given as 2nd and 3rd sublist items.
       E.g., `[['O.2', -1.12, -0.792], ['O.2', -0.595, -0.315]]`
@@ -154,7 +312,8 @@ def count_matches(mol2_cont, chargetype_list):
       atom-charge pairs in the `chargetype_list`.
 
     """
-    cnt = len(_filter_atoms(mol2_cont, chargetype_list))
+    atom_lines, hits = _as_matcher(chargetype_list).match(mol2_cont)
+    cnt = int(hits.sum())
     return cnt
 
 
@@ -169,7 +328,7 @@ def match_all(mol2_cont, chargetype_list):
     mol2_cont : `list`.
       MOL2 file content as where each `list` item represents a line.
       
-    chargetype_list : `list`.
+    chargetype_list : `list` or `ChargetypeMatcher`.
       `list` of sub`list`s that consists of atom types as first sublist item, 
       and the allowed charge range is given as 2nd and 3rd sublist items.
       E.g., `[['O.2', -1.12, -0.792], ['O.2', -0.595, -0.315]]`
@@ -181,34 +340,109 @@ def match_all(mol2_cont, chargetype_list):
       True if all atoms are matched.
 
     """
-    prefilter = _filter_atoms(mol2_cont, chargetype_list)
-    check_dict = {idx:0 for idx in range(len(chargetype_list))}
-    matched = False
-    
-    for line in prefilter:
-        fields = line.split()
-        for idx,atom in enumerate(chargetype_list):
-            if atom[0] in fields:
-                if len(atom) == 3: # optional: requires user defined charge range
-                    try:
-                        charge = float(fields[-1])
-                    except ValueError:
-                        print("Error: cannot get charge")
-                        continue
-                    if charge >= atom[1] and charge <= atom[2]:
-                        check_dict[idx] += 1
-                else:
-                    check_dict[idx] += 1
-        if '@<TRIPOS>BOND' in fields:
-            break
-    for i in check_dict.values():
-        if i < 1:
-            return matched
-    
-    matched = True
+    atom_lines, hits = _as_matcher(chargetype_list).match(mol2_cont)
+    matched = bool(hits.any(axis=0).all())
     return matched
 
 
+class DistanceReference(object):
+    """
+    Functional group atoms of a reference molecule for intermolecular
+    distance screening. The coordinates of the reference atoms that match
+    each criterion are extracted once and reused for every query molecule.
+
+    Parameters
+    ----------
+
+    mol2_ref : `list`.
+      MOL2 file content of the reference molecule where each list item
+      represents a single line in the mol2 file.
+
+    chargetype_list : `list` or `ChargetypeMatcher`.
+      `list` of sub`list`s that consists of atom types as first sublist item, 
+      and the allowed charge range is given as 2nd and 3rd sublist items.
+      E.g., `[['O.2', -1.12, -0.792], ['O.2', -0.595, -0.315]]`
+
+    Attributes
+    ----------
+
+    coords : `list` of `ndarray`s, shape `(N_i, 3)`.
+      Coordinates of the reference atoms that match criterion `i`.
+
+    """
+
+    def __init__(self, mol2_ref, chargetype_list):
+        self.matcher = _as_matcher(chargetype_list)
+        atom_lines, atom_types, charges, coords = _atom_columns(_as_lines(mol2_ref), coords=True)
+        hits = self.matcher.match_columns(atom_types, charges)
+        self.coords = [coords[hits[:, idx]] for idx in range(len(self.matcher))]
+        self._index = [CellList(c) if c.shape[0] else None for c in self.coords]
+
+    def match(self, mol2_query, distance):
+        """
+        Counts the reference atoms that have a query atom of the same
+        criterion in a distance range, see `intermol_distance_match`.
+
+        """
+        return self.match_batch([mol2_query], distance)[0]
+
+    def match_batch(self, mol2_queries, distance):
+        """
+        Counts the reference atoms that have a query atom of the same
+        criterion in a distance range for a batch of query molecules.
+        The atoms of all queries are tested in one ball query per criterion.
+
+        Parameters
+        ----------
+
+        mol2_queries : `list`.
+          MOL2 file contents of the query molecules as `list`s of lines
+          (or `str`).
+
+        distance : `list`.
+          List of 2 numbers that specify the allowed distance
+          between the 2 atoms in Angstrom. E.g., `[4, 12.5]`
+
+        Returns
+        ----------
+
+        match_dicts : `list` of `dict`s.
+          One `match_dict` per query molecule, see `intermol_distance_match`.
+
+        """
+        n_queries, n_criteria = len(mol2_queries), len(self.matcher)
+        query_coords, query_hits, query_mol = [], [], []
+        for mol_idx, mol2_query in enumerate(mol2_queries):
+            atom_lines, atom_types, charges, coords = _atom_columns(_as_lines(mol2_query), coords=True)
+            hits = self.matcher.match_columns(atom_types, charges)
+            rows = np.flatnonzero(hits.any(axis=1))
+            query_coords.append(coords[rows])
+            query_hits.append(hits[rows])
+            query_mol.append(np.full(rows.shape[0], mol_idx, dtype=np.intp))
+        query_coords = np.concatenate(query_coords) if query_coords else np.empty((0, 3))
+        query_hits = np.concatenate(query_hits) if query_hits else np.empty((0, n_criteria), dtype=bool)
+        query_mol = np.concatenate(query_mol) if query_mol else np.empty(0, dtype=np.intp)
+
+        counts = np.zeros((n_queries, n_criteria), dtype=np.intp)
+        for idx in range(n_criteria):
+            sel = np.flatnonzero(query_hits[:, idx])
+            if self._index[idx] is None or not sel.shape[0]:
+                continue
+            ref = self.coords[idx]
+            centers = query_coords[sel]
+            center_idx, ref_idx = self._index[idx].query_pairs(centers, distance[1])
+            dist = np.sqrt(((ref[ref_idx] - centers[center_idx])**2).sum(axis=1))
+            keep = dist >= distance[0]
+
+            # a reference atom counts once per query molecule
+            pairs = np.unique(query_mol[sel[center_idx[keep]]] * ref.shape[0] + ref_idx[keep])
+            counts[:, idx] += np.bincount(pairs // ref.shape[0], minlength=n_queries)
+
+        return [{idx: [self.matcher.chargetype_list[idx], int(counts[mol_idx, idx])]
+                 for idx in range(n_criteria)}
+                for mol_idx in range(n_queries)]
+
+
 def intermol_distance_match(mol2_ref, mol2_query, chargetype_list, distance):
     """
     Searches for atom types in MOL2 file(s). Returns True if
@@ -217,9 +451,10 @@ def intermol_distance_match(mol2_ref, mol2_query, chargetype_list, distance):
     Parameters
     ----------   
     
-    mol2_ref (list) : `list`.
+    mol2_ref (list) : `list` or `DistanceReference`.
         MOL2 file content of the reference molecule where each list item represents
-        a single line in the mol2 file.
+        a single line in the mol2 file, or a `DistanceReference` to reuse for
+        many queries (`chargetype_list` is then ignored).
         mol2_query (list): mol2 file content of a query molecule where each list item represents
                      a single line in the mol2 file.
     chargetype_list : `list`.
@@ -235,33 +470,174 @@ def intermol_distance_match(mol2_ref, mol2_query, chargetype_list, distance):
     ----------
 
     match_dict : `dict`.
-      A dictionary with the count of chargetypes matched.
+      A dictionary with the count of reference atoms per chargetype that
+      have at least one query atom of the same chargetype in the distance range.
       E.g., `{ 0: [['O.2', -1.0, 0.0], 3],         # 3 matches
               1: [['N.am', -0.8181, -0.2181], 1]  # 1 match
             }`
 
     """
-    match_dict = {i:[chargetype_list[i], 0] for i in range(len(chargetype_list))}
-    
-    for idx,lst in enumerate(chargetype_list):
-        atom1_matches = _filter_atoms(mol2_ref, [lst])
-        atom2_matches = _filter_atoms(mol2_query, [lst])
-        coords_1 = []
-        coords_2 = []
-        for line in atom1_matches:
-            line = line.strip().split()
-            coords_1.append([float(i) for i in line[2:5]])
-            # expected format of a 'line':
-            # ['11', 'O1', '0.0847', '-6.3706', '-0.6593', 'O.2', '1', '<0>', '-0.0409']
-        for line in atom2_matches:
-            line = line.strip().split()
-            coords_2.append([float(i) for i in line[2:5]])
-        
-        for xyz_1 in coords_1:
-            for xyz_2 in coords_2:
-                dist = sum([(j-i)**2 for i,j in zip(xyz_1,xyz_2)])**0.5
-                if dist >= distance[0] and dist <= distance[1]:
-                    match_dict[idx][1] += 1
-                    break
-
+    if not isinstance(mol2_ref, DistanceReference):
+        mol2_ref = DistanceReference(mol2_ref, chargetype_list)
+    match_dict = mol2_ref.match(mol2_query, distance)
     return match_dict
+
+
+def distance_match(mol2_cont, chargetype_list, distance):
+    """
+    Checks if a molecule contains 2 atoms of the defined types (and charge
+    ranges) within a certain distance range of each other.
+
+    Parameters
+    ----------
+
+    mol2_cont : `list`.
+      MOL2 file content as where each `list` item represents a line.
+
+    chargetype_list : `list` or `ChargetypeMatcher`.
+      2 criteria, i.e., sub`list`s that consist of the atom type as first
+      sublist item, and the allowed charge range as 2nd and 3rd sublist items
+      (optional). E.g., `[['O.2', -1.12, -0.792], ['O.3', -0.595, -0.315]]`
+
+    distance : `float` or `list`.
+      Max. distance or list of 2 numbers that specify the allowed distance
+      between the 2 atoms in Angstrom. E.g., `[4, 12.5]`
+
+    Returns
+    ----------
+
+    matched : `bool`.
+      True if an atom matching the 1st criterion and a different atom
+      matching the 2nd criterion are within the distance range.
+
+    """
+    matcher = _as_matcher(chargetype_list)
+    if len(matcher) != 2:
+        raise ValueError('chargetype_list must contain 2 criteria')
+    if not isinstance(distance, (list, tuple)):
+        distance = [0.0, distance]
+
+    atom_lines, atom_types, charges, coords = _atom_columns(_as_lines(mol2_cont), coords=True)
+    hits = matcher.match_columns(atom_types, charges)
+    idx1, idx2 = np.flatnonzero(hits[:, 0]), np.flatnonzero(hits[:, 1])
+    if not idx1.shape[0] or not idx2.shape[0]:
+        return False
+
+    dist = np.sqrt(((coords[idx1][:, np.newaxis] - coords[idx2][np.newaxis])**2).sum(axis=2))
+    in_range = (dist >= distance[0]) & (dist <= distance[1])
+    in_range &= idx1[:, np.newaxis] != idx2[np.newaxis]
+    matched = bool(in_range.any())
+    return matched
+
+
+def _chunks(iterable, chunksize):
+    """ Groups the items of an iterable into `list`s of `chunksize` items. """
+    chunk = []
+    for item in iterable:
+        chunk.append(item)
+        if len(chunk) == chunksize:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _as_lines(mol2_cont):
+    """ MOL2 content as a `list` of lines, accepts `str`, `bytes`, or line lists; `Mol2` objects are passed through. """
+    if isinstance(mol2_cont, bytes):
+        mol2_cont = mol2_cont.decode('utf-8')
+    if isinstance(mol2_cont, str):
+        mol2_cont = mol2_cont.split('\n')
+    return mol2_cont
+
+
+def _screen_chunk(filterfunc, chunk, batch=False):
+    """ Applies `filterfunc` to the contents of a chunk of `[molecule_id, mol2_cont]` lists. """
+    if batch:
+        return filterfunc([_as_lines(mol2[1]) for mol2 in chunk])
+    return [filterfunc(_as_lines(mol2[1])) for mol2 in chunk]
+
+
+def screen_mol2s(mol2s, filterfunc, n_jobs=1, chunksize=64, ordered=True, batch=False):
+    """
+    Applies a filter function to a stream of MOL2 molecules, optionally
+    distributing chunks of molecules over a pool of processes.
+
+    Parameters
+    ----------
+
+    mol2s : iterable of lists = `[molecule_id, mol2_cont]`.
+      E.g., the generator returned by `mol2io.split_multimol2`;
+      `mol2_cont` may be a `str`, `bytes`, or a `list` of lines.
+
+    filterfunc : `function`.
+      Takes the MOL2 content as a `list` of lines and returns the screening
+      result, e.g., `functools.partial(count_matches, chargetype_list=clist)`.
+      Must be picklable (a module-level function or a `functools.partial`
+      of one) if `n_jobs > 1`.
+
+    n_jobs : `int` (default: `1`).
+      Number of processes. If `1`, the molecules are screened in
+      this process.
+
+    chunksize : `int` (default: `64`).
+      Number of molecules that are sent to a process at once.
+
+    ordered : `bool` (default: `True`).
+      If `True`, results are returned in the order of `mol2s`; else in
+      the order in which the chunks finish, which keeps all processes busy
+      if the screening time varies between molecules.
+
+    batch : `bool` (default: `False`).
+      If `True`, `filterfunc` takes a `list` with the contents of all
+      molecules of a chunk and returns a `list` of results, e.g.,
+      `functools.partial(reference.match_batch, distance=[0, 5])`
+      for a `DistanceReference`.
+
+    Returns
+    ----------
+
+    results : generator of tuples = `(mol2, result)`.
+      The `[molecule_id, mol2_cont]` input and the return value of `filterfunc`.
+
+    """
+    if n_jobs <= 1:
+        if batch:
+            for chunk in _chunks(mol2s, chunksize):
+                for result in zip(chunk, _screen_chunk(filterfunc, chunk, batch)):
+                    yield result
+        else:
+            for mol2 in mol2s:
+                yield mol2, filterfunc(_as_lines(mol2[1]))
+        return
+
+    # a bounded number of chunks is in flight, so memory stays constant
+    max_pending = 2 * n_jobs
+    chunks = _chunks(mol2s, chunksize)
+    with ProcessPoolExecutor(max_workers=n_jobs) as pool:
+        if ordered:
+            pending = deque()
+            for chunk in chunks:
+                pending.append((chunk, pool.submit(_screen_chunk, filterfunc, chunk, batch)))
+                if len(pending) >= max_pending:
+                    chunk, future = pending.popleft()
+                    for result in zip(chunk, future.result()):
+                        yield result
+            while pending:
+                chunk, future = pending.popleft()
+                for result in zip(chunk, future.result()):
+                    yield result
+        else:
+            pending = dict()
+            for chunk in chunks:
+                pending[pool.submit(_screen_chunk, filterfunc, chunk, batch)] = chunk
+                if len(pending) >= max_pending:
+                    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        for result in zip(pending.pop(future), future.result()):
+                            yield result
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    for result in zip(pending.pop(future), future.result()):
+                        yield result
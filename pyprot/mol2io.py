@@ -2,18 +2,109 @@
 Sub-package for MOL2 file processing.
 """
 
+import mmap
 import os
+from .mol2main import Mol2
+from .fileio import open_file, detect_compression
 
-def split_multimol2(multimol2):
+
+# header that starts every molecule in a (multi-)MOL2 file
+MOL2_HEADER = b'@<TRIPOS>MOLECULE'
+
+# file name suffix of the sidecar index written by `index_multimol2`
+MOL2_INDEX_SUFFIX = '.idx'
+
+
+def _mol2_blocks(mol2file, bufsize=2**20):
+    """
+    Reads a binary multi-mol2 file object in chunks of `bufsize` bytes and
+    yields `(offset, block)` tuples, where `block` holds the raw `bytes` of a
+    molecule from its `@<TRIPOS>MOLECULE` line up to the next one and
+    `offset` is its position in the file. Memory use is bounded by the size of
+    the largest molecule plus `bufsize`. Lines before the first molecule are
+    skipped.
+
+    """
+    sep = b'\n' + MOL2_HEADER
+    # a leading newline lets a header on the first line match `sep`
+    buf = b'\n' + mol2file.read(bufsize)
+    base = -1
+    start = None
+    scan = 0
+    while True:
+        if start is None:
+            pos = buf.find(sep, scan)
+            if pos >= 0:
+                start = pos + 1
+        if start is not None:
+            pos = buf.find(sep, max(scan, start))
+            while pos >= 0:
+                yield base + start, buf[start:pos + 1]
+                start = pos + 1
+                pos = buf.find(sep, start)
+
+        chunk = mol2file.read(bufsize)
+        if not chunk:
+            break
+
+        # drop consumed bytes; only the unscanned tail is searched again
+        keep = start if start is not None else max(len(buf) - len(sep) + 1, 0)
+        buf = buf[keep:] + chunk
+        base += keep
+        scan = max(len(buf) - len(chunk) - len(sep) + 1, 0)
+        if start is not None:
+            start = 0
+
+    if start is not None and start < len(buf):
+        yield base + start, buf[start:]
+
+
+def _molecule_id(block):
+    """ Molecule name from the line after `@<TRIPOS>MOLECULE` in a raw block. """
+    id_line = block.split(b'\n', 2)[1:2]
+    return id_line[0].strip().decode('utf-8') if id_line else ''
+
+
+def _convert_block(block, output):
+    """ Converts a raw molecule block into the `output` format of `split_multimol2`. """
+    if output == 'bytes':
+        return block
+    if output == 'mol2':
+        return Mol2(block)
+    if b'\r' in block:
+        block = block.replace(b'\r\n', b'\n').replace(b'\r', b'\n')
+    mol2cont = block.decode('utf-8')
+    if output == 'lines':
+        mol2cont = mol2cont.split('\n')
+        if not mol2cont[-1]:
+            mol2cont.pop()
+    return mol2cont
+
+
+def split_multimol2(multimol2, output='str', bufsize=2**20):
     """
     Splits a multi-mol2 file (a mol2 file consisting of multiple mol2 entries)
     into individual mol2-file contents.
 
+    The file is streamed in buffered binary chunks, so that memory use stays
+    constant regardless of the size of the multi-mol2 file.
+
     Parameters
     ----------
     
     multimol2 : `str`.
-      Path to the multi-mol2 file.
+      Path to the multi-mol2 file. Compressed files (gzip, bzip2, xz)
+      are detected by their magic bytes and decompressed as a stream.
+
+    output : `str` (default: `'str'`).
+      Format of the MOL2 contents, `'str'`, `'lines'`, `'bytes'`, or `'mol2'`.
+      `"str"`: A single `str` where lines are separated by `\\n`.
+      `"lines"`: A `list` of `str` lines without newline characters.
+      `"bytes"`: The raw `bytes` as stored in the file.
+      `"mol2"`: A parsed `Mol2` object.
+
+    bufsize : `int` (default: `2**20`).
+      Number of bytes that are read from the file at once.
         
     Returns:
     ----------
@@ -22,28 +113,197 @@ def split_multimol2(multimol2):
       `molecule_ide` is the name of the molecule specified after 
        in the line following `@<TRIPOS>MOLECULE`. `mol2_cont` is 
        the MOL2 file content in `str` format where each line is
-       separated by a newline (`\n`) character.
-        
-    """
-    with open(multimol2, 'r') as mol2file:
-        line = ""
-        mol2cont = ""
-        single_mol2s = []
-        line = mol2file.readline()
-
-        while not mol2file.tell() == os.fstat(mol2file.fileno()).st_size:
-            if line.startswith("@<TRIPOS>MOLECULE"):
-                mol2cont = ""
-                mol2cont += line
-                line = mol2file.readline()
-                molecule_id = line.strip()
-
-                while not line.startswith("@<TRIPOS>MOLECULE"):
-                    mol2cont += line
-                    line = mol2file.readline()
-                    if mol2file.tell() == os.fstat(mol2file.fileno()).st_size:
-                        mol2cont += line
-                        break
-                
-                mol2 = [molecule_id, mol2cont]
+       separated by a newline (`\\n`) character.
+        
+    """
+    if output not in ('str', 'lines', 'bytes', 'mol2'):
+        raise ValueError('output must be str, lines, bytes, or mol2')
+
+    with open_file(multimol2, 'rb') as mol2file:
+        for offset, block in _mol2_blocks(mol2file, bufsize=bufsize):
+            mol2 = [_molecule_id(block), _convert_block(block, output)]
+            yield mol2
+
+
+def index_multimol2(multimol2, index_file=None, bufsize=2**20):
+    """
+    Builds a byte-offset index of a multi-mol2 file and writes it to a
+    tab-separated sidecar file. Compressed files cannot be indexed, since
+    they do not support random access; they raise a `ValueError`.
+
+    Parameters
+    ----------
+    
+    multimol2 : `str`.
+      Path to the multi-mol2 file.
+
+    index_file : `str` (default: `None`).
+      Path of the index file. If `None`, `multimol2 + MOL2_INDEX_SUFFIX`.
+
+    bufsize : `int` (default: `2**20`).
+      Number of bytes that are read from the file at once.
+        
+    Returns:
+    ----------
+    
+    index : `list` of lists = `[molecule_id, offset, length]`.
+      Molecule name, byte offset, and length in bytes of every
+      molecule in file order.
+        
+    """
+    if index_file is None:
+        index_file = multimol2 + MOL2_INDEX_SUFFIX
+    if detect_compression(multimol2):
+        raise ValueError('%s is compressed and cannot be indexed' % multimol2)
+    with open(multimol2, 'rb') as mol2file:
+        stat = os.fstat(mol2file.fileno())
+        index = [[_molecule_id(block), offset, len(block)]
+                 for offset, block in _mol2_blocks(mol2file, bufsize=bufsize)]
+    with open(index_file, 'w') as out_file:
+        out_file.write('# %d %d\n' % (stat.st_size, stat.st_mtime_ns))
+        for molecule_id, offset, length in index:
+            out_file.write('%s\t%d\t%d\n' % (molecule_id, offset, length))
+    return index
+
+
+def read_mol2_index(multimol2, index_file=None):
+    """
+    Reads the sidecar index of a multi-mol2 file written by `index_multimol2`.
+
+    Parameters
+    ----------
+    
+    multimol2 : `str`.
+      Path to the multi-mol2 file.
+
+    index_file : `str` (default: `None`).
+      Path of the index file. If `None`, `multimol2 + MOL2_INDEX_SUFFIX`.
+        
+    Returns:
+    ----------
+    
+    index : `list` of lists = `[molecule_id, offset, length]`.
+      Molecule name, byte offset, and length in bytes of every
+      molecule in file order.
+
+    Raises a `ValueError` if the size or modification time of `multimol2`
+    changed since the index was written.
+        
+    """
+    if index_file is None:
+        index_file = multimol2 + MOL2_INDEX_SUFFIX
+    with open(index_file, 'r') as in_file:
+        stored = in_file.readline()[1:].split()
+        stat = os.stat(multimol2)
+        if stored != [str(stat.st_size), str(stat.st_mtime_ns)]:
+            raise ValueError('%s is outdated, rebuild it with index_multimol2' % index_file)
+        index = []
+        for line in in_file:
+            molecule_id, offset, length = line.rstrip('\n').rsplit('\t', 2)
+            index.append([molecule_id, int(offset), int(length)])
+    return index
+
+
+def fetch_mol2s(multimol2, molecule_ids=None, index=None, output='str'):
+    """
+    Fetches molecules from a memory-mapped multi-mol2 file by byte offset.
+
+    Parameters
+    ----------
+    
+    multimol2 : `str`.
+      Path to the multi-mol2 file.
+
+    molecule_ids : `list` (default: `None`).
+      Names of the molecules to fetch, in the order they are returned.
+      Molecules that share a name are returned in file order.
+      If `None`, all molecules are returned in file order.
+
+    index : `list` (default: `None`).
+      Index as returned by `index_multimol2`. If `None`, the sidecar
+      index file is read via `read_mol2_index`.
+
+    output : `str` (default: `'str'`).
+      Format of the MOL2 contents, `'str'`, `'lines'`, `'bytes'`, or
+      `'mol2'`, see `split_multimol2`.
+        
+    Returns:
+    ----------
+    
+    mol2 : generator of lists = `[molecule_id, mol2_cont]`.
+      See `split_multimol2`. Raises a `KeyError` before the first
+      molecule is returned if a name in `molecule_ids` is not indexed.
+        
+    """
+    if output not in ('str', 'lines', 'bytes', 'mol2'):
+        raise ValueError('output must be str, lines, bytes, or mol2')
+    if index is None:
+        index = read_mol2_index(multimol2)
+
+    if molecule_ids is None:
+        entries = index
+    else:
+        by_id = dict()
+        for entry in index:
+            by_id.setdefault(entry[0], []).append(entry)
+        missing = [mol_id for mol_id in molecule_ids if mol_id not in by_id]
+        if missing:
+            raise KeyError('molecules not found in %s: %s' % (multimol2, ', '.join(missing[:5])))
+        entries = [entry for mol_id in molecule_ids for entry in by_id[mol_id]]
+
+    if not entries:
+        return
+    with open(multimol2, 'rb') as mol2file:
+        with mmap.mmap(mol2file.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            for molecule_id, offset, length in entries:
+                block = mm[offset:offset + length]
+                if not block.startswith(MOL2_HEADER):
+                    raise ValueError('index of %s is outdated, rebuild it with index_multimol2' % multimol2)
+                mol2 = [molecule_id, _convert_block(block, output)]
+                yield mol2
+
+
+def iter_multimol2(multimol2, molecule_ids=None, output='str'):
+    """
+    Iterates over the molecules of a multi-mol2 file, using its sidecar
+    index (see `index_multimol2`) if present and falling back to streaming
+    the file with `split_multimol2` otherwise.
+
+    Parameters
+    ----------
+    
+    multimol2 : `str`.
+      Path to the multi-mol2 file.
+
+    molecule_ids : `list` (default: `None`).
+      Names of the molecules to return. If `None`, all molecules.
+
+    output : `str` (default: `'str'`).
+      Format of the MOL2 contents, `'str'`, `'lines'`, `'bytes'`, or
+      `'mol2'`, see `split_multimol2`.
+        
+    Returns:
+    ----------
+    
+    mol2 : generator of lists = `[molecule_id, mol2_cont]`.
+      Molecules in file order, see `split_multimol2`.
+        
+    """
+    index = None
+    if os.path.exists(multimol2 + MOL2_INDEX_SUFFIX):
+        try:
+            index = read_mol2_index(multimol2)
+        except ValueError:
+            index = None
+
+    if index is None:
+        wanted = None if molecule_ids is None else set(molecule_ids)
+        for mol2 in split_multimol2(multimol2, output=output):
+            if wanted is None or mol2[0] in wanted:
                 yield mol2
+    else:
+        if molecule_ids is not None:
+            wanted = set(molecule_ids)
+            index = [entry for entry in index if entry[0] in wanted]
+        for mol2 in fetch_mol2s(multimol2, index=index, output=output):
+            yield mol2
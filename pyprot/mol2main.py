@@ -0,0 +1,250 @@
+"""
+Class for single molecules in MOL2 format.
+"""
+
+import re
+import numpy as np
+
+
+# ATOM section columns: [attribute, field index, default for missing fields]
+ATOM_COLUMNS = [['atom_id', 0, '0'],
+                ['atom_name', 1, ''],
+                ['x', 2, 'nan'],
+                ['y', 3, 'nan'],
+                ['z', 4, 'nan'],
+                ['atom_type', 5, ''],
+                ['subst_id', 6, '0'],
+                ['subst_name', 7, ''],
+                ['charge', 8, 'nan']]
+
+# BOND section columns: [attribute, field index, default for missing fields]
+BOND_COLUMNS = [['bond_id', 0, '0'],
+                ['origin_atom_id', 1, '0'],
+                ['target_atom_id', 2, '0'],
+                ['bond_type', 3, '']]
+
+# number format of modified float fields
+FLOAT_FORMAT = '%.4f'
+
+# minimum width of the `str` columns, so that assigned values are not truncated
+STR_WIDTH = 16
+
+
+def _field_table(lines, columns):
+    """ Splits lines into a `(N, len(columns))` `str` array, missing fields get the column default. """
+    n_fields = len(columns)
+    defaults = [c[2] for c in columns]
+    rows = [line.split()[:n_fields] for line in lines]
+    rows = [row if len(row) == n_fields else row + defaults[len(row):] for row in rows]
+    return np.array(rows, dtype=str).reshape(-1, n_fields)
+
+
+def _str_column(col):
+    """ `str` column with at least `STR_WIDTH` characters per item. """
+    return col.astype('<U%d' % max(STR_WIDTH, col.dtype.itemsize // 4))
+
+
+def replace_field(line, field, token, align='right'):
+    """
+    Replaces a whitespace-separated field of a line by a new token while
+    keeping the remaining whitespace. If the token length changes, the
+    whitespace next to the field is adjusted (keeping at least one blank)
+    so that the column alignment is preserved.
+
+    Parameters
+    ----------
+
+    line : `str`.
+      E.g., a MOL2 atom line.
+
+    field : `int`.
+      Index of the field, negative values count from the end. A field
+      directly after the last one is appended.
+
+    token : `str`.
+      New field content.
+
+    align : `str` (default: `'right'`).
+      `'right'` keeps the end of the field in place (e.g., numbers),
+      `'left'` keeps the start of the field in place (e.g., names).
+
+    Returns
+    ----------
+
+    line : `str`.
+      The modified line.
+
+    """
+    if field == -1:
+        # fast path for the last field, e.g., the charge column
+        end = len(line.rstrip())
+        start = max(line.rfind(' ', 0, end), line.rfind('\t', 0, end)) + 1
+    else:
+        spans = [m.span() for m in re.finditer(r'\S+', line)]
+        if field == len(spans):
+            return line + '  ' + token
+        if field > len(spans):
+            raise ValueError('line has no field %d: %r' % (field, line))
+        start, end = spans[field]
+    delta = len(token) - (end - start)
+
+    if align == 'right':
+        ws_start = len(line[:start].rstrip())
+        min_ws = 1 if ws_start > 0 else 0
+        if delta > 0:
+            start -= min(delta, max(start - ws_start - min_ws, 0))
+        elif delta < 0 and start > ws_start:
+            token = ' ' * -delta + token
+    else:
+        ws_end = end + len(line[end:]) - len(line[end:].lstrip())
+        min_ws = 1 if ws_end < len(line) else 0
+        if delta > 0:
+            end += min(delta, max(ws_end - end - min_ws, 0))
+        elif delta < 0 and ws_end > end:
+            token = token + ' ' * -delta
+    return line[:start] + token + line[end:]
+
+
+class Mol2(object):
+    """
+    Object for a single molecule in MOL2 format. The ATOM and BOND
+    sections are parsed once into typed NumPy arrays; all other lines are
+    kept as they are, so that `to_lines()` reproduces the input exactly
+    unless the arrays are modified.
+
+    Parameters
+    ----------
+
+    mol2_cont : `str`, `bytes`, or `list`.
+      MOL2 file content, e.g., as returned by `mol2io.split_multimol2`.
+
+    Attributes
+    ----------
+
+    name : `str`.
+      Molecule name from the line following `@<TRIPOS>MOLECULE`.
+
+    atom_id, subst_id : `ndarray`, shape `(N,)`.
+      Atom and substructure ids as `int64`.
+
+    atom_name, atom_type, subst_name : `ndarray`, shape `(N,)`.
+      Atom names, SYBYL atom types, and substructure names as `str`.
+
+    xyz : `ndarray`, shape `(N, 3)`.
+      Atom coordinates as `float64`.
+
+    charge : `ndarray`, shape `(N,)`.
+      Atom charges as `float64` (`nan` if the column is missing).
+
+    bonds : `ndarray`, shape `(M, 3)`.
+      Bond ids, origin atom ids, and target atom ids as `int64`.
+
+    bond_type : `ndarray`, shape `(M,)`.
+      Bond types as `str`, e.g., `'1'`, `'2'`, `'ar'`, `'am'`.
+
+    """
+
+    def __init__(self, mol2_cont):
+        if isinstance(mol2_cont, bytes):
+            mol2_cont = mol2_cont.decode('utf-8')
+        if isinstance(mol2_cont, str):
+            mol2_cont = mol2_cont.split('\n')
+        self.lines = list(mol2_cont)
+
+        self.name = ''
+        atom_idx, bond_idx = [], []
+        section = None
+        for idx, line in enumerate(self.lines):
+            if line.startswith('@<TRIPOS>'):
+                section = line.strip()
+                if section == '@<TRIPOS>MOLECULE' and idx + 1 < len(self.lines):
+                    self.name = self.lines[idx + 1].strip()
+            elif section == '@<TRIPOS>ATOM' and line.strip():
+                atom_idx.append(idx)
+            elif section == '@<TRIPOS>BOND' and line.strip():
+                bond_idx.append(idx)
+        self.atom_idx = np.array(atom_idx, dtype=np.intp)
+        self.bond_idx = np.array(bond_idx, dtype=np.intp)
+
+        atoms = _field_table(self.atom_lines, ATOM_COLUMNS)
+        self.atom_id = atoms[:, 0].astype(np.int64)
+        self.atom_name = _str_column(atoms[:, 1])
+        self.xyz = atoms[:, 2:5].astype(np.float64)
+        self.atom_type = _str_column(atoms[:, 5])
+        self.subst_id = atoms[:, 6].astype(np.int64)
+        self.subst_name = _str_column(atoms[:, 7])
+        self.charge = atoms[:, 8].astype(np.float64)
+
+        bonds = _field_table(self.bond_lines, BOND_COLUMNS)
+        self.bonds = bonds[:, :3].astype(np.int64)
+        self.bond_type = _str_column(bonds[:, 3])
+
+        # parsed values as read, to find the fields to rewrite in `to_lines`
+        self._parsed = self._columns()
+
+    def __len__(self):
+        return self.atom_id.shape[0]
+
+    def __repr__(self):
+        return 'Mol2(name=%r, atoms=%d, bonds=%d)' % (self.name, len(self), self.bonds.shape[0])
+
+    @property
+    def atom_lines(self):
+        """ `list` of the lines of the ATOM section as read. """
+        return [self.lines[i] for i in self.atom_idx.tolist()]
+
+    @property
+    def bond_lines(self):
+        """ `list` of the lines of the BOND section as read. """
+        return [self.lines[i] for i in self.bond_idx.tolist()]
+
+    def _columns(self):
+        """ `(line_idx, field, values)` of all array columns that are written back. """
+        return [(self.atom_idx, 0, self.atom_id.copy()),
+                (self.atom_idx, 1, self.atom_name.copy()),
+                (self.atom_idx, 2, self.xyz[:, 0].copy()),
+                (self.atom_idx, 3, self.xyz[:, 1].copy()),
+                (self.atom_idx, 4, self.xyz[:, 2].copy()),
+                (self.atom_idx, 5, self.atom_type.copy()),
+                (self.atom_idx, 6, self.subst_id.copy()),
+                (self.atom_idx, 7, self.subst_name.copy()),
+                (self.atom_idx, 8, self.charge.copy()),
+                (self.bond_idx, 0, self.bonds[:, 0].copy()),
+                (self.bond_idx, 1, self.bonds[:, 1].copy()),
+                (self.bond_idx, 2, self.bonds[:, 2].copy()),
+                (self.bond_idx, 3, self.bond_type.copy())]
+
+    def to_lines(self):
+        """
+        Serializes the molecule into MOL2 lines. Only the fields whose
+        array values were changed are rewritten (floats as `FLOAT_FORMAT`),
+        keeping the column alignment; all other content is returned as read.
+
+        Returns
+        ----------
+
+        lines : `list`.
+          MOL2 file content where every list item is a `str` line.
+
+        """
+        lines = self.lines[:]
+        for (line_idx, field, old), (_, _, new) in zip(self._parsed, self._columns()):
+            if new.shape != old.shape:
+                raise ValueError('the number of atoms and bonds cannot be changed')
+            if new.dtype.kind == 'f':
+                changed = ~((new == old) | (np.isnan(new) & np.isnan(old)))
+            else:
+                changed = new != old
+            for row in np.flatnonzero(changed).tolist():
+                value = new[row]
+                token = FLOAT_FORMAT % value if new.dtype.kind == 'f' else str(value)
+                align = 'left' if new.dtype.kind == 'U' else 'right'
+                lines[line_idx[row]] = replace_field(lines[line_idx[row]], field, token, align)
+        return lines
+
+    def to_str(self):
+        """
+        Serializes the molecule into a MOL2 `str`, see `to_lines`.
+
+        """
+        return '\n'.join(self.to_lines())
@@ -2,65 +2,192 @@
 Sub-package for manipulating MOL2 files.
 """
 
-import re
+from .mol2main import Mol2, replace_field
+
+
+def _as_lines(mol2_cont):
+    """ MOL2 content as a `list` of lines, accepts `str`, `bytes`, `Mol2`, or line lists. """
+    if isinstance(mol2_cont, Mol2):
+        return mol2_cont.to_lines()
+    if isinstance(mol2_cont, bytes):
+        mol2_cont = mol2_cont.decode('utf-8')
+    if isinstance(mol2_cont, str):
+        mol2_cont = mol2_cont.split('\n')
+    return mol2_cont
+
+
+def _atom_line_idx(mol2_lines):
+    """ Indices of the non-empty lines of the ATOM section. """
+    start = None
+    for idx, line in enumerate(mol2_lines):
+        if line.startswith('@<TRIPOS>ATOM'):
+            start = idx + 1
+            break
+    atom_idx = []
+    if start is None:
+        return atom_idx
+    for idx in range(start, len(mol2_lines)):
+        line = mol2_lines[idx]
+        if line.startswith('@<TRIPOS>'):
+            break
+        if line.strip():
+            atom_idx.append(idx)
+    return atom_idx
+
+
+class ChargeTemplate(object):
+    """
+    Atom charges of a template molecule for transferring them onto many
+    target molecules with the same number and order of atoms. The charge
+    column of the template is parsed once; the charge tokens are copied
+    verbatim into the targets.
+
+    Parameters
+    ----------
+
+    template_mol2 : `list`, `str`, `bytes`, or `Mol2`.
+      Template MOL2 file that contains the charges to be transfered. Every
+      list item in the `template_mol2` list represents one line of the MOL2
+      file.
+
+    template_col : `int` (default: `-1`).
+      Column position of the charge information in the template
+      molecule, last column by default. Column index starts at 0.
+
+    Attributes
+    ----------
+
+    charges : `list`.
+      Charge tokens (`str`) of the template atoms in file order.
+
+    """
+
+    def __init__(self, template_mol2, template_col=-1):
+        lines = _as_lines(template_mol2)
+        self.charges = [lines[idx].split()[template_col] for idx in _atom_line_idx(lines)]
+
+    def __len__(self):
+        return len(self.charges)
+
+    def apply(self, target_mol2, target_col=-1):
+        """
+        Writes the template charges into the charge column of a target
+        molecule, keeping the whitespace (and column alignment) of the
+        target lines.
+
+        Parameters
+        ----------
+
+        target_mol2 : `list`, `str`, `bytes`, or `Mol2`.
+          Target MOL2 file that contains the charges to be received.
+
+        target_col : `int` (default: `-1`).
+          Column position of the charge information in the target
+          molecule, last column by default. Column index starts at 0.
+
+        Returns
+        ----------
+
+        out_mol2 : `list`
+          A new list of MOL2 contents after the charge transfer. Every list item
+          in the list constitutes a single MOL2 line.
+
+        """
+        out_mol2 = list(_as_lines(target_mol2))
+        atom_idx = _atom_line_idx(out_mol2)
+        if len(atom_idx) != len(self.charges):
+            raise ValueError('template has %d atoms, target has %d atoms'
+                             % (len(self.charges), len(atom_idx)))
+        for idx, charge in zip(atom_idx, self.charges):
+            line = out_mol2[idx]
+            if target_col == -1:
+                # same-width last field: plain slice, no re-alignment needed
+                start = line.rfind(' ') + 1
+                if start and len(line) - start == len(charge) and '\t' not in line[start:]:
+                    out_mol2[idx] = line[:start] + charge
+                    continue
+            out_mol2[idx] = replace_field(line, target_col, charge)
+        return out_mol2
+
+    def apply_batch(self, target_mol2s, target_col=-1, errors='raise'):
+        """
+        Applies `apply` to a `list` of target molecules, e.g., a chunk of
+        docking poses, see `mol2filter.screen_mol2s(batch=True)`.
+
+        Parameters
+        ----------
+
+        target_mol2s : `list`.
+          Target molecules, see `apply`.
+
+        target_col : `int` (default: `-1`).
+          Column position of the charge information in the targets.
+
+        errors : `str` (default: `'raise'`).
+          If `'raise'`, a target that does not match the template (e.g., a
+          different number of atoms) raises a `ValueError`. If `'return'`,
+          the error is returned for that target and the others are still
+          processed.
+
+        Returns
+        ----------
+
+        out_mol2s : `list`.
+          The `apply` result of every target if `errors='raise'`; else
+          tuples = `(out_mol2, error)` with `out_mol2 = None` and the
+          error message `str` for a failed target, `error = None` otherwise.
+
+        """
+        if errors == 'raise':
+            return [self.apply(target_mol2, target_col) for target_mol2 in target_mol2s]
+        if errors != 'return':
+            raise ValueError("errors must be 'raise' or 'return', got %r" % errors)
+        results = []
+        for target_mol2 in target_mol2s:
+            try:
+                results.append((self.apply(target_mol2, target_col), None))
+            except ValueError as e:
+                results.append((None, '%s: %s' % (type(e).__name__, e)))
+        return results
+
 
 def swap_charge(template_mol2, target_mol2, template_col=-1, target_col=-1):
     """
     Transfers atom charges from one MOL2 file to a second MOL2 file. Assumes that
     both molecules have the same number and order of atoms.
     Example of a typical MOL2 atom line: "1 CA -0.149 0.299 0.000 C.3 1 ALA1 0.000".
-    If the MOL2 file is formatted as follows "1 CA -0.149 0.299 0.000 C.3", the 
+    If the MOL2 file is formatted as follows "1 CA -0.149 0.299 0.000 C.3", the
     `template_col` and/or `target_col` parameters have to be set to `-2`.
+    To transfer the charges of one template to many targets, use a `ChargeTemplate`.
 
     Parameters
     ----------
-    
+
     template_mol2 : `list`.
       Template MOL2 file that contains the charges to be transfered. Every
       list item in the `template_mol2` list represents one line of the MOL2
       file.
-      
+
     target_mol2 : `list`.
       Target MOL2 file that contains the charges to be received. Every
       list item in the `template_mol2` list represents one line of the MOL2
-      file.      
+      file.
 
-    template_col : `int`. 
+    template_col : `int`.
       Column position of the charge information in the template
       molecule, last column by default. Column index starts at 0.
 
-    target_col : `int`. 
+    target_col : `int`.
       Column position of the charge information in the target
       molecule, last column by default. Column index starts at 0.
 
     Returns:
     ----------
 
-    out_mol2 : `list`     
+    out_mol2 : `list`
       A new list of MOL2 contents for after the charge transfer. Every list item
       in the list constitutes a single MOL2 line.
 
     """
-    assert len(template_mol2) == len(target_mol2), 'Both Mol2 must be of same length.'
-    out_mol2 = []
-    atom_section = False
-    for r,f in zip(template_mol2, target_mol2):
-
-        # check if we are in atom coordinate section
-        if not atom_section and (r.startswith('@<TRIPOS>ATOM')
-                and f.startswith('@<TRIPOS>ATOM')):
-            atom_section = True
-        elif atom_section and (r.startswith('@<TRIPOS>') or
-                f.startswith('@<TRIPOS>')):
-            atom_section = False
-
-        # apply fix
-        if atom_section:
-            f_line = re.split(r'(\s+)', f)
-            r_line = re.split(r'(\s+)', r)
-            f_line[target_col] = r_line[template_col]
-            f = "".join(f_line)
-
-        out_mol2.append(f)
-
+    out_mol2 = ChargeTemplate(template_mol2, template_col).apply(target_mol2, target_col)
     return out_mol2
@@ -0,0 +1,306 @@
+"""
+Applies `Pdb` operations to many PDB files (a directory, glob pattern,
+or file list) with a pool of processes and collects the results in
+one table. Used by the `pdb_batch.py` script.
+"""
+
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+from collections import deque
+import glob
+import os
+import pandas as pd
+from .pdbmain import Pdb
+
+
+# file names that are collected from input directories
+PDB_PATTERNS = ('*.pdb', '*.ent', '*.pdb.gz', '*.ent.gz', '*.pdb.bz2', '*.pdb.xz')
+
+
+def find_pdbs(source, recursive=False):
+    """
+    Collects PDB file paths from directories, glob patterns, and file names.
+
+    Parameters
+    ----------
+
+    source : `str` or `list`.
+      A directory (all files that match `PDB_PATTERNS`), a glob pattern,
+      e.g., `'mirror/*/*.pdb.gz'`, a file path, or a `list` of those.
+      File paths are returned even if they do not exist.
+
+    recursive : `bool` (default: `False`).
+      If `True`, directories are searched recursively and `**` in glob
+      patterns matches subdirectories.
+
+    Returns
+    ----------
+
+    paths : `list`.
+      File paths in sorted order per `source` item, without duplicates.
+
+    """
+    sources = [source] if isinstance(source, str) else list(source)
+    paths, seen = [], set()
+    for src in sources:
+        if os.path.isdir(src):
+            found = []
+            for pattern in PDB_PATTERNS:
+                if recursive:
+                    pattern = os.path.join('**', pattern)
+                found += glob.glob(os.path.join(src, pattern), recursive=recursive)
+        elif not glob.has_magic(src):
+            # missing files are kept, so that they are reported as errors
+            found = [src]
+        else:
+            found = [path for path in glob.glob(src, recursive=recursive) if os.path.isfile(path)]
+        for path in sorted(found):
+            if path not in seen:
+                seen.add(path)
+                paths.append(path)
+    return paths
+
+
+def _process_chunk(func, paths, table_cache=None):
+    """ Applies `func` to a `Pdb` of every path; errors are returned, not raised. """
+    results = []
+    for path in paths:
+        try:
+            if not os.path.isfile(path):
+                raise FileNotFoundError('No such file: %r' % path)
+            if table_cache is None:
+                pdb = Pdb(path)
+            else:
+                pdb = Pdb.from_table(path, check=table_cache)
+            results.append((func(pdb), None))
+        except Exception as e:
+            results.append((None, '%s: %s' % (type(e).__name__, e)))
+    return results
+
+
+def _chunks(paths, chunksize):
+    for i in range(0, len(paths), chunksize):
+        yield paths[i:i + chunksize]
+
+
+def process_pdbs(paths, func, n_jobs=1, chunksize=16, ordered=True, callback=None,
+                 table_cache=None):
+    """
+    Applies a function to the `Pdb` objects of many PDB files, optionally
+    distributing chunks of files over a pool of processes. An error in one
+    file is reported for that file and does not stop the run.
+
+    Parameters
+    ----------
+
+    paths : `list`.
+      PDB file paths, e.g., from `find_pdbs`.
+
+    func : `function`.
+      Takes a `Pdb` object and returns the result for the file, e.g.,
+      `bfactor_stats` or `functools.partial(group_stats, by='chain')`.
+      Must be picklable (a module-level function or a `functools.partial`
+      of one) if `n_jobs > 1`.
+
+    n_jobs : `int` (default: `1`).
+      Number of processes. If `1`, the files are processed in this process.
+
+    chunksize : `int` (default: `16`).
+      Number of files that are sent to a process at once.
+
+    ordered : `bool` (default: `True`).
+      If `True`, results are returned in the order of `paths`; else in
+      the order in which the chunks finish.
+
+    callback : `callable` or `None` (default: `None`).
+      Called as `callback(path, error)` after each file, e.g., to update
+      a progress bar.
+
+    table_cache : `str` or `None` (default: `None`).
+      If `'mtime'` or `'hash'`, the `atom_table` of every file is reloaded
+      from its binary table file `<path>.atab` (written on the first run)
+      instead of being parsed, see `Pdb.from_table`. The value sets how
+      changed files are detected, see `pdbtable.table_cache_valid`.
+
+    Returns
+    ----------
+
+    results : generator of tuples = `(path, result, error)`.
+      The return value of `func` (`None` on error) and the error message
+      `str` (`None` on success) of every file.
+
+    """
+    if table_cache not in (None, 'mtime', 'hash'):
+        raise ValueError('table_cache must be mtime, hash, or None')
+    chunks = _iter_chunks(list(paths), func, n_jobs, chunksize, ordered, table_cache)
+    for path, (result, error) in chunks:
+        if callback is not None:
+            callback(path, error)
+        yield path, result, error
+
+
+def _iter_chunks(paths, func, n_jobs, chunksize, ordered, table_cache=None):
+    if n_jobs <= 1:
+        for chunk in _chunks(paths, chunksize):
+            for result in zip(chunk, _process_chunk(func, chunk, table_cache)):
+                yield result
+        return
+
+    # a bounded number of chunks is in flight, so memory stays constant
+    max_pending = 2 * n_jobs
+    with ProcessPoolExecutor(max_workers=n_jobs) as pool:
+        if ordered:
+            pending = deque()
+            for chunk in _chunks(paths, chunksize):
+                pending.append((chunk, pool.submit(_process_chunk, func, chunk, table_cache)))
+                if len(pending) >= max_pending:
+                    chunk, future = pending.popleft()
+                    for result in zip(chunk, future.result()):
+                        yield result
+            while pending:
+                chunk, future = pending.popleft()
+                for result in zip(chunk, future.result()):
+                    yield result
+        else:
+            pending = dict()
+            for chunk in _chunks(paths, chunksize):
+                pending[pool.submit(_process_chunk, func, chunk, table_cache)] = chunk
+                if len(pending) >= max_pending:
+                    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        for result in zip(pending.pop(future), future.result()):
+                            yield result
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    for result in zip(pending.pop(future), future.result()):
+                        yield result
+
+
+def collect_table(results):
+    """
+    Combines the results of `process_pdbs` into one table.
+
+    Parameters
+    ----------
+
+    results : iterable of tuples = `(path, result, error)`.
+      A result can be a `DataFrame` (one or more rows per file), a `dict`
+      (one row), or any other value (one row with a `result` column).
+
+    Returns
+    ----------
+
+    table : `DataFrame`.
+      All result rows with the file path in the first column `file`.
+
+    errors : `DataFrame`.
+      The columns `file` and `error` for every file that failed.
+
+    """
+    frames, rows, errors = [], [], []
+    for path, result, error in results:
+        if error is not None:
+            errors.append({'file': path, 'error': error})
+            continue
+        if isinstance(result, pd.DataFrame):
+            # consecutive one-row results become one frame
+            if rows:
+                frames.append(pd.DataFrame(rows))
+                rows = []
+            frame = result.copy()
+            frame.insert(0, 'file', path)
+            frames.append(frame)
+        elif isinstance(result, dict):
+            row = {'file': path}
+            row.update(result)
+            rows.append(row)
+        else:
+            rows.append({'file': path, 'result': result})
+    if rows:
+        frames.append(pd.DataFrame(rows))
+
+    table = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=['file'])
+    errors = pd.DataFrame(errors, columns=['file', 'error'])
+    return table, errors
+
+
+def batch_table(source, func, n_jobs=1, chunksize=16, recursive=False, callback=None,
+                table_cache=None):
+    """
+    Applies a function to all PDB files of a directory, glob pattern, or
+    file list and collects the results in one table, see `find_pdbs`,
+    `process_pdbs`, and `collect_table`.
+
+    Parameters
+    ----------
+
+    source : `str` or `list`.
+      Directories, glob patterns, or file paths.
+
+    func : `function`.
+      Takes a `Pdb` object and returns a `DataFrame`, `dict`, or value.
+
+    n_jobs : `int` (default: `1`).
+      Number of processes.
+
+    chunksize : `int` (default: `16`).
+      Number of files that are sent to a process at once.
+
+    recursive : `bool` (default: `False`).
+      If `True`, searches directories recursively.
+
+    callback : `callable` or `None` (default: `None`).
+      Called as `callback(path, error)` after each file.
+
+    table_cache : `str` or `None` (default: `None`).
+      `'mtime'` or `'hash'` to reuse binary table files, see `process_pdbs`.
+
+    Returns
+    ----------
+
+    table, errors : `DataFrame`, `DataFrame`.
+      Results and errors, see `collect_table`.
+
+    """
+    paths = find_pdbs(source, recursive=recursive)
+    return collect_table(process_pdbs(paths, func, n_jobs=n_jobs, chunksize=chunksize,
+                                      callback=callback, table_cache=table_cache))
+
+
+# operations for `process_pdbs` and the `pdb_batch.py` script
+
+def summary(pdb):
+    """ Number of ATOM and HETATM records and chain IDs of a `Pdb`. """
+    tab = pdb.atom_table
+    rows = tab.is_atom | tab.is_hetatm
+    # blank chain IDs are stored as empty strings
+    chains = set(tab.names('chain')[rows].tolist())
+    return {'atoms': int(tab.is_atom.sum()), 'hetatms': int(tab.is_hetatm.sum()),
+            'chains': ''.join(sorted(chain or ' ' for chain in chains))}
+
+
+def bfactor_stats(pdb, protein=True, ligand=False, atoms='all'):
+    """ B-factor median, mean, std_dev, and std_err, see `PdbStats.bfactor_stats`. """
+    stats = pdb.bfactor_stats(protein=protein, ligand=ligand, atoms=atoms)
+    row = dict(zip(('median', 'mean', 'std_dev', 'std_err'), stats))
+    row['n_atoms'] = len(pdb.get_bfactors(protein=protein, ligand=ligand, atoms=atoms))
+    return row
+
+
+def center_of_mass(pdb, protein=True, ligand=False, by=None):
+    """ Center(s) of mass, see `PdbStats.center_of_mass`. """
+    if by is not None:
+        return pdb.center_of_mass(protein=protein, ligand=ligand, by=by)
+    return dict(zip(('x', 'y', 'z'), pdb.center_of_mass(protein=protein, ligand=ligand)))
+
+
+def group_stats(pdb, by='residue', fields=('bfactor', 'occupancy', 'x', 'y', 'z'),
+                protein=True, ligand=False):
+    """ Statistics per chain or residue, see `PdbStats.group_stats`. """
+    return pdb.group_stats(by=by, fields=fields, protein=protein, ligand=ligand)
+
+
+OPERATIONS = {'summary': summary,
+              'bfactor_stats': bfactor_stats,
+              'center_of_mass': center_of_mass,
+              'group_stats': group_stats}
@@ -0,0 +1,263 @@
+"""
+Local on-disk cache for structure files fetched from rcsb.org.
+Used by `PdbIO.fetch_rcsb` and `pdbdownload.PdbDownloader`.
+"""
+
+import gzip
+import os
+import tempfile
+import zlib
+
+
+# default cache location and size limit, see `get_default_cache`
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser('~'), '.cache', 'pyprot')
+DEFAULT_MAX_MB = 2048
+
+# environment variables that configure the default cache
+ENV_CACHE_DIR = 'PYPROT_CACHE_DIR'
+ENV_MAX_MB = 'PYPROT_CACHE_MAX_MB'
+ENV_OFFLINE = 'PYPROT_OFFLINE'
+
+
+class PdbCache(object):
+    """
+    On-disk cache of structure files, keyed by PDB code and file format.
+    Entries are stored gzip-compressed as
+    `<cache_dir>/<fmt>/<code[1:3]>/<code>.<fmt>.gz` (the sharding of the
+    wwPDB archive). Entries are written to a temporary file and renamed,
+    so that concurrent processes never read a partial entry. If the cache
+    grows beyond `max_bytes`, the least recently used entries are removed
+    (access times are tracked via the file modification time).
+
+    Parameters
+    ----------
+
+    cache_dir : `str`.
+      Root directory of the cache, created on the first write.
+
+    max_bytes : `int` or `None` (default: `None`).
+      Size limit of the compressed entries in bytes. No limit if `None`.
+
+    offline : `bool` (default: `False`).
+      If `True`, fetch functions that use the cache never access the
+      network and only return cached entries.
+
+    """
+
+    def __init__(self, cache_dir, max_bytes=None, offline=False):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.offline = offline
+        self._size = None
+
+    def __repr__(self):
+        return 'PdbCache(cache_dir=%r, max_bytes=%r, offline=%r)' % (
+            self.cache_dir, self.max_bytes, self.offline)
+
+    def path(self, pdb_code, fmt='pdb'):
+        """
+        Path of the cache entry of a PDB code.
+
+        Parameters
+        ----------
+
+        pdb_code : `str`.
+          A 4-letter PDB code, e.g., `"3eiy"`
+
+        fmt : `str` (default: `'pdb'`).
+          File format, e.g., `'pdb'` or `'cif'`.
+
+        Returns
+        ----------
+
+        path : `str`.
+
+        """
+        code = pdb_code.strip().lower()
+        if not code.isalnum() or not fmt.isalnum():
+            raise ValueError('invalid cache key: %r, %r' % (pdb_code, fmt))
+        return os.path.join(self.cache_dir, fmt, code[1:3], '%s.%s.gz' % (code, fmt))
+
+    def __contains__(self, pdb_code):
+        return os.path.isfile(self.path(pdb_code))
+
+    def get(self, pdb_code, fmt='pdb'):
+        """
+        Reads a cached file and marks it as recently used.
+
+        Parameters
+        ----------
+
+        pdb_code : `str`.
+          A 4-letter PDB code, e.g., `"3eiy"`
+
+        fmt : `str` (default: `'pdb'`).
+          File format, e.g., `'pdb'` or `'cif'`.
+
+        Returns
+        ----------
+
+        payload : `bytes` or `None`.
+          The decompressed file contents, `None` if the entry is not cached
+          (or corrupt, in which case it is removed).
+
+        """
+        path = self.path(pdb_code, fmt)
+        try:
+            with open(path, 'rb') as f:
+                payload = gzip.decompress(f.read())
+        except FileNotFoundError:
+            return None
+        except (OSError, EOFError, zlib.error):
+            self._remove(path)
+            return None
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return payload
+
+    def put(self, pdb_code, payload, fmt='pdb'):
+        """
+        Stores a file in the cache (atomically) and evicts the least
+        recently used entries if the cache exceeds `max_bytes`.
+
+        Parameters
+        ----------
+
+        pdb_code : `str`.
+          A 4-letter PDB code, e.g., `"3eiy"`
+
+        payload : `bytes`.
+          Uncompressed file contents.
+
+        fmt : `str` (default: `'pdb'`).
+          File format, e.g., `'pdb'` or `'cif'`.
+
+        Returns
+        ----------
+
+        path : `str`.
+          Path of the cache entry.
+
+        """
+        path = self.path(pdb_code, fmt)
+        dirname = os.path.dirname(path)
+        os.makedirs(dirname, exist_ok=True)
+        data = gzip.compress(payload, compresslevel=6)
+        fd, tmp = tempfile.mkstemp(dir=dirname, prefix='.', suffix='.part')
+        try:
+            with os.fdopen(fd, 'wb') as out:
+                out.write(data)
+            os.replace(tmp, path)
+        except BaseException:
+            self._remove(tmp)
+            raise
+
+        if self.max_bytes is not None:
+            if self._size is None:
+                self._size = self.size()
+            else:
+                self._size += len(data)
+            # other processes write to the same cache, rescan before evicting
+            if self._size > self.max_bytes:
+                self.evict()
+        return path
+
+    def _entries(self):
+        """ `(mtime, size, path)` of all cache entries. """
+        entries = []
+        for root, dirs, files in os.walk(self.cache_dir):
+            for name in files:
+                if not name.endswith('.gz') or name.startswith('.'):
+                    continue
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+        return entries
+
+    def size(self):
+        """ Total size of the compressed cache entries in bytes. """
+        return sum(e[1] for e in self._entries())
+
+    def evict(self, max_bytes=None):
+        """
+        Removes the least recently used entries until the cache is not
+        larger than `max_bytes` (default: `self.max_bytes`).
+
+        Returns
+        ----------
+
+        removed : `int`.
+          Number of removed entries.
+
+        """
+        if max_bytes is None:
+            max_bytes = self.max_bytes
+        entries = sorted(self._entries())
+        total = sum(e[1] for e in entries)
+        removed = 0
+        for mtime, size, path in entries:
+            if max_bytes is not None and total <= max_bytes:
+                break
+            self._remove(path)
+            total -= size
+            removed += 1
+        self._size = total
+        return removed
+
+    def clear(self):
+        """ Removes all cache entries. """
+        return self.evict(max_bytes=0)
+
+    @staticmethod
+    def _remove(path):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+
+_default_cache = False
+
+
+def get_default_cache():
+    """
+    The cache used by `PdbIO.fetch_rcsb` and `pdb_download.py`. Created on
+    first use from the environment variables `PYPROT_CACHE_DIR` (default:
+    `~/.cache/pyprot`, an empty value disables the cache),
+    `PYPROT_CACHE_MAX_MB` (default: `2048`, `0` for no limit), and
+    `PYPROT_OFFLINE` (`1` for offline mode).
+
+    Returns
+    ----------
+
+    cache : `PdbCache` or `None`.
+      `None` if caching is disabled.
+
+    """
+    global _default_cache
+    if _default_cache is False:
+        cache_dir = os.environ.get(ENV_CACHE_DIR, DEFAULT_CACHE_DIR)
+        if not cache_dir:
+            _default_cache = None
+        else:
+            max_mb = float(os.environ.get(ENV_MAX_MB, DEFAULT_MAX_MB))
+            offline = os.environ.get(ENV_OFFLINE, '').lower() in ('1', 'true', 'yes')
+            _default_cache = PdbCache(cache_dir,
+                                      max_bytes=int(max_mb * 2**20) if max_mb > 0 else None,
+                                      offline=offline)
+    return _default_cache
+
+
+def set_default_cache(cache):
+    """
+    Replaces the default cache, e.g., `set_default_cache(PdbCache(path,
+    offline=True))`; `None` disables caching.
+
+    """
+    global _default_cache
+    _default_cache = cache
@@ -0,0 +1,319 @@
+"""
+Concurrent bulk download of PDB files from rcsb.org (or any server that
+serves one file per PDB code under a URL template).
+Used by the `pdb_download.py` script.
+"""
+
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import gzip
+import http.client
+import os
+import tempfile
+import threading
+import time
+import urllib.parse
+
+
+# `%s` is replaced by the lower-case PDB code; `.gz` payloads are decompressed
+RCSB_URL = 'https://files.rcsb.org/download/%s.pdb.gz'
+
+# HTTP status codes that are worth another try
+RETRY_STATUS = (408, 429, 500, 502, 503, 504)
+
+GZIP_MAGIC = b'\x1f\x8b'
+
+
+class DownloadError(Exception):
+    """ Raised if a PDB file could not be fetched. """
+
+    def __init__(self, msg, retry=False):
+        Exception.__init__(self, msg)
+        self.retry = retry
+
+
+def _decompress(payload, content_encoding=''):
+    """ Decompresses gzip payloads (by `Content-Encoding` or magic bytes). """
+    if content_encoding.lower() == 'gzip' or payload[:2] == GZIP_MAGIC:
+        payload = gzip.decompress(payload)
+        # a `.gz` file that was additionally sent with `Content-Encoding: gzip`
+        if payload[:2] == GZIP_MAGIC:
+            payload = gzip.decompress(payload)
+    return payload
+
+
+class PdbDownloader(object):
+    """
+    Downloads PDB files with a pool of threads. Every thread keeps its
+    HTTP connections open (keep-alive) and reuses them for the following
+    requests to the same host; failed requests are retried with
+    exponential backoff.
+
+    Parameters
+    ----------
+
+    url_template : `str` (default: `RCSB_URL`).
+      URL with a `%s` placeholder for the lower-case PDB code, e.g.,
+      `'http://localhost:8000/%s.pdb'` for a local mirror.
+
+    n_jobs : `int` (default: `8`).
+      Maximum number of concurrent requests.
+
+    retries : `int` (default: `3`).
+      Number of retries after a connection error, a timeout, or a
+      `RETRY_STATUS` response. Other HTTP errors (e.g., 404) are not retried.
+
+    backoff : `float` (default: `0.5`).
+      Seconds to wait before the first retry; doubled for each further retry.
+
+    timeout : `float` (default: `30.0`).
+      Socket timeout in seconds.
+
+    cache : `pdbcache.PdbCache` or `None` (default: `None`).
+      If provided, files are read from and written to the cache; in
+      offline mode, only cached files are returned.
+
+    fmt : `str` (default: `'pdb'`).
+      File format of the `url_template` files, used as cache key.
+
+    """
+
+    def __init__(self, url_template=RCSB_URL, n_jobs=8, retries=3, backoff=0.5, timeout=30.0,
+                 cache=None, fmt='pdb'):
+        self.url_template = url_template
+        self.cache = cache
+        self.fmt = fmt
+        self.n_jobs = max(1, int(n_jobs))
+        self.retries = retries
+        self.backoff = backoff
+        self.timeout = timeout
+        self._local = threading.local()
+        self._all_conns = []
+        self._lock = threading.Lock()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        """ Closes all open connections. """
+        with self._lock:
+            conns, self._all_conns = self._all_conns, []
+        for conn in conns:
+            conn.close()
+
+    def _connection(self, scheme, netloc):
+        """ Open connection of the current thread to a host, created on first use. """
+        conns = getattr(self._local, 'conns', None)
+        if conns is None:
+            conns = self._local.conns = dict()
+        key = (scheme, netloc)
+        if key not in conns:
+            if scheme == 'https':
+                conn = http.client.HTTPSConnection(netloc, timeout=self.timeout)
+            else:
+                conn = http.client.HTTPConnection(netloc, timeout=self.timeout)
+            conns[key] = conn
+            with self._lock:
+                self._all_conns.append(conn)
+        return conns[key]
+
+    def _drop_connection(self, scheme, netloc):
+        conn = self._local.conns.pop((scheme, netloc), None)
+        if conn is not None:
+            conn.close()
+            with self._lock:
+                if conn in self._all_conns:
+                    self._all_conns.remove(conn)
+
+    def _get(self, url, redirects=5):
+        """ Single GET request over the thread's connection, follows redirects. """
+        parts = urllib.parse.urlsplit(url)
+        path = parts.path or '/'
+        if parts.query:
+            path += '?' + parts.query
+        conn = self._connection(parts.scheme, parts.netloc)
+        try:
+            conn.request('GET', path, headers={'Accept-Encoding': 'gzip'})
+            response = conn.getresponse()
+            payload = response.read()
+        except (http.client.HTTPException, OSError) as e:
+            # stale keep-alive connection, timeout, refused, ...
+            self._drop_connection(parts.scheme, parts.netloc)
+            raise DownloadError('%s: %s' % (type(e).__name__, e), retry=True)
+
+        if response.will_close:
+            self._drop_connection(parts.scheme, parts.netloc)
+        if response.status in (301, 302, 303, 307, 308) and redirects:
+            location = urllib.parse.urljoin(url, response.getheader('Location', ''))
+            return self._get(location, redirects - 1)
+        if response.status != 200:
+            raise DownloadError('HTTP Error %d' % response.status,
+                                retry=response.status in RETRY_STATUS)
+        return _decompress(payload, response.getheader('Content-Encoding', ''))
+
+    def fetch(self, pdb_code):
+        """
+        Fetches the contents of a PDB file from the cache or the server.
+
+        Parameters
+        ----------
+
+        pdb_code : `str`.
+          A 4-letter PDB code, e.g., `"3eiy"`
+
+        Returns
+        ----------
+
+        pdb_bytes : `bytes`.
+          The decompressed PDB file contents.
+
+        """
+        pdb_code = pdb_code.strip().lower()
+        if not pdb_code.isalnum():
+            raise DownloadError('invalid PDB code: %r' % pdb_code)
+        if self.cache is not None:
+            payload = self.cache.get(pdb_code, self.fmt)
+            if payload is not None:
+                return payload
+            if self.cache.offline:
+                raise DownloadError('%s is not cached (offline mode)' % pdb_code)
+
+        url = self.url_template % pdb_code
+        for attempt in range(self.retries + 1):
+            try:
+                payload = self._get(url)
+                break
+            except DownloadError as e:
+                if not e.retry or attempt == self.retries:
+                    raise
+                time.sleep(self.backoff * 2**attempt)
+
+        if self.cache is not None:
+            try:
+                self.cache.put(pdb_code, payload, self.fmt)
+            except OSError:
+                # a read-only or full cache must not fail the download
+                pass
+        return payload
+
+    def download(self, pdb_codes, dest_dir, overwrite=False, callback=None):
+        """
+        Downloads PDB files into a directory as `<dest_dir>/<pdb_code>.pdb`.
+        Files are written atomically, so that an interrupted download can
+        be resumed by running it again: existing files are skipped unless
+        `overwrite=True`.
+
+        Parameters
+        ----------
+
+        pdb_codes : iterable of `str`.
+          4-letter PDB codes, e.g., `['3eiy', '1htg']`.
+
+        dest_dir : `str`.
+          Output directory, created if it does not exist.
+
+        overwrite : `bool` (default: `False`).
+          If `True`, existing files are downloaded again.
+
+        callback : `callable` or `None` (default: `None`).
+          Called as `callback(pdb_code, error)` after each PDB code
+          (from the calling thread), e.g., to update a progress bar.
+
+        Returns
+        ----------
+
+        results : `dict`.
+          PDB code -> `None` if the file was written (or already existed),
+          else the error message `str`.
+
+        """
+        if not os.path.exists(dest_dir):
+            os.makedirs(dest_dir)
+
+        # `todo` keeps the input order, `seen` makes duplicate checks O(1)
+        results = dict()
+        todo, seen = [], set()
+        for code in pdb_codes:
+            code = code.strip().lower()
+            if code in seen:
+                continue
+            seen.add(code)
+            if not overwrite and os.path.isfile(os.path.join(dest_dir, code + '.pdb')):
+                results[code] = None
+                if callback is not None:
+                    callback(code, None)
+            else:
+                todo.append(code)
+
+        with ThreadPoolExecutor(max_workers=self.n_jobs) as pool:
+            futures = {pool.submit(self._download_one, code, dest_dir): code for code in todo}
+            for future in as_completed(futures):
+                code = futures[future]
+                try:
+                    future.result()
+                    error = None
+                except (DownloadError, OSError) as e:
+                    error = str(e)
+                results[code] = error
+                if callback is not None:
+                    callback(code, error)
+        return results
+
+    def _download_one(self, pdb_code, dest_dir):
+        payload = self.fetch(pdb_code)
+        fd, tmp = tempfile.mkstemp(dir=dest_dir, prefix='.' + pdb_code, suffix='.part')
+        try:
+            with os.fdopen(fd, 'wb') as out:
+                out.write(payload)
+            os.replace(tmp, os.path.join(dest_dir, pdb_code + '.pdb'))
+        except BaseException:
+            os.remove(tmp)
+            raise
+
+
+def download_pdbs(pdb_codes, dest_dir, n_jobs=8, url_template=RCSB_URL,
+                  overwrite=False, retries=3, callback=None, cache=None):
+    """
+    Downloads PDB files concurrently into a directory, see
+    `PdbDownloader.download`.
+
+    Parameters
+    ----------
+
+    pdb_codes : iterable of `str`.
+      4-letter PDB codes, e.g., `['3eiy', '1htg']`.
+
+    dest_dir : `str`.
+      Output directory.
+
+    n_jobs : `int` (default: `8`).
+      Maximum number of concurrent requests.
+
+    url_template : `str` (default: `RCSB_URL`).
+      URL with a `%s` placeholder for the lower-case PDB code.
+
+    overwrite : `bool` (default: `False`).
+      If `True`, existing files are downloaded again.
+
+    retries : `int` (default: `3`).
+      Number of retries per file after transient errors.
+
+    callback : `callable` or `None` (default: `None`).
+      Called as `callback(pdb_code, error)` after each PDB code.
+
+    cache : `pdbcache.PdbCache` or `None` (default: `None`).
+      Cache for the downloaded files, e.g., `pdbcache.get_default_cache()`.
+
+    Returns
+    ----------
+
+    results : `dict`.
+      PDB code -> `None` on success, else the error message `str`.
+
+    """
+    with PdbDownloader(url_template=url_template, n_jobs=n_jobs, retries=retries,
+                       cache=cache) as loader:
+        results = loader.download(pdb_codes, dest_dir, overwrite=overwrite, callback=callback)
+    return results
@@ -4,10 +4,135 @@ Contains methods specialized for PDB file processing.
 """
 
 
-import urllib
 import numpy as np
 import pandas as pd
 import os
+from .pdbcache import get_default_cache
+from .pdbdownload import PdbDownloader, DownloadError
+from .fileio import open_file
+from .pdbtable import TABLE_EXT
+
+
+# fixed-width columns of ATOM/HETATM/ANISOU/TER records: [name, start, stop]
+COORD_COLUMNS = [['record', 0, 6],
+                 ['atomnum', 6, 11],
+                 ['atomname', 12, 16],
+                 ['altloc', 16, 17],
+                 ['residuename', 17, 20],
+                 ['chainid', 21, 22],
+                 ['residuenum', 22, 26],
+                 ['insertion', 26, 27],
+                 ['xcoord', 30, 38],
+                 ['ycoord', 38, 46],
+                 ['zcoord', 47, 54],
+                 ['occupancy', 54, 60],
+                 ['bfactor', 60, 66],
+                 ['segmentid', 72, 76],
+                 ['element', 76, 78],
+                 ['charge', 78, 80]]
+
+COORD_RECORDS = ('ATOM', 'HETATM', 'ANISOU', 'TER')
+
+# structured view of one 80-byte coordinate record
+COORD_DTYPE = np.dtype({'names': [c[0] for c in COORD_COLUMNS],
+                        'formats': ['S%d' % (c[2] - c[1]) for c in COORD_COLUMNS],
+                        'offsets': [c[1] for c in COORD_COLUMNS],
+                        'itemsize': 80})
+
+# output columns of `coordsec_to_file`: [name, start, stop, format]
+# format: 'l'/'r' left/right-justified text, or the number of decimals of a float
+WRITE_COLUMNS = [['record', 0, 6, 'l'],
+                 ['atomnum', 6, 11, 'r'],
+                 ['atomname', 13, 16, 'l'],
+                 ['altloc', 16, 17, 'l'],
+                 ['residuename', 17, 20, 'l'],
+                 ['chainid', 21, 22, 'l'],
+                 ['residuenum', 22, 26, 'r'],
+                 ['insertion', 26, 27, 'l'],
+                 ['xcoord', 30, 38, 3],
+                 ['ycoord', 38, 46, 3],
+                 ['zcoord', 46, 54, 3],
+                 ['occupancy', 54, 60, 2],
+                 ['bfactor', 60, 66, 2],
+                 ['segmentid', 72, 76, 'l'],
+                 ['element', 76, 78, 'r'],
+                 ['charge', 78, 80, 'r']]
+
+# columns 27-72 of ANISOU records hold the anisotropic temperature factors,
+# they are copied from the original line
+ANISOU_SPAN = (27, 72)
+
+
+# 10**k for counting the decimal digits of `int64` values
+POW10 = 10**np.arange(19, dtype=np.int64)
+
+
+def _place_text(buf, col, start, stop, justify, name):
+    """
+    Writes a text column into the columns `start:stop` of a `(N, 81)` byte
+    buffer. Only the unique values are formatted by `justify(str) -> str`;
+    `NaN`/`None` values are left blank.
+
+    """
+    codes, uniques = pd.factorize(col)
+    table = np.full((len(uniques) + 1, stop - start), ord(' '), dtype=np.uint8)
+    for k, value in enumerate(uniques):
+        text = justify(str(value)).encode('latin-1', 'replace')
+        if len(text) > stop - start:
+            raise ValueError('%s value %r does not fit into %d columns' % (name, value, stop - start))
+        table[k] = np.frombuffer(text, dtype=np.uint8)
+    buf[:, start:stop] = table[codes]
+
+
+def _place_number(buf, ints, neg, start, stop, decimals, name, rows=None):
+    """
+    Writes right-justified numbers into the columns `start:stop` of the
+    buffer rows `rows` (default: all rows) of a `(N, 81)` byte buffer.
+    `ints` are the absolute values scaled by `10**decimals`, `neg` marks
+    negative values. Digits are computed arithmetically, one output
+    column at a time.
+
+    """
+    if rows is None:
+        rows = np.arange(ints.shape[0])
+    ndigits = np.maximum(np.searchsorted(POW10, ints, side='right'), decimals + 1)
+    length = ndigits + (decimals > 0) + neg
+    if length.shape[0] and length.max() > stop - start:
+        row = int(np.argmax(length > stop - start))
+        raise ValueError('%s value of record %d does not fit into %d columns' % (name, rows[row], stop - start))
+
+    pos = stop - 1
+    for j in range(int(ndigits.max()) if ndigits.shape[0] else 0):
+        if decimals and j == decimals:
+            buf[rows, pos] = ord('.')
+            pos -= 1
+        sel = ndigits > j
+        buf[rows[sel], pos] = ord('0') + (ints[sel] // POW10[j]) % 10
+        pos -= 1
+    buf[rows[neg], stop - length[neg]] = ord('-')
+
+
+def _place_float(buf, values, start, stop, decimals, name):
+    """
+    Writes a `float64` array as right-justified `'%.<decimals>f'` numbers
+    into the columns `start:stop` of a `(N, 81)` byte buffer. Values next
+    to a rounding tie (and huge values) are formatted with `%`, so that the
+    result is identical to `%` formatting; `nan` is left blank.
+
+    """
+    valid = ~np.isnan(values)
+    scaled = np.abs(np.where(valid, values, 0.0)) * 10**decimals
+    frac = scaled - np.floor(scaled)
+    slow = valid & ((np.abs(frac - 0.5) < 1e-6) | (scaled >= 2.0**62))
+    fast = np.flatnonzero(valid & ~slow)
+    _place_number(buf, np.rint(scaled[fast]).astype(np.int64), np.signbit(values[fast]),
+                  start, stop, decimals, name, fast)
+    for row in np.flatnonzero(slow).tolist():
+        text = ('%.*f' % (decimals, values[row])).encode()
+        if len(text) > stop - start:
+            raise ValueError('%s value %r does not fit into %d columns' % (name, values[row], stop - start))
+        buf[row, stop - len(text):stop] = np.frombuffer(text, dtype=np.uint8)
+
 
 class PdbIO(object):
     def __init__():
@@ -17,127 +142,120 @@ class PdbIO(object):
         """
         Parses a PDB file into a pandas DataFrame
 
+        The coordinate records are padded to the 80-column PDB layout and
+        joined into one byte buffer, which is then viewed as a NumPy
+        structured array so that every fixed-width column is sliced at once.
+
         Parameters
         ----------
         dest : `str`.
           Path to the target file. E.g., `"/home/.../desktop/my_pdb.pdb"`
-          or list of file contents.
+          or list of file contents. Compressed files (gzip, bzip2,
+          xz) are detected by their magic bytes.
         
         Returns
         ----------
         df : DataFrame.
 
         """
-        rec = [['record', 0, 6],
-             ['atomnum', 6, 11],
-             ['atomname', 12, 16],
-             ['altloc', 16, 17], 
-             ['residuename', 17, 20], 
-             ['chainid', 21, 22], 
-             ['residuenum', 22, 26], 
-             ['insertion', 26, 27],
-             ['xcoord', 30, 38], 
-             ['ycoord', 38, 46], 
-             ['zcoord', 47, 54], 
-             ['occupancy', 54, 60], 
-             ['bfactor', 60, 66],
-             ['segmentid', 72, 76], 
-             ['element', 76, 78], 
-             ['charge', 78, 80]]
-             
-        coords = []
-
         if isinstance(dest, str) and os.path.isfile(dest):
-            in_file = open(dest, 'r')
+            with open_file(dest, 'r') as in_file:
+                lines = in_file.readlines()
         else:
-            in_file = dest
+            lines = dest
+
+        lines = [line for line in lines if line.startswith(COORD_RECORDS)]
+        buf = ''.join([line.strip()[:80].ljust(80) for line in lines])
+        ary = np.frombuffer(buf.encode('latin-1', 'replace'), dtype=COORD_DTYPE)
 
+        # plain casts are much faster than `np.char.decode` for pure ASCII
+        if buf.isascii():
+            decode = lambda col: col.astype(str)
+        else:
+            decode = lambda col: np.char.decode(col, 'latin-1')
 
-        for line in in_file:
-            if not line.startswith(('ATOM', 'HETATM', 'ANISOU','TER')):
-                continue
-            row = []
-            for r in rec:
-                sline = line.strip()
+        data = dict()
+        for name, start, stop in COORD_COLUMNS:
+            col = np.char.strip(ary[name])
+            if name in ('atomnum', 'residuenum', 'segmentid', 'charge'):
                 try:
-                    row.append(sline[r[1]:r[2]].strip())
-                except IndexError:
-                    pass
-            row.append(line)
-            coords.append(row)
-    
-        df = pd.DataFrame(coords, columns=[c[0] for c in rec] + ['origline'])
-        df.tail()
-    
-        if isinstance(dest, str) and os.path.isfile(dest):
-            in_file.close()   
-    
-    
-        for c in ('atomnum', 'residuenum', 'segmentid', 'charge'):
-            try:
-                #df[c] = df[c].apply(lambda x: None if not x else x)
-                df[c] = df[c].astype(int)
-            except ValueError:
-                pass
-        for c in ('xcoord', 'ycoord', 'zcoord', 'occupancy', 'bfactor'):
-            try:
-                df[c] = df[c].apply(lambda x: np.nan if not x else x)
-                df[c] = df[c].astype(float)
-            except ValueError:
-                pass
+                    col = col.astype(np.int64)
+                except ValueError:
+                    col = decode(col)
+            elif name in ('xcoord', 'ycoord', 'zcoord', 'occupancy', 'bfactor'):
+                empty = col == b''
+                try:
+                    col = np.where(empty, b'nan', col).astype(np.float64)
+                except ValueError:
+                    col = decode(col).astype(object)
+                    col[empty] = np.nan
+            else:
+                col = decode(col)
+            data[name] = col
+        data['origline'] = lines
 
+        df = pd.DataFrame(data, columns=[c[0] for c in COORD_COLUMNS] + ['origline'])
         return df
 
-
-    def coordsec_to_file(self, dest):
+    def coordsec_to_file(self, dest, chunksize=2**16):
         """
         Writes the contents of the `coord_ary` DataFrame to file.
 
+        Every column is formatted at once into a fixed-width byte buffer
+        of 80-column records (see `WRITE_COLUMNS`), which is streamed to
+        the file in chunks of `chunksize` records. Atom names with 4
+        characters start in column 13, shorter names in column 14;
+        empty coordinates (e.g., of TER records) are left blank.
+
         Parameters
         ----------
         dest : `str`.
-          Path to the target file. E.g., `"/home/.../desktop/my_pdb.pdb"`
+          Path to the target file. E.g., `"/home/.../desktop/my_pdb.pdb"`.
+          Compressed if the name ends with `.gz`, `.bz2`, or `.xz`.
+
+        chunksize : `int` (default: `2**16`).
+          Number of records that are formatted per pass.
         
         """
-        df = self.coord_ary.copy()
-        df.drop('origline', axis=1, inplace=True)
-
-        df['record'] = df['record'].apply(lambda x: x + (6-len(x))*' ')
-        df['atomnum'] = df['atomnum'].apply(lambda x: (5-len(str(x)))*' ' + str(x))
-        df['atomname'] = df['atomname'].apply(lambda x: '  ' + str(x) + (3-len(str(x)))*' ' )
-        df['residuename'] = df['residuename'].apply(lambda x: str(x) + (3-len(str(x)))*' ' )
-        df['altloc'] = df['altloc'].apply(lambda x: ' ' if not x else x)
-        df['chainid'] = df['chainid'].apply(lambda x: ' ' + x)
-        df['residuenum'] = df['residuenum'].apply(lambda x: ' '*(4-len(str(x))) + str(x))
-        df['insertion'] = df['insertion'].apply(lambda x: ' ' if not x else x)
-        df['segmentid'] = df['segmentid'].apply(lambda x: ' '*(6-len(str(x))) + str(x))
-        df['element'] = df['element'].apply(lambda x: ' '*(6-len(str(x))) + str(x))
-        df['charge'] = df['charge'].apply(lambda x: ' '*(2-len(str(x))) + str(x))
-
-        # fix TER entries later
-        df_nt = df[df['record'] != 'TER']
-        df_nt['xcoord'] = df_nt['xcoord'].apply(lambda x: ' '*(11-len('%.3f' % x)) + '%.3f' % x)
-        df_nt['ycoord'] = df_nt['ycoord'].apply(lambda x: ' '*(8-len(str('%.3f' % x))) + '%.3f' % x)
-        df_nt['zcoord'] = df_nt['zcoord'].apply(lambda x: ' '*(8-len(str('%.3f' % x))) + '%.3f' % x)
-        df_nt['occupancy'] = df_nt['occupancy'].apply(lambda x: ' '*(6-len('%.2f' % x)) + '%.2f' % x)
-        df_nt['bfactor'] = df_nt['bfactor'].apply(lambda x: ' '*(6-len('%.2f' % x)) + '%.2f' % x)
-
-        df = df_nt[df_nt.index == df.index]        
-        
-        # fix TER
-        df = df.where((pd.notnull(df)), ' ')
-        for r in ('xcoord','ycoord','zcoord','occupancy','bfactor'):
-            df.loc[df['record'] == 'TER   ', r] = df.loc[df['record'] == 'TER   ', r]\
-                    .apply(lambda x: x.replace('nan', '   '))
-                    
-        np.savetxt(dest, 
-                   df.values, 
-                   delimiter='', 
-                   newline='\n', 
-                   header='', 
-                   footer='',
-                   fmt='%s',
-                   comments='# ')
+        df = self.coord_ary
+        with open_file(dest, 'wb') as out:
+            for start in range(0, df.shape[0], chunksize):
+                out.write(self._format_coordsec(df.iloc[start:start + chunksize]))
+
+    @staticmethod
+    def _format_coordsec(df):
+        """ Formats a `coord_ary` DataFrame into newline-terminated 80-column records (`bytes`). """
+        n = df.shape[0]
+        buf = np.full((n, 81), ord(' '), dtype=np.uint8)
+        buf[:, 80] = ord('\n')
+        anisou = (df['record'] == 'ANISOU').to_numpy(dtype=bool, na_value=False)
+
+        for name, start, stop, fmt in WRITE_COLUMNS:
+            col = df[name]
+            if fmt in ('l', 'r'):
+                values = col.to_numpy()
+                if fmt == 'r' and values.dtype.kind in 'iu':
+                    values = values.astype(np.int64)
+                    _place_number(buf, np.abs(values), values < 0, start, stop, 0, name)
+                elif name == 'atomname':
+                    # 4-character atom names start one column earlier
+                    _place_text(buf, col, 12, 16, lambda s: s if len(s) == 4 else ' ' + s.ljust(3), name)
+                elif fmt == 'l':
+                    _place_text(buf, col, start, stop, lambda s: s.ljust(stop - start), name)
+                else:
+                    _place_text(buf, col, start, stop, lambda s: s.rjust(stop - start), name)
+            else:
+                values = pd.to_numeric(col, errors='coerce').to_numpy(dtype=np.float64, na_value=np.nan)
+                _place_float(buf, np.where(anisou, np.nan, values), start, stop, fmt, name)
+
+        if 'origline' in df.columns:
+            anisou = np.flatnonzero(anisou)
+            if anisou.shape[0]:
+                orig = np.array([line.rstrip('\r\n')[:80].ljust(80) for line in df['origline'].iloc[anisou]],
+                                dtype='S80')
+                orig = orig.view(np.uint8).reshape(-1, 80)
+                buf[anisou, ANISOU_SPAN[0]:ANISOU_SPAN[1]] = orig[:, ANISOU_SPAN[0]:ANISOU_SPAN[1]]
+        return buf.tobytes()
 
     def save_pdb(self, dest):
         """
@@ -146,7 +264,8 @@ class PdbIO(object):
         Parameters
         ----------
         dest : `str`.
-          Path to the target file. E.g., `"/home/.../desktop/my_pdb.pdb"`
+          Path to the target file. E.g., `"/home/.../desktop/my_pdb.pdb"`.
+          Compressed if the name ends with `.gz`, `.bz2`, or `.xz`.
         
         Returns
         ----------
@@ -156,7 +275,7 @@ class PdbIO(object):
 
         """
         try:
-            with open(dest, 'w') as out:
+            with open_file(dest, 'w') as out:
                 for line in self.cont:
                     out.write(line + '\n')
             success = True
@@ -166,8 +285,35 @@ class PdbIO(object):
 
         return success
 
-        
-    def fetch_rcsb(self, pdb_code):
+    def save_atom_table(self, dest=None):
+        """
+        Writes the parsed `.atom_table` (coordinates, names, residues,
+        chains, elements, B-factors, record types, and CONECT records) to
+        a binary file that `pdbtable.load_atom_table` reloads without
+        parsing. The modification time, size, and hash of the PDB file
+        the `Pdb` was read from are stored to detect changes.
+
+        Parameters
+        ----------
+
+        dest : `str` or `None` (default: `None`).
+          Path of the table file; `<PDB file>.atab` if `None`.
+
+        Returns
+        ----------
+
+        dest : `str`.
+          Path of the table file.
+
+        """
+        if dest is None:
+            if not self.fileloc:
+                raise ValueError('dest is required if the Pdb was not read from a file')
+            dest = self.fileloc + TABLE_EXT
+        return self.atom_table.save(dest, source=self.fileloc or None)
+
+
+    def fetch_rcsb(self, pdb_code, cache=True):
         """
         Fetches PDB file contents from rcsb.org.
 
@@ -176,6 +322,11 @@ class PdbIO(object):
         
         pdb_code : `str`.
           A 4-letter PDB code, e.g., `"3eiy"`
+
+        cache : `bool` or `pdbcache.PdbCache` (default: `True`).
+          If `True`, files are read from and stored in the default on-disk
+          cache (`pdbcache.get_default_cache()`); a `PdbCache` is used
+          instead of the default cache; `False` always downloads.
         
         Returns
         ----------
@@ -185,14 +336,17 @@ class PdbIO(object):
           PDB file contents.
             
         """   
+        if cache is True:
+            cache = get_default_cache()
+        elif cache is False:
+            cache = None
+
         pdb_cont = []
         try:
-            response = urllib.request.urlopen('http://www.rcsb.org/pdb/files/%s.pdb' %pdb_code.lower())
-            dat = response.read().decode('utf-8')
+            with PdbDownloader(n_jobs=1, cache=cache) as loader:
+                dat = loader.fetch(pdb_code).decode('utf-8')
             pdb_cont = [row.strip() for row in dat.split('\n') if row.strip()]
-        except urllib.request.HTTPError as e:
-            print('HTTP Error %s' %e.code)
-        except urllib.request.URLError as e:
-            print('URL Error %s' %e.args) 
+        except DownloadError as e:
+            print(e)
         
         return pdb_cont
\ No newline at end of file
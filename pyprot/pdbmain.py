@@ -7,50 +7,119 @@ from .pdbstats import PdbStats
 from .pdbmanip import PdbManip
 from .pdbformat import PdbFormat
 from .pdbconvert import PdbConvert
+from .pdbtable import AtomTable, TABLE_EXT, _cached_table, _save_table
+from .pdbspatial import CellList
+from .fileio import open_file
+from functools import cached_property
+import numpy as np
 import urllib.request
 import os
 
+
+def _read_lines(path):
+    """ Non-empty, stripped lines of a (compressed) PDB file. """
+    try:
+        with open_file(path, 'r') as pdb_file:
+            rows = (row.strip() for row in pdb_file)
+            return [row for row in rows if row]
+    except FileNotFoundError as err:
+        print(err)
+        return []
+
+
+# line views on `Pdb.cont` that are built by `Pdb._classify_records`
+RECORD_VIEWS = ('atom', 'atom_ter', 'hetatm', 'mainchain', 'calpha', 'conect')
+
+
+def _record_view(view):
+    """ Lazily computed list of the `.cont` lines of one of the `RECORD_VIEWS`. """
+    def lines(self):
+        return self._lines(self.record_idx[view])
+    lines.__name__ = view
+    lines.__doc__ = "`list` of the %s lines in `.cont` (computed on first access)." % view.upper()
+    return cached_property(lines)
+
+
 class Pdb(PdbIO, PdbStats, PdbManip, PdbFormat, PdbConvert):
-    """ Object that allows operations with protein files in PDB format. """
+    """
+    Object that allows operations with protein files in PDB format.
+
+    All attributes derived from `.cont` (`atom`, `hetatm`, `chains`, `atom_table`, ...)
+    are computed on first access and cached. Assigning a new `.cont` clears the cache;
+    call `invalidate()` after modifying `.cont` in place.
+
+    """
 
     def __init__(self, file_cont=[], pdb_code=""):
-        self.cont = []
         self.code = pdb_code.lower()
-        self.coord_ary = None # new pandas DataFrame coordinate section
-        self.atom = []
-        self.atom_ter = []
-        self.hetatm = []
-        self.mainchain = []
-        self.calpha = []
-        self.conect = []
-        self.chains = []
         self.fileloc = ""
+        cont = []
         
         # read in PDB from rcsb.org, a list, or a file
 
         if isinstance(file_cont, list):
-            self.cont = file_cont[:]
+            cont = file_cont[:]
         elif os.path.isfile(file_cont):
-            try:
-                with open(file_cont, 'r') as pdb_file:
-                    self.cont = [row.strip() for row in pdb_file.read().split('\n') if row.strip()]
-            except FileNotFoundError as err:
-                print(err)
+            self.fileloc = file_cont
+            cont = _read_lines(file_cont)
         else:
-            self.cont = self.fetch_rcsb(self.code)
-            
-        if self.cont:
-             self.atom = [row for row in self.cont if row.startswith('ATOM')]
-             self.atom_ter = [row for row in self.cont if row.startswith(('ATOM', 'TER'))]
-             self.hetatm = [row for row in self.cont if row.startswith('HETATM')]
-             self.mainchain = [row for row in self.atom if  row[13:15] in ('CA', 'N ', 'C ', 'O ')]
-             self.calpha = [row for row in self.mainchain if row[13:15] == 'CA']
-             self.conect = [row for row in self.cont if row.startswith('CONECT')]
-             self.chains = self._get_chains()
-             
-        if file_cont:
-            self.coord_ary = self.coordsec_to_ary(dest=file_cont)
+            cont = self.fetch_rcsb(self.code)
+
+        self.cont = cont
     
+    @classmethod
+    def from_table(cls, pdb_file, cache_file=None, check='mtime', mmap=True):
+        """
+        Returns a `Pdb` of a PDB file whose `atom_table` is memory-mapped
+        from the binary table file (see `pdbtable.load_atom_table`). If the
+        table file is up to date, the PDB file itself is only read on the
+        first access of `.cont` (or of the line views derived from it), so
+        operations on the `atom_table`, e.g., `bfactor_stats`, do not read
+        the text at all. A missing or outdated table file is written from
+        the parsed PDB file.
+
+        Parameters
+        ----------
+
+        pdb_file : `str`.
+          Path of a (compressed) PDB file.
+
+        cache_file : `str` or `None` (default: `None`).
+          Path of the table file; `<pdb_file>.atab` if `None`.
+
+        check : `str` (default: `'mtime'`).
+          How changes of `pdb_file` are detected, `'mtime'` or `'hash'`,
+          see `pdbtable.table_cache_valid`. Every table file must be
+          checked, since its line indices refer to the lines of `pdb_file`.
+
+        mmap : `bool` (default: `True`).
+          If `True`, the table arrays are memory-mapped.
+
+        Returns
+        ----------
+
+        pdb : `Pdb`.
+
+        """
+        if cache_file is None:
+            cache_file = pdb_file + TABLE_EXT
+        if check not in ('mtime', 'hash'):
+            raise ValueError('check must be mtime or hash')
+        if not os.path.isfile(pdb_file):
+            raise FileNotFoundError('No such file: %r' % pdb_file)
+
+        pdb = cls.__new__(cls)
+        pdb.code, pdb.fileloc = '', pdb_file
+        table = _cached_table(pdb_file, cache_file, check=check, mmap=mmap)
+        if table is None:
+            pdb.cont = _read_lines(pdb_file)
+            _save_table(pdb.atom_table, cache_file, pdb_file)
+        else:
+            # `.cont` is read on first access
+            pdb._cont = None
+            pdb.__dict__['atom_table'] = table
+        return pdb
+
     def __del__(self):
         del self
 
@@ -63,3 +132,122 @@ class Pdb(PdbIO, PdbStats, PdbManip, PdbFormat, PdbConvert):
 
     def __str__(self):
         return self.__repr__()
+
+    @property
+    def cont(self):
+        """ PDB file contents as `list` where every item is a `str` line. """
+        if self._cont is None:
+            self._cont = _read_lines(self.fileloc)
+        return self._cont
+
+    @cont.setter
+    def cont(self, cont):
+        self._cont = cont
+        self.invalidate()
+
+    def invalidate(self):
+        """ Clears all cached attributes that were derived from `.cont`. """
+        for attr in CACHED_ATTRS:
+            self.__dict__.pop(attr, None)
+
+    atom = _record_view('atom')
+    atom_ter = _record_view('atom_ter')
+    hetatm = _record_view('hetatm')
+    mainchain = _record_view('mainchain')
+    calpha = _record_view('calpha')
+    conect = _record_view('conect')
+
+    @cached_property
+    def _classified(self):
+        return self._classify_records()
+
+    @cached_property
+    def record_idx(self):
+        """ `dict` of line index arrays into `.cont` for each of the `RECORD_VIEWS`. """
+        return self._classified[0]
+
+    @cached_property
+    def chains(self):
+        """ `dict` of the ATOM, HETATM, and TER lines per chain ID, see `_get_chains`. """
+        if not self.cont:
+            return []
+        return {chain: self._lines(idx) for chain, idx in self._classified[1].items()}
+
+    @cached_property
+    def coord_ary(self):
+        """ pandas DataFrame of the coordinate section, see `coordsec_to_ary`. """
+        if not self.cont:
+            return None
+        return self.coordsec_to_ary(dest=self.cont)
+
+    @cached_property
+    def atom_table(self):
+        """ Columnar NumPy `AtomTable` of the ATOM, HETATM, and TER records. """
+        record_idx = self.record_idx
+        line_idx = np.sort(np.concatenate([record_idx['atom_ter'], record_idx['hetatm']]))
+        return AtomTable(self.cont, line_idx,
+                         mainchain_idx=record_idx['mainchain'],
+                         calpha_idx=record_idx['calpha'],
+                         conect_idx=record_idx['conect'])
+
+    @cached_property
+    def spatial_index(self):
+        """ `CellList` over the `atom_table` coordinates for radius queries. """
+        return CellList(self.atom_table.coords)
+
+    def _lines(self, idx):
+        """ Returns the lines in `.cont` at the positions in index array `idx`. """
+        cont = self.cont
+        return [cont[i] for i in idx.tolist()]
+
+    def _classify_records(self):
+        """
+        Classifies all lines in `.cont` in a single pass.
+
+        Returns
+        ----------
+
+        record_idx : `dict`.
+          Line index arrays into `.cont` for each of the `RECORD_VIEWS`,
+          e.g., `{'atom': array([ 7,  8, ...]), 'hetatm': ..., ...}`
+
+        chain_idx : `dict`.
+          Line index arrays of the ATOM, HETATM, and TER entries per chain ID,
+          e.g., `{'A': array([ 7,  8, ...]), 'B': ..., ...}`
+
+        """
+        record_idx = {view: [] for view in RECORD_VIEWS}
+        atom, atom_ter = record_idx['atom'], record_idx['atom_ter']
+        hetatm, conect = record_idx['hetatm'], record_idx['conect']
+        mainchain, calpha = record_idx['mainchain'], record_idx['calpha']
+        chain_idx = dict()
+
+        for i, row in enumerate(self.cont):
+            if row.startswith('ATOM'):
+                atom.append(i)
+                atom_ter.append(i)
+                name = row[13:15]
+                if name in ('CA', 'N ', 'C ', 'O '):
+                    mainchain.append(i)
+                    if name == 'CA':
+                        calpha.append(i)
+            elif row.startswith('HETATM'):
+                hetatm.append(i)
+            elif row.startswith('TER'):
+                atom_ter.append(i)
+            else:
+                if row.startswith('CONECT'):
+                    conect.append(i)
+                continue
+            chain = row[21:22]
+            if chain not in chain_idx:
+                chain_idx[chain] = []
+            chain_idx[chain].append(i)
+
+        record_idx = {view: np.array(idx, dtype=np.intp) for view, idx in record_idx.items()}
+        chain_idx = {chain: np.array(idx, dtype=np.intp) for chain, idx in chain_idx.items()}
+        return record_idx, chain_idx
+
+
+# attributes cached in the instance `__dict__` that `Pdb.invalidate` clears
+CACHED_ATTRS = RECORD_VIEWS + ('_classified', 'record_idx', 'chains', 'coord_ary', 'atom_table', 'spatial_index')
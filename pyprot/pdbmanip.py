@@ -3,6 +3,8 @@ Class inhereted by the `Pdb` base class in `pdbmain`.
 Contains methods specialized for PDB file content manipulation.
 """
 
+import numpy as np
+
 
 class PdbManip(object):
     def __init__():
@@ -67,13 +69,11 @@ class PdbManip(object):
           PDB file contents.
                   
         """
-        stripped = []
-        for line in self.cont:
-            try:
-                if not (line.startswith("HETATM") and line[17:20] == "HOH"):
-                    stripped.append(line)
-            except:
-                pass
+        tab = self.atom_table
+        water = tab.line_idx[tab.is_hetatm & tab.isin('resname', ['HOH'])]
+        keep = np.ones(len(self.cont), dtype=bool)
+        keep[water] = False
+        stripped = self._lines(np.flatnonzero(keep))
         return stripped
 
 
@@ -94,10 +94,8 @@ class PdbManip(object):
           List of PDB file contents that belong to the specified chains.
 
         """
-        chain_cont = []
-        for row in self.cont:
-            if row.startswith(('ATOM', 'HETATM', 'TER')) and row[21:22].strip() in chain_ids:
-                chain_cont.append(row)
+        tab = self.atom_table
+        chain_cont = self._lines(tab.line_idx[tab.isin('chain', chain_ids)])
         return chain_cont
 
 
@@ -125,14 +123,15 @@ class PdbManip(object):
           List of PDB file contents that match the specified residue number range.
 
         """
-        rng = range(pos[0], pos[1]+1)
+        tab = self.atom_table
+        in_rng = (tab.resnum >= pos[0]) & (tab.resnum <= pos[1])
         
         res_cont = []
         
         if protein:
-            res_cont += [row for row in self.atom if int(row[22:26].strip()) in rng]
+            res_cont += self._lines(tab.line_idx[tab.is_atom & in_rng])
         if ligand:
-            res_cont += [row for row in self.hetatm if int(row[22:26].strip()) in rng]
+            res_cont += self._lines(tab.line_idx[tab.is_hetatm & in_rng])
         return res_cont
 
         
@@ -160,14 +159,15 @@ class PdbManip(object):
           List of PDB file contents that match the specified atom number range.
 
         """
-        rng = range(pos[0], pos[1]+1)
+        tab = self.atom_table
+        in_rng = (tab.serial >= pos[0]) & (tab.serial <= pos[1])
         
         atom_cont = []
         
         if protein:
-            atom_cont += [row for row in self.atom if int(row[6:11].strip()) in rng]
+            atom_cont += self._lines(tab.line_idx[tab.is_atom & in_rng])
         if ligand:
-            atom_cont += [row for row in self.hetatm if int(row[6:11].strip()) in rng]
+            atom_cont += self._lines(tab.line_idx[tab.is_hetatm & in_rng])
         return atom_cont
 
 
@@ -192,15 +192,50 @@ class PdbManip(object):
           List of PDB file contents that are within the specified radius.
 
         """
-        in_radius = []
-        for line in self.cont:
-            if line.startswith(('ATOM', 'HETATM')):
-                xyz_coords = [float(line[30:38]),\
-                             float(line[38:46]),\
-                              float(line[46:54])]
-                distance = (sum([(coordinates[i]-xyz_coords[i])**2 for i in range(3)]))**0.5
-                if distance <= radius:
-                    in_radius.append(line)
+        tab = self.atom_table
+        hits = self.spatial_index.query_radius(coordinates, radius)
+        hits = hits[tab.select(protein=True, ligand=True)[hits]]
+        in_radius = self._lines(tab.line_idx[hits])
         return in_radius
+
+
+    def grab_radius_multi(self, radius, centers, union=False):
+        """
+        Grabs those atoms that are within a specified
+        radius of any of multiple 3D-coordinates in one vectorized query.
+
+        Parameters
+        ----------
         
-    
+        radius : `int` or `float`.
+          Radius in Angstroms.
+          
+        centers : `ndarray` or `list`, shape `(M, 3)`.
+          x, y, z coordinates of the centers, e.g., all atoms of a ligand
+          `[[1.0, 2.4, 4.0], [1.3, 2.0, 5.1], ...]`.
+
+        union : `bool` (default: `False`).
+          If `True`, returns a single list of all atoms that are within the
+          radius of at least one center.
+
+        Returns
+        ----------
+
+        atom_cont : `list`.
+          A list with one list of PDB file contents per center, or a single list
+          of PDB file contents (in file order) if `union=True`.
+
+        """
+        tab = self.atom_table
+        centers = np.asarray(centers, dtype=float).reshape(-1, 3)
+        center_idx, hits = self.spatial_index.query_pairs(centers, radius)
+        keep = tab.select(protein=True, ligand=True)[hits]
+        center_idx, hits = center_idx[keep], hits[keep]
+
+        if union:
+            return self._lines(tab.line_idx[np.unique(hits)])
+
+        bounds = np.searchsorted(center_idx, np.arange(centers.shape[0] + 1))
+        lines = self._lines(tab.line_idx[hits])
+        atom_cont = [lines[bounds[i]:bounds[i+1]] for i in range(centers.shape[0])]
+        return atom_cont
@@ -0,0 +1,207 @@
+"""
+Spatial index for radius queries on atom coordinates.
+Used by the `Pdb` base class in `pdbmain` as `Pdb.spatial_index`.
+"""
+
+import numpy as np
+
+
+# edge length of the cubic cells in Angstrom
+CELL_SIZE = 4.0
+
+# maximum number of (center, point) candidate pairs of one vectorized pass
+MAX_CANDIDATES = 2**22
+
+
+class CellList(object):
+    """
+    Uniform cell list over a set of 3D points. Points are binned into cubic
+    cells once, so that a radius query only has to visit the cells that
+    overlap the bounding box of the query sphere.
+
+    Parameters
+    ----------
+
+    coords : `ndarray`, shape `(N, 3)`.
+      Point coordinates. Rows that contain `nan` (e.g., TER records)
+      are never returned by a query.
+
+    cell_size : `float` (default: `CELL_SIZE`).
+      Edge length of the cubic cells in Angstrom.
+
+    """
+
+    def __init__(self, coords, cell_size=CELL_SIZE):
+        coords = np.asarray(coords, dtype=np.float64).reshape(-1, 3)
+        self.coords = coords
+        self.cell_size = float(cell_size)
+
+        valid = np.flatnonzero(~np.isnan(coords).any(axis=1))
+        if valid.shape[0]:
+            self.origin = coords[valid].min(axis=0)
+            cells = np.floor((coords[valid] - self.origin) / self.cell_size).astype(np.int64)
+            self.dims = cells.max(axis=0) + 1
+        else:
+            self.origin = np.zeros(3)
+            cells = np.empty((0, 3), dtype=np.int64)
+            self.dims = np.ones(3, dtype=np.int64)
+
+        # points sorted by linear cell id; a cell is a contiguous slice
+        cell_ids = self._linear(cells)
+        order = np.argsort(cell_ids, kind='stable')
+        self.point_idx = valid[order]
+        self.cell_ids = cell_ids[order]
+        self._offset_cache = dict()
+
+    def __len__(self):
+        return self.point_idx.shape[0]
+
+    def _linear(self, cells):
+        return (cells[..., 0] * self.dims[1] + cells[..., 1]) * self.dims[2] + cells[..., 2]
+
+    def _offsets(self, span):
+        """ Cell offsets of the `(2*span+1)**3` cube around a cell. """
+        if span not in self._offset_cache:
+            rng = np.arange(-span, span + 1)
+            self._offset_cache[span] = np.stack(np.meshgrid(rng, rng, rng, indexing='ij'),
+                                                axis=-1).reshape(-1, 3)
+        return self._offset_cache[span]
+
+    def query_pairs(self, centers, radius, chunksize=4096, max_candidates=MAX_CANDIDATES):
+        """
+        Finds all points within a radius of each of the query centers.
+
+        Parameters
+        ----------
+
+        centers : `ndarray`, shape `(M, 3)` or `(3,)`.
+          Query centers as x, y, z coordinates.
+
+        radius : `int` or `float`.
+          Radius in Angstrom.
+
+        chunksize : `int` (default: `4096`).
+          Maximum number of centers that are processed per vectorized pass.
+
+        max_candidates : `int` (default: `MAX_CANDIDATES`).
+          Maximum number of candidate (center, point) pairs per pass, which
+          bounds the temporary arrays. Passes are split between centers, so
+          a single center can exceed it (by at most all points).
+
+        Returns
+        ----------
+
+        center_idx, point_idx : `ndarray`, `ndarray`.
+          Index pairs of the matched centers and points, sorted by center
+          and then by point index.
+
+        """
+        centers = np.asarray(centers, dtype=np.float64).reshape(-1, 3)
+        span = max(int(np.ceil(radius / self.cell_size)), 0)
+
+        # visiting (2*span+1)**3 cells per center is pointless once the
+        # query box is larger than the whole grid; test all points instead
+        brute = (2*span + 1)**3 >= self.dims.prod()
+        if brute:
+            per_center = max(len(self), 1)
+        else:
+            offsets = self._offsets(span)
+            per_center = offsets.shape[0]
+
+        # bound the (centers x candidate cells) arrays of one chunk
+        chunksize = max(1, min(chunksize, max_candidates // per_center))
+
+        pairs_c, pairs_p = [], []
+        for start in range(0, centers.shape[0], chunksize):
+            chunk = centers[start:start + chunksize]
+
+            if brute:
+                cand_c = np.repeat(np.arange(chunk.shape[0]), len(self))
+                cand_p = np.tile(self.point_idx, chunk.shape[0])
+                passes = [(cand_c, cand_p)]
+            else:
+                passes = self._candidate_passes(chunk, offsets, max_candidates)
+
+            for cand_c, cand_p in passes:
+                distance = np.sqrt(((self.coords[cand_p] - chunk[cand_c])**2).sum(axis=1))
+                hit = distance <= radius
+                pairs_c.append(cand_c[hit] + start)
+                pairs_p.append(cand_p[hit])
+
+        if not pairs_c:
+            empty = np.empty(0, dtype=np.intp)
+            return empty, empty.copy()
+        center_idx, point_idx = np.concatenate(pairs_c), np.concatenate(pairs_p)
+        order = np.lexsort((point_idx, center_idx))
+        return center_idx[order], point_idx[order]
+
+    def _candidate_passes(self, chunk, offsets, max_candidates):
+        """
+        Yields the candidate (center, point) index pairs of a chunk of
+        centers in passes of at most `max_candidates` pairs, split between
+        centers. Only the pairs of one pass are held in memory at a time.
+
+        """
+        # candidate cells around every center: shape (m, k, 3)
+        home = np.floor((chunk - self.origin) / self.cell_size).astype(np.int64)
+        cells = home[:, np.newaxis, :] + offsets[np.newaxis, :, :]
+        inside = ((cells >= 0) & (cells < self.dims)).all(axis=2)
+        owner = np.nonzero(inside)[0]
+        cell_ids = self._linear(cells[inside])
+
+        # point slices of the non-empty candidate cells, ordered by center
+        lo = np.searchsorted(self.cell_ids, cell_ids, side='left')
+        hi = np.searchsorted(self.cell_ids, cell_ids, side='right')
+        counts = hi - lo
+        nonempty = counts > 0
+        owner, lo, counts = owner[nonempty], lo[nonempty], counts[nonempty]
+
+        # split between centers where the running number of candidates
+        # exceeds another multiple of `max_candidates`
+        cum = np.cumsum(counts)
+        per_center = np.bincount(owner, weights=counts, minlength=chunk.shape[0]).astype(np.int64)
+        center_end = np.cumsum(per_center)
+        bounds = [0]
+        while center_end.shape[0] and bounds[-1] < chunk.shape[0]:
+            done = center_end[bounds[-1] - 1] if bounds[-1] else 0
+            stop = int(np.searchsorted(center_end, done + max_candidates, side='right'))
+            bounds.append(max(stop, bounds[-1] + 1))
+
+        for c0, c1 in zip(bounds[:-1], bounds[1:]):
+            i0, i1 = np.searchsorted(owner, [c0, c1])
+            if i0 == i1:
+                continue
+            sub_counts = counts[i0:i1]
+            total = int(cum[i1 - 1] - (cum[i0 - 1] if i0 else 0))
+            cand_c = np.repeat(owner[i0:i1], sub_counts)
+            shift = np.repeat(lo[i0:i1] - np.cumsum(sub_counts) + sub_counts, sub_counts)
+            cand_p = self.point_idx[shift + np.arange(total)]
+            yield cand_c, cand_p
+
+    def query_radius(self, centers, radius):
+        """
+        Finds the points within a radius of one or more query centers.
+
+        Parameters
+        ----------
+
+        centers : `ndarray` or `list`, shape `(3,)` or `(M, 3)`.
+          A single query center, e.g., `[1.0, 2.4, 4.0]`, or `M` centers.
+
+        radius : `int` or `float`.
+          Radius in Angstrom.
+
+        Returns
+        ----------
+
+        hits : `ndarray` or `list`.
+          Sorted point indices for a single center, or a `list` of
+          `M` such arrays for multiple centers.
+
+        """
+        centers = np.asarray(centers, dtype=np.float64)
+        center_idx, point_idx = self.query_pairs(centers, radius)
+        if centers.ndim == 1:
+            return point_idx
+        bounds = np.searchsorted(center_idx, np.arange(centers.shape[0] + 1))
+        return [point_idx[bounds[i]:bounds[i+1]] for i in range(centers.shape[0])]
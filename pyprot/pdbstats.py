@@ -3,8 +3,122 @@ Class inhereted by the `Pdb` base class in `pdbmain`.
 Contains methods specialized for statistics on PDB file contents.
 """
 
+import numpy as np
+import pandas as pd
 from . import statsbasic
+from . import superpose as superpose_
 from .datamolecular import ATOMIC_WEIGHTS
+from .pdbtable import WATER_NAMES
+
+
+def stack_coords(pdbs, ligand=False, atoms="no_h"):
+    """
+    Stacks the coordinates of multiple `Pdb` objects for `superpose.rmsd_matrix`.
+    Requires that all molecules have the same atoms in the same order.
+
+    Parameters
+    ----------
+
+    pdbs : `list`.
+      `Pdb` objects, e.g., a set of ligand conformers.
+
+    ligand : `bool` (default: `False`).
+      If True, uses HETATM entries, else ATOM entries.
+
+    atoms : `str` (default: `'no_h'`)
+      A string `'all'`, `'c'`, `'no_h'`, `'ca'`, or `'mc'`, see `PdbStats.rmsd`.
+
+    Returns
+    ----------
+
+    coords : `ndarray`, shape `(K, N, 3)`.
+      Coordinates of the `K` molecules.
+
+    """
+    stack, ref_names = [], None
+    for i, pdb in enumerate(pdbs):
+        mask = pdb._rmsd_mask(ligand=ligand, atoms=atoms)
+        names = pdb.atom_table.names('atomname')[mask]
+        if ref_names is None:
+            ref_names = names
+        elif not names.shape == ref_names.shape or not (names == ref_names).all():
+            raise ValueError('Atom names of molecule %d (%s) do not match the first molecule'
+                             % (i, pdb.fileloc or pdb.code or 'no file'))
+        stack.append(pdb.atom_table.coords[mask])
+    coords = np.stack(stack) if stack else np.empty((0, 0, 3))
+    return coords
+
+
+def _atom_masses(tab, rows):
+    """ Atomic masses of the `AtomTable` rows `rows`, looked up once per element. """
+    elements = tab.element[rows]
+    used = np.unique(elements)
+    masses = np.zeros(tab.categories['element'].shape[0])
+    masses[used] = [ATOMIC_WEIGHTS[name] for name in tab.categories['element'][used]]
+    return masses[elements]
+
+
+# values of `PdbStats.group_stats` fields: name -> (`AtomTable` attribute, column)
+STAT_FIELDS = {'bfactor': ('bfactor', None),
+               'occupancy': ('occupancy', None),
+               'x': ('coords', 0),
+               'y': ('coords', 1),
+               'z': ('coords', 2)}
+
+# statistics of `PdbStats.group_stats` in column order
+STATS = ('mean', 'median', 'std_dev', 'std_err')
+
+
+def _grouped_stats(values, group_idx, n_groups):
+    """
+    Mean, median, standard deviation, and standard error of every column
+    of `values` per group with the definitions of `statsbasic` (Bessel's
+    correction for more than 2 values). All (group, column) cells are
+    reduced together by a single `bincount` and a single sort.
+
+    Parameters
+    ----------
+
+    values : `ndarray`, shape `(N, K)`.
+      `K` columns of float values.
+
+    group_idx : `ndarray`, shape `(N,)`.
+      Group number of every row; every group must have at least one row.
+
+    n_groups : `int`.
+      Number of groups.
+
+    Returns
+    ----------
+
+    counts : `ndarray`, shape `(n_groups,)`.
+      Number of rows per group.
+
+    stats : `dict`.
+      Name in `STATS` -> `ndarray`, shape `(n_groups, K)`.
+
+    """
+    n_cols = values.shape[1]
+    counts = np.bincount(group_idx, minlength=n_groups)
+    n_cells = n_groups * n_cols
+    cell = (group_idx[:, np.newaxis] * n_cols + np.arange(n_cols)).ravel()
+    flat = values.ravel()
+    n = np.repeat(counts, n_cols)
+
+    mean = np.bincount(cell, weights=flat, minlength=n_cells) / n
+    dev = np.bincount(cell, weights=(flat - mean[cell])**2, minlength=n_cells)
+    std_dev = np.sqrt(dev / np.where(n > 2, n - 1, n))
+    std_err = std_dev / np.sqrt(n)
+
+    # values sorted within each cell; cells start at the cumulative counts
+    ordered = flat[np.lexsort((flat, cell))]
+    start = np.cumsum(n) - n
+    median = (ordered[start + (n - 1) // 2] + ordered[start + n // 2]) / 2.0
+
+    stats = dict(mean=mean, median=median, std_dev=std_dev, std_err=std_err)
+    for name in STATS:
+        stats[name] = stats[name].reshape(n_groups, n_cols)
+    return counts, stats
 
 
 class PdbStats(object):
@@ -46,30 +160,67 @@ class PdbStats(object):
         """
         rmsd = None
 
+        tab1, tab2 = self.atom_table, sec_molecule.atom_table
+        if atoms == "ca":
+            mask1, mask2 = tab1.is_calpha, tab2.is_calpha
+        else:
+            if not ligand:
+                mask1, mask2 = tab1.is_atom, tab2.is_atom
+            else:
+                mask1, mask2 = tab1.is_hetatm, tab2.is_hetatm
+            if atoms == "c":
+                mask1 = mask1 & tab1.isin('element', ['C'])
+                mask2 = mask2 & tab2.isin('element', ['C'])
+            elif atoms == "no_h":
+                mask1 = mask1 & ~tab1.isin('element', ['H'])
+                mask2 = mask2 & ~tab2.isin('element', ['H'])
+        coords1, coords2 = tab1.coords[mask1], tab2.coords[mask2]
+
+        if coords1.shape[0] and coords1.shape == coords2.shape:
+            total = ((coords1 - coords2)**2).sum()
+            rmsd = round(float(( total / coords1.shape[0] )**0.5), 4)
+        return rmsd
+
+    def _rmsd_mask(self, ligand=False, atoms="no_h"):
+        """
+        Selects the atoms for the RMSD calculation in `rmsd`.
+
+        Parameters
+        ----------
+
+        ligand : `bool` (default: `False`).
+          If True, selects HETATM entries, else ATOM entries.
+
+        atoms : `str` (default: `'no_h'`)
+          A string `'all'`, `'c'`, `'no_h'`, `'ca'`, or `'mc'`, see `rmsd`.
+
+        Returns
+        ----------
+
+        mask : `ndarray`.
+          Boolean mask over the rows of `.atom_table`.
+
+        """
+        if not atoms in ('all', 'c', 'no_h', 'ca', 'mc'):
+            raise ValueError('Atoms must be all, c, no_h, ca, or mc')
+
+        tab = self.atom_table
         if not ligand:
-            coords1, coords2 = self.atom, sec_molecule.atom
+            mask = tab.is_atom
         else:
-            coords1, coords2 = self.hetatm, sec_molecule.hetatm
+            mask = tab.is_hetatm
+
         if atoms == "c":
-            coords1 = [row for row in coords1 if row[77:].startswith('C')]
-            coords2 = [row for row in coords2 if row[77:].startswith('C')]
+            mask = mask & tab.isin('element', ['C'])
         elif atoms == "no_h":
-            coords1 = [row for row in coords1 if not row[77:].startswith('H')]
-            coords2 = [row for row in coords2 if not row[77:].startswith('H')]
+            mask = mask & ~tab.isin('element', ['H'])
         elif atoms == "ca":
-            coords1 = self.calpha
-            coords2 = sec_molecule.calpha
-
-        if all((coords1, coords2, len(coords1) == len(coords2))):
-            total = 0
-            for (i, j) in zip(coords1, coords2):
-                total += ( float(i[30:38]) - float(j[30:38]) )**2 +\
-                         ( float(i[38:46]) - float(j[38:46]) )**2 +\
-                         ( float(i[46:54]) - float(j[46:54]) )**2      
-            rmsd = round(( total / len(coords1) )**0.5, 4)
-        return rmsd
+            mask = mask & tab.isin('atomname', ['CA'])
+        elif atoms == "mc":
+            mask = mask & tab.isin('atomname', ['CA', 'C', 'N', 'O'])
+        return mask
 
-    def rmsd(self, sec_molecule, ligand=False, atoms="no_h"):
+    def rmsd(self, sec_molecule, ligand=False, atoms="no_h", superpose=False):
         """
         Calculates the Root Mean Square Deviation (RMSD) between two
         protein or ligand molecules in PDB format.
@@ -94,6 +245,10 @@ class PdbStats(object):
           `"no_h"`: Considers all atoms but hydrogen atoms.
           `"ca"`: Compares only C-alpha protein atoms.
           `"mc"`: Main Chain atoms CA, N, C, O
+
+        superpose : `bool` (default: `False`).
+          If `True`, the second molecule is optimally superposed onto
+          this molecule (Kabsch algorithm) before the RMSD is calculated.
         
         Returns
         ----------
@@ -105,44 +260,22 @@ class PdbStats(object):
         """
         rmsd = None
         
-        if not atoms in ('all', 'c', 'no_h', 'ca', 'mc'):
-            raise ValueError('Atoms must be all, c, no_h, ca, or mc')
-        
-        df1, df2 = self.coord_ary, sec_molecule.coord_ary
-        
-        if not ligand:
-            df1, df2 = df1[df1['record'] == 'ATOM'], df2[df2['record'] == 'ATOM']
-        else:
-            df1, df2 = df1[df1['record'] == 'HETATM'], df2[df2['record'] == 'HETATM']
-            
-        if atoms == "c":
-            df1, df2 = df1[df1['element'] == 'C'], df2[df2['element'] == 'C']
-
-        elif atoms == "no_h":
-            df1, df2 = df1[df1['element'] != 'H'], df2[df2['element'] != 'H']
-            
-        elif atoms == "ca":
-            df1, df2 = df1[df1['atomname'] == 'CA'], df2[df2['atomname'] == 'CA']
-            
-        elif atoms == "mc":
-            df1 = df1[ (df1['atomname'] == 'CA') | (df1['atomname'] == 'C') | (df1['atomname'] == 'N') | (df1['atomname'] == 'O')]
-            df2 = df2[ (df2['atomname'] == 'CA') | (df2['atomname'] == 'C') | (df2['atomname'] == 'N') | (df2['atomname'] == 'O')]
+        mask1 = self._rmsd_mask(ligand=ligand, atoms=atoms)
+        mask2 = sec_molecule._rmsd_mask(ligand=ligand, atoms=atoms)
+        tab1, tab2 = self.atom_table, sec_molecule.atom_table
 
-        if not df1.shape[0] == df2.shape[0] or not (df1['atomname'] == df2['atomname']).all():
+        names1, names2 = tab1.names('atomname')[mask1], tab2.names('atomname')[mask2]
+        if not names1.shape[0] == names2.shape[0] or not (names1 == names2).all():
             print("Warning, atom names in rows don't match!")
             return rmsd
 
-        ssquared = ( ((df1['xcoord'].values - df2['xcoord'].values)**2).sum() + 
-                         ((df1['ycoord'].values - df2['ycoord'].values)**2).sum() + 
-                         ((df1['zcoord'].values - df2['zcoord'].values)**2).sum()) 
-                         
-        rmsd = round( (ssquared / df1.shape[0])**0.5 , 4)
-            
-        #print((ssquared / df1.shape[0])**0.5)    
+        rmsd = round(superpose_.rmsd(tab1.coords[mask1], tab2.coords[mask2],
+                                     superpose=superpose), 4)
+
         return rmsd
         
 
-    def center_of_mass(self, protein=True, ligand=False):
+    def center_of_mass(self, protein=True, ligand=False, by=None):
         """
         Calculates center of mass of a protein and/or ligand structure.
 
@@ -155,6 +288,13 @@ class PdbStats(object):
         ligand : `bool`.
           If `True`, includes HETATM entries in calculation.
 
+        by : `str`, `list`, or `None` (default: `None`).
+          If `None`, calculates the center of mass of all selected atoms.
+          Else, calculates the centers of mass of all groups at once:
+          `'chain'`, `'residue'`, or a `list` of columns, see
+          `AtomTable.group`. `'ligand'` groups the HETATM residues without
+          water molecules (ignores `protein` and `ligand`).
+
         Returns
         ----------
         
@@ -162,44 +302,134 @@ class PdbStats(object):
           List of float coordinates [x,y,z] that represent the
           center of mass (precision: 3).
 
+        centers : `DataFrame` (if `by` is not `None`).
+          One row per group in file order with the group key columns
+          (e.g., `chain`, `resnum`, `resname`), `n_atoms`, and `x`, `y`, `z`
+          (precision: 3).
+
         """
-        center = [None, None, None]
+        tab = self.atom_table
+        if by is not None:
+            return self._group_centers(by, protein=protein, ligand=ligand)
 
-        # define input pdb data
-        if protein and ligand:
-            pdb_data = self.atom + self.hetatm
-        elif protein:
-            pdb_data = self.atom
-        elif ligand:
-            pdb_data = self.hetatm
-        else:
-            pdb_data = None
-        if not pdb_data:
+        center = [None, None, None]
+        mask = tab.select(protein=protein, ligand=ligand)
+        if not mask.any():
             return center
 
-        # extract coordinates [ [x1,y1,z1], [x2,y2,z2], ... ]
-        coordinates = []
-        masses = []
-        for line in pdb_data:
-            coordinates.append([float(line[30:38]),    # x_coord
-                                float(line[38:46]),    # y_coord
-                                float(line[46:54])     # z_coord
-                               ])
-            element_name = line[76:78].strip()
-            masses.append(ATOMIC_WEIGHTS[element_name])
-
-        assert len(coordinates) == len(masses)
-
         # calculate relative weight of every atomic mass
-        total_mass = sum(masses)
-        weights = [float(atom_mass/total_mass) for atom_mass in masses]
+        masses = _atom_masses(tab, np.flatnonzero(mask))
+        weights = masses / masses.sum()
 
         # calculate center of mass
-        center = [sum([coordinates[i][j] * weights[i]
-              for i in range(len(weights))]) for j in range(3)]
-        center_rounded = [round(center[i], 3) for i in range(3)]
+        center = (tab.coords[mask] * weights[:, np.newaxis]).sum(axis=0)
+        center_rounded = [round(float(center[i]), 3) for i in range(3)]
         return center_rounded
 
+    def _group_rows(self, by, protein=True, ligand=False, mask=None):
+        """
+        Selected rows of `.atom_table` and their groups, see `AtomTable.group`.
+        `by='ligand'` groups the HETATM residues without water molecules,
+        `by=None` puts all selected rows into a single group (no key columns).
+        A boolean `mask` replaces the `protein` and `ligand` selection.
+
+        """
+        tab = self.atom_table
+        if by == 'ligand':
+            mask = tab.is_hetatm & ~tab.isin('resname', WATER_NAMES)
+            by = 'residue'
+        elif mask is None:
+            mask = tab.select(protein=protein, ligand=ligand)
+
+        if by is None:
+            rows = np.flatnonzero(mask)
+            group_idx = np.zeros(rows.shape[0], dtype=np.intp)
+            return rows, group_idx, dict(), min(1, rows.shape[0])
+        rows, group_idx, keys = tab.group(by, mask)
+        n_groups = len(next(iter(keys.values())))
+        return rows, group_idx, keys, n_groups
+
+    def _group_centers(self, by, protein=True, ligand=False):
+        """ Centers of mass of all groups as a `DataFrame`, see `center_of_mass`. """
+        tab = self.atom_table
+        rows, group_idx, keys, n_groups = self._group_rows(by, protein=protein, ligand=ligand)
+        masses = _atom_masses(tab, rows)
+        total = np.bincount(group_idx, weights=masses, minlength=n_groups)
+        centers = np.column_stack([np.bincount(group_idx, weights=masses * tab.coords[rows, i],
+                                               minlength=n_groups) for i in range(3)])
+        centers = centers / total[:, np.newaxis]
+
+        df = pd.DataFrame(keys)
+        df['n_atoms'] = np.bincount(group_idx, minlength=n_groups)
+        for i, axis in enumerate(('x', 'y', 'z')):
+            df[axis] = centers[:, i].round(3)
+        return df
+
+    def group_stats(self, by='residue', fields=('bfactor', 'occupancy', 'x', 'y', 'z'),
+                    protein=True, ligand=False, mask=None):
+        """
+        Calculates the mean, median, standard deviation, and standard error
+        of atom values for all groups (e.g., residues or chains) at once.
+
+        Parameters
+        ----------
+
+        by : `str`, `list`, or `None` (default: `'residue'`).
+          `'chain'`, `'residue'`, `'ligand'`, or a `list` of columns as in
+          `center_of_mass`. If `None`, all selected atoms form a single group.
+
+        fields : `list` (default: `('bfactor', 'occupancy', 'x', 'y', 'z')`).
+          Values to summarize, see `STAT_FIELDS`.
+
+        protein : `bool`.
+          If `True`, includes ATOM entries in calculation.
+
+        ligand : `bool`.
+          If `True`, includes HETATM entries in calculation.
+
+        mask : `ndarray` or `None` (default: `None`).
+          Boolean mask over the rows of `.atom_table` for an arbitrary
+          selection of atoms, e.g., `.atom_table.is_calpha`; replaces
+          `protein` and `ligand`.
+
+        Returns
+        ----------
+
+        stats : `DataFrame`.
+          One row per group and field (groups in file order) with the group
+          key columns, `field`, `n_atoms`, `mean`, `median`, `std_dev`, and
+          `std_err` (precision: 3). The standard deviation uses Bessel's
+          correction for groups of more than 2 atoms, as `statsbasic.std_dev`.
+
+        """
+        fields = [fields] if isinstance(fields, str) else list(fields)
+        for field in fields:
+            if field not in STAT_FIELDS:
+                raise ValueError('Invalid field %r. Field not in %s' % (field, tuple(STAT_FIELDS)))
+
+        tab = self.atom_table
+        rows, group_idx, keys, n_groups = self._group_rows(by, protein=protein,
+                                                           ligand=ligand, mask=mask)
+        values = np.empty((rows.shape[0], len(fields)))
+        for j, field in enumerate(fields):
+            attr, col = STAT_FIELDS[field]
+            ary = getattr(tab, attr)
+            values[:, j] = ary[rows] if col is None else ary[rows, col]
+
+        if n_groups:
+            counts, stats = _grouped_stats(values, group_idx, n_groups)
+        else:
+            counts = np.empty(0, dtype=np.intp)
+            stats = dict((name, np.empty((0, len(fields)))) for name in STATS)
+
+        df = pd.DataFrame(dict((key, np.repeat(values_, len(fields)))
+                               for key, values_ in keys.items()))
+        df['field'] = np.tile(np.array(fields, dtype=object), n_groups)
+        df['n_atoms'] = np.repeat(counts, len(fields))
+        for name in STATS:
+            df[name] = stats[name].ravel().round(3)
+        return df
+
 
     def get_bfactors(self, protein=True, ligand=False, atoms='all'):
         """
@@ -232,16 +462,17 @@ class PdbStats(object):
         if atoms not in ('all', 'mainchain', 'calpha'):
             raise ValueError('Invalid argument. Argument not in ("all", "mainchain", "calpha"')
         
-        bfactors = []
+        tab = self.atom_table
         if atoms == 'mainchain':
-            bfactors += [float(line[60:66].strip()) for line in self.mainchain]
+            bfactors = tab.bfactor[tab.is_mainchain].tolist()
         elif atoms == 'calpha':
-           bfactors += [float(line[60:66].strip()) for line in self.calpha]
+            bfactors = tab.bfactor[tab.is_calpha].tolist()
         else:
+            bfactors = []
             if protein:
-                bfactors += [float(line[60:66].strip()) for line in self.atom]
+                bfactors += tab.bfactor[tab.is_atom].tolist()
             if ligand:
-                bfactors += [float(line[60:66].strip()) for line in self.hetatm]
+                bfactors += tab.bfactor[tab.is_hetatm].tolist()
         return bfactors
 
 
@@ -271,18 +502,28 @@ class PdbStats(object):
           B-factor statistics as a `float`. 
 
         """
-        if atoms not in ('all', 'mainchain', 'calpha'):
-            raise ValueError('Invalid argument. Argument not in ("all", "mainchain", "calpha"')
-        
-        if atoms != 'all':
-            bf_stat = func(self.get_bfactors(protein=True, ligand=False, atoms=atoms))
-        else:
-            bf_stat = func(self.get_bfactors(protein=protein, ligand=ligand, atoms=atoms))
+        bf_stat = func(self.atom_table.bfactor[self._bfactor_mask(protein=protein, ligand=ligand,
+                                                                  atoms=atoms)])
         bf_stat = round(bf_stat,3)
         return bf_stat        
         
 
-    def bfactor_stats(self, protein=True, ligand=False, atoms='all'):
+    def _bfactor_mask(self, protein=True, ligand=False, atoms='all'):
+        """ Boolean mask of the `.atom_table` rows selected by `get_bfactors`. """
+        if atoms not in ('all', 'mainchain', 'calpha'):
+            raise ValueError('Invalid argument. Argument not in ("all", "mainchain", "calpha"')
+
+        tab = self.atom_table
+        if atoms == 'mainchain':
+            mask = tab.is_mainchain
+        elif atoms == 'calpha':
+            mask = tab.is_calpha
+        else:
+            mask = tab.select(protein=protein, ligand=ligand)
+        return mask
+
+
+    def bfactor_stats(self, protein=True, ligand=False, atoms='all', by=None):
         """
         Calculates the b-factor (temperature factor) value statistics
 
@@ -300,6 +541,10 @@ class PdbStats(object):
           `"all"`: Includes all atoms in the RMSD calculation.
           `"mainchain"`: Only considers protein mainchain atoms (N, CA, O, C).
           `"calpha"`: Compares only C-alpha protein atoms.  
+
+        by : `str`, `list`, or `None` (default: `None`).
+          If not `None`, calculates the statistics of every chain or
+          residue at once, see `group_stats`.
         
         Returns
         ----------
@@ -307,12 +552,22 @@ class PdbStats(object):
         bf_stats : `tuple` = `[median, mean, std_dev, std_err]`.
           A list of median, mean, standard deviation, and standard error of the B-factors.
 
+        bf_stats : `DataFrame` (if `by` is not `None`).
+          One row per group, see `group_stats`.
+
         """
-        bf_med = self.bfactor_median(protein=protein, ligand=ligand, atoms=atoms)   
-        bf_mean = self.bfactor_mean(protein=protein, ligand=ligand, atoms=atoms)
-        bf_std = self.bfactor_std_dev(protein=protein, ligand=ligand, atoms=atoms)
-        bf_ser = self.bfactor_std_err(protein=protein, ligand=ligand, atoms=atoms)
-        bf_stats = (bf_med, bf_mean, bf_std, bf_ser)
+        mask = self._bfactor_mask(protein=protein, ligand=ligand, atoms=atoms)
+        if by is not None:
+            return self.group_stats(by=by, fields='bfactor', mask=mask)
+
+        # one array for all four statistics
+        bfactors = self.atom_table.bfactor[mask]
+        if not bfactors.shape[0]:
+            return (None, None, None, None)
+        _, stats = _grouped_stats(bfactors[:, np.newaxis],
+                                  np.zeros(bfactors.shape[0], dtype=np.intp), 1)
+        bf_stats = tuple(round(float(stats[name][0, 0]), 3)
+                         for name in ('median', 'mean', 'std_dev', 'std_err'))
         return bf_stats
 
 
@@ -0,0 +1,577 @@
+"""
+Columnar NumPy representation of the coordinate section of a PDB file.
+Used by the `Pdb` base class in `pdbmain` as `Pdb.atom_table`.
+"""
+
+import hashlib
+import json
+import math
+import mmap
+import os
+import tempfile
+import numpy as np
+
+
+# fixed-width columns of ATOM/HETATM/TER records: [name, start, stop]
+TABLE_COLUMNS = [['record', 0, 6],
+                 ['serial', 6, 11],
+                 ['atomname', 12, 16],
+                 ['resname', 17, 20],
+                 ['chain', 21, 22],
+                 ['resnum', 22, 26],
+                 ['xcoord', 30, 38],
+                 ['ycoord', 38, 46],
+                 ['zcoord', 46, 54],
+                 ['occupancy', 54, 60],
+                 ['bfactor', 60, 66],
+                 ['element', 76, 78]]
+
+TABLE_DTYPE = np.dtype({'names': [c[0] for c in TABLE_COLUMNS],
+                        'formats': ['S%d' % (c[2] - c[1]) for c in TABLE_COLUMNS],
+                        'offsets': [c[1] for c in TABLE_COLUMNS],
+                        'itemsize': 80})
+
+# string columns that are stored as integer codes into `AtomTable.categories`
+CATEGORICAL = ('atomname', 'resname', 'chain', 'element')
+
+# columns that identify the groups of `AtomTable.group`
+GROUP_FIELDS = {'chain': ['chain'],
+                'residue': ['chain', 'resnum', 'resname'],
+                'atomname': ['atomname'],
+                'resname': ['resname'],
+                'element': ['element']}
+
+# residue names of water molecules
+WATER_NAMES = ('HOH', 'WAT', 'DOD', 'H2O')
+
+# serial and residue numbers of empty or invalid (e.g., hybrid-36) fields;
+# never within a selected number range
+MISSING_INT = np.iinfo(np.int64).min
+
+# atom serial number columns of CONECT records
+CONECT_COLUMNS = [[6, 11], [11, 16], [16, 21], [21, 26], [26, 31]]
+
+# arrays of an `AtomTable` that `AtomTable.save` writes
+TABLE_ARRAYS = ('line_idx', 'coords', 'serial', 'resnum', 'occupancy', 'bfactor',
+                'atomname', 'resname', 'chain', 'element', 'is_atom', 'is_hetatm',
+                'is_ter', 'is_mainchain', 'is_calpha', 'conect')
+
+# binary table files: magic bytes, little-endian header length, JSON header,
+# and the raw arrays, each starting at a multiple of `TABLE_ALIGN` bytes
+TABLE_MAGIC = b'PYPROT-ATOMTAB1\n'
+TABLE_ALIGN = 64
+TABLE_EXT = '.atab'
+
+
+def _to_float(col):
+    """ Casts a stripped `S` array to `float64`, empty or invalid fields become `nan`. """
+    col = np.where(col == b'', b'nan', col)
+    try:
+        return col.astype(np.float64)
+    except ValueError:
+        out = np.empty(col.shape[0], dtype=np.float64)
+        for i, val in enumerate(col.tolist()):
+            try:
+                out[i] = float(val)
+            except ValueError:
+                out[i] = np.nan
+        return out
+
+
+def _to_int(col, fill=MISSING_INT):
+    """ Casts a stripped `S` array to `int64`, empty or invalid fields become `fill`. """
+    col = np.where(col == b'', str(fill).encode(), col)
+    try:
+        return col.astype(np.int64)
+    except ValueError:
+        out = np.full(col.shape[0], fill, dtype=np.int64)
+        for i, val in enumerate(col.tolist()):
+            try:
+                out[i] = int(val)
+            except ValueError:
+                pass
+        return out
+
+
+def _parse_conect(lines):
+    """ Atom serial numbers of CONECT lines as `int64` array, shape `(M, 5)`, `0` if missing. """
+    conect = np.zeros((len(lines), len(CONECT_COLUMNS)), dtype=np.int64)
+    if not lines:
+        return conect
+    buf = ''.join([line[:31].ljust(31) for line in lines]).encode('latin-1', 'replace')
+    chars = np.frombuffer(buf, dtype='S1').reshape(-1, 31)
+    for j, (start, stop) in enumerate(CONECT_COLUMNS):
+        field = np.ascontiguousarray(chars[:, start:stop]).view('S%d' % (stop - start)).ravel()
+        conect[:, j] = _to_int(np.char.strip(field), fill=0)
+    return conect
+
+
+def _source_info(source, sha1=True):
+    """ Modification time, size, and (optional) SHA-1 of a source file. """
+    st = os.stat(source)
+    info = {'path': os.path.abspath(source), 'mtime_ns': st.st_mtime_ns,
+            'size': st.st_size, 'sha1': None}
+    if sha1:
+        info['sha1'] = _sha1(source)
+    return info
+
+
+def _sha1(path):
+    digest = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _read_table(path, use_mmap=True):
+    """ Header `dict` and arrays of a binary table file, see `AtomTable.save`. """
+    with open(path, 'rb') as f:
+        if use_mmap:
+            buf = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        else:
+            buf = f.read()
+    n_magic = len(TABLE_MAGIC)
+    if buf[:n_magic] != TABLE_MAGIC:
+        raise ValueError('%s is not an atom table file' % path)
+    n_header = int.from_bytes(buf[n_magic:n_magic + 8], 'little')
+    header = json.loads(bytes(buf[n_magic + 8:n_magic + 8 + n_header]).decode('utf-8'))
+
+    arrays = dict()
+    for name, (dtype, shape, offset) in header['arrays'].items():
+        dtype = np.dtype(dtype)
+        count = math.prod(shape)
+        if count:
+            ary = np.frombuffer(buf, dtype=dtype, count=count, offset=offset)
+        else:
+            ary = np.empty(0, dtype=dtype)
+        arrays[name] = ary.reshape(shape)
+    return header, arrays
+
+
+class AtomTable(object):
+    """
+    ATOM, HETATM, and TER records of a PDB file as columnar NumPy arrays,
+    parsed once from the fixed-width columns. Rows are in file order.
+
+    Attributes
+    ----------
+
+    line_idx : `ndarray`, shape `(N,)`.
+      Index of each row into the `Pdb.cont` line list.
+
+    coords : `ndarray`, shape `(N, 3)`.
+      x, y, z coordinates as `float64` (`nan` for TER records).
+
+    serial, resnum : `ndarray`, shape `(N,)`.
+      Atom serial and residue numbers as `int64` (`MISSING_INT` for
+      empty or invalid fields).
+
+    occupancy, bfactor : `ndarray`, shape `(N,)`.
+      Occupancy and b-factor as `float64`.
+
+    atomname, resname, chain, element : `ndarray`, shape `(N,)`.
+      Integer codes into the sorted `categories[field]` string arrays.
+
+    is_atom, is_hetatm, is_ter, is_mainchain, is_calpha : `ndarray`, shape `(N,)`.
+      Boolean record type masks.
+
+    conect : `ndarray`, shape `(M, 5)`.
+      Atom serial numbers of the CONECT records (atom, then up to 4 bonded
+      atoms, `0` if missing).
+
+    """
+
+    def __init__(self, cont, line_idx, mainchain_idx=None, calpha_idx=None, conect_idx=None):
+        """
+        Parameters
+        ----------
+
+        cont : `list`.
+          PDB file contents where every list item is a `str` line.
+
+        line_idx : `ndarray`.
+          Sorted indices of the ATOM, HETATM, and TER lines in `cont`.
+
+        mainchain_idx, calpha_idx, conect_idx : `ndarray` or `None`.
+          Indices of the main chain, C-alpha, and CONECT lines in `cont`,
+          see `Pdb.record_idx`.
+
+        """
+        self.line_idx = np.asarray(line_idx, dtype=np.intp)
+        lines = [cont[i] for i in self.line_idx.tolist()]
+        buf = ''.join([line[:80].ljust(80) for line in lines])
+        ary = np.frombuffer(buf.encode('latin-1', 'replace'), dtype=TABLE_DTYPE)
+
+        record = ary['record']
+        self.is_atom = np.char.startswith(record, b'ATOM')
+        self.is_hetatm = np.char.startswith(record, b'HETATM')
+        self.is_ter = np.char.startswith(record, b'TER')
+        if mainchain_idx is None:
+            mainchain_idx = np.empty(0, dtype=np.intp)
+        if calpha_idx is None:
+            calpha_idx = np.empty(0, dtype=np.intp)
+        self.is_mainchain = np.isin(self.line_idx, mainchain_idx)
+        self.is_calpha = np.isin(self.line_idx, calpha_idx)
+
+        self.serial = _to_int(np.char.strip(ary['serial']))
+        self.resnum = _to_int(np.char.strip(ary['resnum']))
+        self.coords = np.column_stack([_to_float(np.char.strip(ary[c]))
+                                       for c in ('xcoord', 'ycoord', 'zcoord')])
+        self.occupancy = _to_float(np.char.strip(ary['occupancy']))
+        self.bfactor = _to_float(np.char.strip(ary['bfactor']))
+
+        # only the unique values are decoded to `str`
+        self.categories = dict()
+        for field in CATEGORICAL:
+            cats, codes = np.unique(np.char.strip(ary[field]), return_inverse=True)
+            self.categories[field] = np.char.decode(cats, 'latin-1')
+            setattr(self, field, codes.astype(np.int32))
+
+        if conect_idx is None:
+            conect_idx = np.empty(0, dtype=np.intp)
+        self.conect = _parse_conect([cont[i] for i in np.asarray(conect_idx).tolist()])
+
+    def save(self, dest, source=None):
+        """
+        Writes the table to a binary file (written atomically) that
+        `AtomTable.load` reads back without parsing, via memory mapping.
+
+        Parameters
+        ----------
+
+        dest : `str`.
+          Path of the table file, e.g., `'3eiy.pdb.atab'`.
+
+        source : `str` or `None` (default: `None`).
+          Path of the PDB file the table was parsed from. Its modification
+          time, size, and SHA-1 hash are stored to detect changes, see
+          `load_atom_table`.
+
+        Returns
+        ----------
+
+        dest : `str`.
+
+        """
+        arrays = [(name, np.ascontiguousarray(getattr(self, name))) for name in TABLE_ARRAYS]
+        arrays += [('categories.' + field, np.ascontiguousarray(self.categories[field]))
+                   for field in CATEGORICAL]
+
+        # offsets relative to the start of the data section
+        layout, offset = dict(), 0
+        for name, ary in arrays:
+            layout[name] = [ary.dtype.str, list(ary.shape), offset]
+            offset += -(-ary.nbytes // TABLE_ALIGN) * TABLE_ALIGN
+        header = {'version': 1, 'n_rows': len(self),
+                  'source': _source_info(source) if source else None}
+
+        # the data section starts after the header, which contains its offsets
+        n_fixed, start = len(TABLE_MAGIC) + 8, 0
+        while True:
+            header['arrays'] = dict((name, [dtype, shape, start + offset])
+                                    for name, (dtype, shape, offset) in layout.items())
+            header_bytes = json.dumps(header).encode('utf-8')
+            needed = -(-(n_fixed + len(header_bytes)) // TABLE_ALIGN) * TABLE_ALIGN
+            if needed <= start:
+                break
+            start = needed
+        header_bytes += b' ' * (start - n_fixed - len(header_bytes))
+
+        dirname = os.path.dirname(os.path.abspath(dest))
+        fd, tmp = tempfile.mkstemp(dir=dirname, prefix='.', suffix='.part')
+        try:
+            with os.fdopen(fd, 'wb') as out:
+                out.write(TABLE_MAGIC + len(header_bytes).to_bytes(8, 'little') + header_bytes)
+                for name, ary in arrays:
+                    out.write(ary.tobytes())
+                    out.write(b'\0' * (-ary.nbytes % TABLE_ALIGN))
+            os.replace(tmp, dest)
+        except BaseException:
+            os.remove(tmp)
+            raise
+        return dest
+
+    @classmethod
+    def load(cls, path, mmap=True):
+        """
+        Reads a table that was written by `AtomTable.save`.
+
+        Parameters
+        ----------
+
+        path : `str`.
+          Path of the table file.
+
+        mmap : `bool` (default: `True`).
+          If `True`, the arrays are read-only views on the memory-mapped
+          file, so only the accessed parts are read from disk.
+
+        Returns
+        ----------
+
+        table : `AtomTable`.
+
+        """
+        header, arrays = _read_table(path, use_mmap=mmap)
+        return cls._from_arrays(arrays)
+
+    @classmethod
+    def _from_arrays(cls, arrays):
+        """ `AtomTable` from the `dict` of arrays of `_read_table`. """
+        table = cls.__new__(cls)
+        for name in TABLE_ARRAYS:
+            setattr(table, name, arrays[name])
+        table.categories = dict((field, arrays['categories.' + field]) for field in CATEGORICAL)
+        return table
+
+    def __len__(self):
+        return self.line_idx.shape[0]
+
+    def names(self, field):
+        """
+        Returns the decoded strings of a categorical column.
+
+        Parameters
+        ----------
+
+        field : `str`.
+          One of `'atomname'`, `'resname'`, `'chain'`, or `'element'`.
+
+        Returns
+        ----------
+
+        names : `ndarray`.
+          `str` array of shape `(N,)`.
+
+        """
+        return self.categories[field][getattr(self, field)]
+
+    def isin(self, field, values):
+        """
+        Boolean mask of the rows where a categorical column is in `values`.
+
+        Parameters
+        ----------
+
+        field : `str`.
+          One of `'atomname'`, `'resname'`, `'chain'`, or `'element'`.
+
+        values : iterable of `str`.
+          E.g., `['A', 'B']` for `field='chain'`.
+
+        Returns
+        ----------
+
+        mask : `ndarray`.
+          `bool` array of shape `(N,)`.
+
+        """
+        codes = np.flatnonzero(np.isin(self.categories[field], list(values)))
+        return np.isin(getattr(self, field), codes)
+
+    def select(self, protein=True, ligand=False):
+        """
+        Boolean mask of the ATOM (`protein`) and/or HETATM (`ligand`) rows.
+
+        """
+        mask = np.zeros(len(self), dtype=bool)
+        if protein:
+            mask |= self.is_atom
+        if ligand:
+            mask |= self.is_hetatm
+        return mask
+
+    def group(self, by, mask=None):
+        """
+        Assigns the (selected) rows to groups of equal key values, e.g.,
+        residues. Groups are numbered in order of their first row.
+
+        Parameters
+        ----------
+
+        by : `str` or `list`.
+          `'chain'`, `'residue'` (chain, residue number, and residue name),
+          `'atomname'`, `'resname'`, `'element'`, or a `list` of the
+          columns `'chain'`, `'resnum'`, `'resname'`, `'atomname'`,
+          `'element'`, and `'serial'`.
+
+        mask : `ndarray` or `None` (default: `None`).
+          Boolean mask of the rows to group, all rows if `None`.
+
+        Returns
+        ----------
+
+        rows, group_idx : `ndarray`, `ndarray`.
+          Indices of the selected rows and their group numbers.
+
+        keys : `dict`.
+          Column name -> `ndarray` of the key values of every group
+          (decoded `str` for categorical columns).
+
+        """
+        fields = GROUP_FIELDS[by] if isinstance(by, str) else list(by)
+        if mask is None:
+            rows = np.arange(len(self))
+        else:
+            rows = np.flatnonzero(mask)
+        if not rows.shape[0]:
+            keys = dict((f, self.categories[f][:0] if f in CATEGORICAL else np.empty(0, np.int64))
+                        for f in fields)
+            return rows, np.empty(0, dtype=np.intp), keys
+
+        key_ary = np.column_stack([getattr(self, f)[rows].astype(np.int64) for f in fields])
+        uniq, first, inverse = np.unique(key_ary, axis=0, return_index=True, return_inverse=True)
+        order = np.argsort(first, kind='stable')
+        rank = np.empty_like(order)
+        rank[order] = np.arange(order.shape[0])
+        group_idx = rank[inverse.ravel()]
+
+        keys = dict()
+        for i, field in enumerate(fields):
+            values = uniq[order, i]
+            if field in CATEGORICAL:
+                values = self.categories[field][values]
+            keys[field] = values
+        return rows, group_idx, keys
+
+
+def table_cache_valid(cache_file, source, check='mtime'):
+    """
+    Checks if a table file written by `AtomTable.save` is up to date.
+
+    Parameters
+    ----------
+
+    cache_file : `str`.
+      Path of the table file.
+
+    source : `str`.
+      Path of the PDB file. If it does not exist, the table is valid.
+
+    check : `str` or `None` (default: `'mtime'`).
+      `'mtime'`: the modification time and size of `source` must match.
+      `'hash'`: the SHA-1 hash of `source` must match (only computed
+      if the modification time or size changed).
+      `None`: every existing table file is valid.
+
+    Returns
+    ----------
+
+    valid : `bool`.
+
+    """
+    try:
+        header, _ = _read_table(cache_file)
+    except (OSError, ValueError):
+        return False
+    return _source_unchanged(header, source, check)
+
+
+def _source_unchanged(header, source, check='mtime'):
+    """ Compares a source file to the `source` entry of a table header, see `table_cache_valid`. """
+    _check_mode(check)
+    if check is None or not os.path.exists(source):
+        return True
+    stored = header.get('source')
+    if not stored:
+        return False
+    info = _source_info(source, sha1=False)
+    if info['mtime_ns'] == stored['mtime_ns'] and info['size'] == stored['size']:
+        return True
+    return check == 'hash' and info['size'] == stored['size'] and _sha1(source) == stored['sha1']
+
+
+def _check_mode(check):
+    if check not in ('mtime', 'hash', None):
+        raise ValueError('check must be mtime, hash, or None')
+
+
+def _rewrite_header(path, header):
+    """ Rewrites the JSON header of a table file in place; `False` if it does not fit. """
+    header_bytes = json.dumps(header).encode('utf-8')
+    with open(path, 'r+b') as f:
+        f.seek(len(TABLE_MAGIC))
+        n_header = int.from_bytes(f.read(8), 'little')
+        if len(header_bytes) > n_header:
+            return False
+        f.write(header_bytes + b' ' * (n_header - len(header_bytes)))
+    return True
+
+
+def _cached_table(pdb_file, cache_file, check='mtime', mmap=True):
+    """ `AtomTable` of an up-to-date table file, `None` if it is missing or outdated. """
+    if not os.path.exists(cache_file):
+        return None
+    try:
+        header, arrays = _read_table(cache_file, use_mmap=mmap)
+    except (OSError, ValueError):
+        # unreadable or truncated table files are replaced
+        return None
+    if not _source_unchanged(header, pdb_file, check=check):
+        return None
+    table = AtomTable._from_arrays(arrays)
+
+    stored = header.get('source')
+    if check == 'hash' and stored and os.path.exists(pdb_file):
+        # the content matched, so the new modification time is stored to
+        # skip hashing the unchanged (e.g., touched) source next time
+        info = _source_info(pdb_file, sha1=False)
+        if info['mtime_ns'] != stored['mtime_ns']:
+            stored['mtime_ns'] = info['mtime_ns']
+            try:
+                if not _rewrite_header(cache_file, header):
+                    table.save(cache_file, source=pdb_file)
+            except OSError:
+                pass
+    return table
+
+
+def _save_table(table, cache_file, pdb_file):
+    """ Writes a table file, ignoring a read-only cache location. """
+    try:
+        table.save(cache_file, source=pdb_file)
+    except OSError:
+        # a read-only cache location must not fail the parsing
+        pass
+
+
+def load_atom_table(pdb_file, cache_file=None, check='mtime', mmap=True):
+    """
+    Returns the `AtomTable` of a PDB file from its binary table file, or
+    parses the PDB file and writes the table file if it is missing or
+    outdated. To get a `Pdb` object that uses the table file, see
+    `Pdb.from_table`.
+
+    Parameters
+    ----------
+
+    pdb_file : `str`.
+      Path of a (compressed) PDB file.
+
+    cache_file : `str` or `None` (default: `None`).
+      Path of the table file; `<pdb_file>.atab` if `None`.
+
+    check : `str` or `None` (default: `'mtime'`).
+      How changes of `pdb_file` are detected, see `table_cache_valid`.
+      With `'hash'`, the modification time of an unchanged (e.g., touched)
+      `pdb_file` is updated in the table file, so it is hashed only once.
+
+    mmap : `bool` (default: `True`).
+      If `True`, the arrays are memory-mapped, see `AtomTable.load`.
+
+    Returns
+    ----------
+
+    table : `AtomTable`.
+
+    """
+    if cache_file is None:
+        cache_file = pdb_file + TABLE_EXT
+    _check_mode(check)
+    table = _cached_table(pdb_file, cache_file, check=check, mmap=mmap)
+    if table is None:
+        from .pdbmain import Pdb
+        table = Pdb(pdb_file).atom_table
+        _save_table(table, cache_file, pdb_file)
+    return table
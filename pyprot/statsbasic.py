@@ -2,6 +2,8 @@
 Functions for basic statistics.
 """
 
+import numpy as np
+
 
 def mode(data_list, print_out=False):
     """
@@ -42,6 +44,23 @@ def mode(data_list, print_out=False):
     return mode
 
 
+def _as_array(data_list):
+    """ `list` or `ndarray` of numbers as a flat `float64` array. """
+    return np.asarray(data_list, dtype=np.float64).ravel()
+
+
+def _select(ary, ranks):
+    """ Values at the given ranks of the sorted `ary` (partial sort only). """
+    return np.partition(ary, ranks)[ranks]
+
+
+def _half_ranks(length, upper=False):
+    """ Ranks of the 1 or 2 middle values of the lower (or upper) half, see `quartile1`. """
+    half = length // 2
+    offset = length - half if upper else 0
+    return [offset + (half - 1) // 2, offset + half // 2]
+
+
 def mean(data_list):
     """ 
     Returns the sample mean of numbers in a list. 
@@ -49,22 +68,20 @@ def mean(data_list):
     Parameters
     ----------
 
-    data_list : `list`.
+    data_list : `list` or `ndarray`.
       List of numeric items (`int` or `float`).
 
     Returns
     ----------
     
     sample_mean : `float`.  
-      Sample mean as `float`.
+      Sample mean as `float` (`None` for empty data).
     
     """
-    if not data_list:
+    ary = _as_array(data_list)
+    if not ary.shape[0]:
         return None
-    total = 0
-    for ele in data_list:
-        total += ele
-    sample_mean = float(total)/len(data_list)
+    sample_mean = float(ary.mean())
     return sample_mean
 
 
@@ -75,103 +92,107 @@ def median(data_list):
     Parameters
     ----------
 
-    data_list : `list`.
+    data_list : `list` or `ndarray`.
       List of numeric items (`int` or `float`).
 
     Returns
     ----------
     
     sample_median : `float`.  
-      Sample median as `float`.
+      Sample median as `float` (`None` for empty data).
     
     """
-    if not data_list:
+    ary = _as_array(data_list)
+    length = ary.shape[0]
+    if not length:
         return None
-    sorted_data = sorted(data_list)
-    length = len(sorted_data)
-    med_val = 0
-    if length % 2 != 0:
-        index = int((length - 1) / 2)
-        med_val = sorted_data[index]
-    else:
-        index_1 = int(length / 2)
-        index_2 = index_1 - 1
-        med_val = (sorted_data[index_1] + sorted_data[index_2]) / 2.0
+    med_val = float(_select(ary, [(length - 1) // 2, length // 2]).mean())
     return med_val
 
 
 def quartile1(data_list):
     """ 
-    Returns the first quartile of numbers in a list. 
+    Returns the first quartile of numbers in a list: the median of
+    the lower half of the sorted data (without the median for an odd
+    number of values).
     
     Parameters
     ----------
 
-    data_list : `list`.
+    data_list : `list` or `ndarray`.
       List of numeric items (`int` or `float`).
 
     Returns
     ----------
     
     q1_val : `float`.  
-      First quartile as `float`.
+      First quartile as `float` (`None` for less than 2 values).
     
     """
-    sorted_data = sorted(data_list)
-    length = len(sorted_data)
-    if length % 2 != 0:
-        q1_val = median(sorted_data[0:int((length-1)/2)])
-    else:
-        q1_val = median(sorted_data[0:int((length)/2)])
+    ary = _as_array(data_list)
+    if ary.shape[0] < 2:
+        return None
+    q1_val = float(_select(ary, _half_ranks(ary.shape[0])).mean())
     return q1_val
 
 
 def quartile3(data_list):
     """ 
-    Returns the third quartile of numbers in a list. 
+    Returns the third quartile of numbers in a list: the median of
+    the upper half of the sorted data (without the median for an odd
+    number of values).
     
     Parameters
     ----------
 
-    data_list : `list`.
+    data_list : `list` or `ndarray`.
       List of numeric items (`int` or `float`).
 
     Returns
     ----------
     
     q3_val : `float`.  
-      Third quartile as `float`.
+      Third quartile as `float` (`None` for less than 2 values).
     
     """
-    sorted_data = sorted(data_list)
-    length = len(sorted_data)
-    if length % 2 != 0:
-        q3_val = median(sorted_data[int( (length+1) / 2 ):])
-    else:
-        q3_val = median(sorted_data[int((length) / 2):])
+    ary = _as_array(data_list)
+    if ary.shape[0] < 2:
+        return None
+    q3_val = float(_select(ary, _half_ranks(ary.shape[0], upper=True)).mean())
     return q3_val
 
 
 def iqr(data_list):
     """ 
-    Returns the interquartile range of numbers in a list. 
+    Returns the interquartile range of numbers in a list.
+    Both quartiles are selected in a single partial sort.
     
     Parameters
     ----------
 
-    data_list : `list`.
+    data_list : `list` or `ndarray`.
       List of numeric items (`int` or `float`).
 
     Returns
     ----------
     
     iqr : `float`.  
-      Interquartile range as `float`.
+      Interquartile range as `float` (`None` for less than 2 values).
     
     """
-    q1 = quartile1(data_list)
-    q3 = quartile3(data_list)
-    return q3 - q1
+    ary = _as_array(data_list)
+    length = ary.shape[0]
+    if length < 2:
+        return None
+    q1_q3 = _select(ary, _half_ranks(length) + _half_ranks(length, upper=True))
+    return float(q1_q3[2:].mean() - q1_q3[:2].mean())
+
+
+def _variance(n, sum_sq_dev, population=False):
+    """ Variance from the sum of squared deviations, see `variance`. """
+    if not population and n > 2:
+        return sum_sq_dev / (n - 1)
+    return sum_sq_dev / n
 
 
 def variance(data_list, population=False):
@@ -181,30 +202,30 @@ def variance(data_list, population=False):
     Parameters
     ----------
 
-    data_list : `list`.
+    data_list : `list` or `ndarray`.
       List of numeric items (`int` or `float`).
       
     population : `bool` (default=`False`)..
       If False, calculates the sample variance
       with Bessel's correction (n - 1) to account for higher
       variability in sample distribution TO ESTIMATE the true population
-      variance.
+      variance (for more than 2 values).
 
     Returns
     ----------
     
     var : `float`.  
-      Sample variance as `float`.
+      Sample variance as `float` (`None` for empty data).
     
     """
-    mean_val = sum(data_list) / float(len(data_list))
-    dev = sum([((i - mean_val)**2) for i in data_list])
-    if not population and len(data_list) > 2:
-        var = dev / (len(data_list) - 1)
-    else:
-        var = dev / len(data_list)
+    ary = _as_array(data_list)
+    if not ary.shape[0]:
+        return None
+    dev = float(((ary - ary.mean())**2).sum())
+    var = _variance(ary.shape[0], dev, population)
     return var
 
+
 def std_dev(data_list, population=False):
     """ 
     Calculates the sample standard deviation from a list of data.
@@ -212,23 +233,24 @@ def std_dev(data_list, population=False):
     Parameters
     ----------
 
-    data_list : `list`.
+    data_list : `list` or `ndarray`.
       List of numeric items (`int` or `float`).
       
     population : `bool` (default=`False`).
       If False, calculates the sample standard deviation
-      with Bessel's correction (n - 1) to account for higher
-      variability in sample distribution TO ESTIMATE the true population
-      standard deviation.
+      with Bessel's correction (n - 1), see `variance`.
 
     Returns
     ----------
     
     stdev : `float`.  
-      Sample standard deviation as `float`.
+      Sample standard deviation as `float` (`None` for empty data).
     
     """
-    stdev = variance(data_list, population)**0.5
+    var = variance(data_list, population)
+    if var is None:
+        return None
+    stdev = var**0.5
     return stdev
 
 
@@ -239,20 +261,228 @@ def std_err(data_list, population=False):
     Parameters
     ----------
 
-    data_list : `list`.
+    data_list : `list` or `ndarray`.
       List of numeric items (`int` or `float`).
       
     population : `bool` (default=`False`).
       If False, calculates the sample standard error
-      with Bessel's correction (n - 1) to account for higher
-      variability in sample distribution TO ESTIMATE the true population
-      standard error.
+      with Bessel's correction (n - 1), see `variance`.
 
     Returns
     ----------
     
     sterr : `float`.  
-      Sample standard error as `float`.
+      Sample standard error as `float` (`None` for empty data).
     
     """
-    return std_dev(data_list, population)/len(data_list)**0.5
+    stdev = std_dev(data_list, population)
+    if stdev is None:
+        return None
+    return stdev/len(_as_array(data_list))**0.5
+
+
+class RunningStats(object):
+    """
+    Online mean and variance of a stream of numbers (Welford's algorithm),
+    e.g., of the B-factors of many PDB files, without keeping the values
+    in memory. Chunks of values are reduced with NumPy and combined with
+    the parallel update of Chan et al.; two `RunningStats` can be merged,
+    e.g., the results of different processes.
+
+    Parameters
+    ----------
+
+    data_list : `list`, `ndarray`, or `None` (default: `None`).
+      Initial values.
+
+    Attributes
+    ----------
+
+    n : `int`.
+      Number of values seen so far.
+
+    """
+
+    def __init__(self, data_list=None):
+        self.n = 0
+        self._mean = 0.0
+        self._m2 = 0.0
+        if data_list is not None:
+            self.update(data_list)
+
+    def _combine(self, n, chunk_mean, chunk_m2):
+        if not n:
+            return
+        total = self.n + n
+        delta = chunk_mean - self._mean
+        self._mean += delta * n / total
+        self._m2 += chunk_m2 + delta**2 * self.n * n / total
+        self.n = total
+
+    def add(self, value):
+        """ Adds a single value. """
+        self.n += 1
+        delta = value - self._mean
+        self._mean += delta / self.n
+        self._m2 += delta * (value - self._mean)
+        return self
+
+    def update(self, data_list):
+        """ Adds a chunk of values (`list` or `ndarray`). """
+        ary = _as_array(data_list)
+        if ary.shape[0]:
+            chunk_mean = float(ary.mean())
+            self._combine(ary.shape[0], chunk_mean, float(((ary - chunk_mean)**2).sum()))
+        return self
+
+    def merge(self, other):
+        """ Adds all values seen by another `RunningStats` object. """
+        self._combine(other.n, other._mean, other._m2)
+        return self
+
+    def mean(self):
+        """ Mean as `float` (`None` if no values were added), see `statsbasic.mean`. """
+        if not self.n:
+            return None
+        return self._mean
+
+    def variance(self, population=False):
+        """ Variance as `float` (`None` if no values were added), see `statsbasic.variance`. """
+        if not self.n:
+            return None
+        return _variance(self.n, self._m2, population)
+
+    def std_dev(self, population=False):
+        """ Standard deviation as `float`, see `statsbasic.std_dev`. """
+        if not self.n:
+            return None
+        return self.variance(population)**0.5
+
+    def std_err(self, population=False):
+        """ Standard error as `float`, see `statsbasic.std_err`. """
+        if not self.n:
+            return None
+        return self.std_dev(population) / self.n**0.5
+
+
+class QuantileSketch(object):
+    """
+    Mergeable quantile sketch of a stream of numbers with a fixed relative
+    error (logarithmic buckets as in DDSketch). Memory grows with the log
+    of the value range, not with the number of values; sketches of
+    different files or processes can be merged.
+
+    Parameters
+    ----------
+
+    rel_err : `float` (default: `0.01`).
+      Maximum relative error of the returned quantiles.
+
+    data_list : `list`, `ndarray`, or `None` (default: `None`).
+      Initial values.
+
+    Attributes
+    ----------
+
+    n : `int`.
+      Number of values seen so far (`nan` values are ignored).
+
+    """
+
+    # magnitudes below are counted as zero
+    min_value = 1e-9
+
+    def __init__(self, rel_err=0.01, data_list=None):
+        if not 0.0 < rel_err < 1.0:
+            raise ValueError('rel_err must be between 0 and 1')
+        self.rel_err = rel_err
+        self._gamma = (1.0 + rel_err) / (1.0 - rel_err)
+        self._log_gamma = np.log(self._gamma)
+        self.n = 0
+        self._zeros = 0
+        # bucket index -> count for positive and negative values
+        self._pos = dict()
+        self._neg = dict()
+        if data_list is not None:
+            self.update(data_list)
+
+    def _count(self, buckets, ary):
+        keys = np.ceil(np.log(ary) / self._log_gamma).astype(np.int64)
+        uniq, counts = np.unique(keys, return_counts=True)
+        for key, count in zip(uniq.tolist(), counts.tolist()):
+            buckets[key] = buckets.get(key, 0) + count
+
+    def update(self, data_list):
+        """ Adds a chunk of values (`list` or `ndarray`). """
+        ary = _as_array(data_list)
+        ary = ary[~np.isnan(ary)]
+        small = np.abs(ary) < self.min_value
+        self._zeros += int(small.sum())
+        self._count(self._pos, ary[~small & (ary > 0)])
+        self._count(self._neg, -ary[~small & (ary < 0)])
+        self.n += ary.shape[0]
+        return self
+
+    def merge(self, other):
+        """ Adds all values seen by another `QuantileSketch` with the same `rel_err`. """
+        if other.rel_err != self.rel_err:
+            raise ValueError('Cannot merge sketches with different rel_err')
+        for buckets, other_buckets in ((self._pos, other._pos), (self._neg, other._neg)):
+            for key, count in other_buckets.items():
+                buckets[key] = buckets.get(key, 0) + count
+        self._zeros += other._zeros
+        self.n += other.n
+        return self
+
+    def quantile(self, q):
+        """
+        Estimates a quantile of all values seen so far.
+
+        Parameters
+        ----------
+
+        q : `float`.
+          Quantile between 0 and 1, e.g., `0.5` for the median.
+
+        Returns
+        ----------
+
+        value : `float`.
+          Estimated value at rank `q * (n - 1)` in sorted order
+          (`None` if no values were added).
+
+        """
+        if not 0.0 <= q <= 1.0:
+            raise ValueError('q must be between 0 and 1')
+        if not self.n:
+            return None
+        neg_keys = sorted(self._neg, reverse=True)
+        pos_keys = sorted(self._pos)
+        keys = np.array(neg_keys + pos_keys, dtype=np.float64)
+        signs = np.array([-1.0] * len(neg_keys) + [1.0] * len(pos_keys))
+        values = signs * 2.0 * self._gamma**keys / (self._gamma + 1.0)
+        counts = [self._neg[k] for k in neg_keys] + [self._pos[k] for k in pos_keys]
+
+        # zeros sort between the negative and the positive values
+        values = np.insert(values, len(neg_keys), 0.0)
+        counts.insert(len(neg_keys), self._zeros)
+        idx = np.searchsorted(np.cumsum(counts), int(q * (self.n - 1)), side='right')
+        return float(values[idx])
+
+    def median(self):
+        """ Estimated median, see `quantile`. """
+        return self.quantile(0.5)
+
+    def quartile1(self):
+        """ Estimated first quartile, see `quantile`. """
+        return self.quantile(0.25)
+
+    def quartile3(self):
+        """ Estimated third quartile, see `quantile`. """
+        return self.quantile(0.75)
+
+    def iqr(self):
+        """ Estimated interquartile range, see `quantile`. """
+        if not self.n:
+            return None
+        return self.quartile3() - self.quartile1()
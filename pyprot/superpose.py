@@ -0,0 +1,195 @@
+"""
+Functions for the optimal superposition of coordinate sets and the
+Root Mean Square Deviation (RMSD) on NumPy arrays.
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+
+
+def kabsch(mobile, target):
+    """
+    Calculates the rotation that optimally superposes a mobile onto a
+    target coordinate set (Kabsch algorithm).
+
+    Parameters
+    ----------
+
+    mobile : `ndarray`, shape `(N, 3)`.
+      Coordinates to be rotated.
+
+    target : `ndarray`, shape `(N, 3)`.
+      Reference coordinates in the same atom order.
+
+    Returns
+    ----------
+
+    rotation : `ndarray`, shape `(3, 3)`.
+      Proper rotation matrix `R` so that `(mobile - mobile.mean(0)) @ R`
+      is optimally superposed onto `target - target.mean(0)`.
+
+    """
+    mobile = np.asarray(mobile, dtype=np.float64)
+    target = np.asarray(target, dtype=np.float64)
+    cov = (mobile - mobile.mean(axis=0)).T @ (target - target.mean(axis=0))
+    u, s, vt = np.linalg.svd(cov)
+
+    # flip the smallest singular vector to avoid a reflection
+    if np.linalg.det(u @ vt) < 0:
+        u[:, -1] = -u[:, -1]
+    rotation = u @ vt
+    return rotation
+
+
+def superpose(mobile, target):
+    """
+    Superposes a mobile onto a target coordinate set.
+
+    Parameters
+    ----------
+
+    mobile : `ndarray`, shape `(N, 3)`.
+      Coordinates to be moved.
+
+    target : `ndarray`, shape `(N, 3)`.
+      Reference coordinates in the same atom order.
+
+    Returns
+    ----------
+
+    moved : `ndarray`, shape `(N, 3)`.
+      The rotated and translated mobile coordinates.
+
+    """
+    mobile = np.asarray(mobile, dtype=np.float64)
+    target = np.asarray(target, dtype=np.float64)
+    rotation = kabsch(mobile, target)
+    moved = (mobile - mobile.mean(axis=0)) @ rotation + target.mean(axis=0)
+    return moved
+
+
+def rmsd(coords1, coords2, superpose=False):
+    """
+    Calculates the Root Mean Square Deviation (RMSD) between two
+    coordinate sets of the same shape.
+
+    Parameters
+    ----------
+
+    coords1, coords2 : `ndarray`, shape `(N, 3)`.
+      Coordinates in the same atom order.
+
+    superpose : `bool` (default: `False`).
+      If `True`, `coords2` is optimally superposed onto `coords1` (Kabsch)
+      before the RMSD is calculated; else the RMSD is calculated in place.
+
+    Returns
+    ----------
+
+    rmsd : `float`.
+      RMSD value in the units of the coordinates.
+
+    """
+    coords1 = np.asarray(coords1, dtype=np.float64)
+    coords2 = np.asarray(coords2, dtype=np.float64)
+    if superpose and coords1.shape[0]:
+        coords1 = coords1 - coords1.mean(axis=0)
+        coords2 = (coords2 - coords2.mean(axis=0)) @ kabsch(coords2, coords1)
+    ssquared = ((coords1 - coords2)**2).sum()
+    return float(ssquared / coords1.shape[0])**0.5
+
+
+def _rmsd_block(coords, start, stop, superpose):
+    """
+    RMSD values between the structures `start:stop` and `start:K` of a
+    `(K, N, 3)` coordinate stack, as an array of shape `(stop-start, K-start)`.
+
+    """
+    rows, cols = coords[start:stop], coords[start:]
+    n_atoms = coords.shape[1]
+
+    if not superpose:
+        # |a - b|^2 = |a|^2 + |b|^2 - 2 a.b as one matrix product
+        rows, cols = rows.reshape(rows.shape[0], -1), cols.reshape(cols.shape[0], -1)
+        sq_rows, sq_cols = (rows**2).sum(axis=1), (cols**2).sum(axis=1)
+        ssquared = sq_rows[:, np.newaxis] + sq_cols[np.newaxis, :] - 2.0 * (rows @ cols.T)
+    else:
+        # optimal superposition from the singular values of the 3x3 covariances
+        cov = np.matmul(rows.transpose(0, 2, 1)[:, np.newaxis], cols[np.newaxis])
+        sv = np.linalg.svd(cov, compute_uv=False)
+        sv[..., -1] *= np.where(np.linalg.det(cov) < 0, -1.0, 1.0)
+        sq_rows, sq_cols = (rows**2).sum(axis=(1, 2)), (cols**2).sum(axis=(1, 2))
+        ssquared = sq_rows[:, np.newaxis] + sq_cols[np.newaxis, :] - 2.0 * sv.sum(axis=-1)
+
+    return np.sqrt(np.clip(ssquared, 0.0, None) / n_atoms)
+
+
+# coordinate stack of a `rmsd_matrix` worker process
+_SHARED_COORDS = None
+
+
+def _init_worker(coords):
+    global _SHARED_COORDS
+    _SHARED_COORDS = coords
+
+
+def _worker_block(args):
+    start, stop, superpose = args
+    return start, _rmsd_block(_SHARED_COORDS, start, stop, superpose)
+
+
+def rmsd_matrix(coords, superpose=False, chunksize=256, n_jobs=1):
+    """
+    Calculates the RMSD between all pairs of `K` structures with the
+    same `N` atoms in the same order.
+
+    Parameters
+    ----------
+
+    coords : `ndarray`, shape `(K, N, 3)`.
+      Stacked coordinates of the structures.
+
+    superpose : `bool` (default: `False`).
+      If `True`, every pair is optimally superposed (Kabsch) before the
+      RMSD is calculated; else the RMSD is calculated in place.
+
+    chunksize : `int` (default: `256`).
+      Number of structures per block of rows that is computed at once.
+
+    n_jobs : `int` (default: `1`).
+      Number of processes for computing the row blocks.
+
+    Returns
+    ----------
+
+    dist : `ndarray`, shape `(K*(K-1)/2,)`.
+      Condensed distance matrix, i.e., the upper triangle of the `K x K`
+      RMSD matrix in row-major order (as `scipy.spatial.distance.pdist`).
+
+    """
+    coords = np.asarray(coords, dtype=np.float64)
+    n_struct = coords.shape[0]
+    if superpose:
+        coords = coords - coords.mean(axis=1, keepdims=True)
+    else:
+        # common shift, reduces cancellation in the matrix product
+        coords = coords - coords.mean(axis=(0, 1))
+
+    dist = np.empty(n_struct * (n_struct - 1) // 2, dtype=np.float64)
+    blocks = [(start, min(start + chunksize, n_struct), superpose)
+              for start in range(0, n_struct, chunksize)]
+
+    if n_jobs > 1 and len(blocks) > 1:
+        with ProcessPoolExecutor(max_workers=n_jobs, initializer=_init_worker,
+                                 initargs=(coords,)) as pool:
+            results = list(pool.map(_worker_block, blocks))
+    else:
+        results = [(start, _rmsd_block(coords, start, stop, sup))
+                   for start, stop, sup in blocks]
+
+    for start, block in results:
+        for row in range(block.shape[0]):
+            i = start + row
+            offset = n_struct * i - i * (i + 1) // 2
+            dist[offset:offset + n_struct - 1 - i] = block[row, row + 1:]
+    return dist
@@ -13,10 +13,14 @@
 
 
 import argparse
+from functools import partial
 from pyprot.mol2filter import create_chargetype_list
+from pyprot.mol2filter import ChargetypeMatcher
 from pyprot.mol2filter import count_matches
 from pyprot.mol2filter import match_all
-from pyprot.mol2io import split_multimol2
+from pyprot.mol2filter import screen_mol2s
+from pyprot.mol2io import iter_multimol2
+from pyprot.fileio import open_file
 
 parser = argparse.ArgumentParser(
     description='Filter for MOL2 molecules that contain certain functional groups. \n'\
@@ -28,9 +32,13 @@ parser = argparse.ArgumentParser(
     )
 
 parser.add_argument('-i', '--input', type=str, help='MOL2 input file.')
-parser.add_argument('-o', '--output', type=str, help='MOL2 output file for filtered results.')
+parser.add_argument('-o', '--output', type=str, help='MOL2 output file for filtered results.\n'\
+                    '(compressed if it ends with .gz, .bz2, or .xz)')
 parser.add_argument('-c', '--criteria', type=str, help='Query atom and charge ranges e.g., "O.2,-1.2,2;O.3,-20.0,100.0".')
 parser.add_argument('-m', '--matchall', action='store_true', help='If flag is provided, molecule must satisfy all criteria.')
+parser.add_argument('-j', '--jobs', type=int, default=1, help='Number of processes for screening (default: 1).')
+parser.add_argument('-u', '--unordered', action='store_true', help='If flag is provided, matches are written as soon as they are found\n'\
+                    'instead of in input order (with --jobs > 1).')
 
 
 args = parser.parse_args()
@@ -46,16 +54,15 @@ if not args.criteria:
     quit()    
     
 clist = create_chargetype_list(group_charge_pairs=args.criteria, atom_list=None)
-mmol2 = split_multimol2(multimol2=args.input)
+mmol2 = iter_multimol2(multimol2=args.input)
 
 filterfunc = count_matches
 if args.matchall:
     filterfunc = match_all
+filterfunc = partial(filterfunc, chargetype_list=ChargetypeMatcher(clist))
 
-with open(args.output, 'w') as out_file:
-    for m in mmol2:
-        res = filterfunc(mol2_cont=m[1].split('\n'), chargetype_list=clist)
+with open_file(args.output, 'w') as out_file:
+    for m, res in screen_mol2s(mmol2, filterfunc, n_jobs=args.jobs, ordered=not args.unordered):
         if res:
-            for line in m[1]:
-                out_file.write(line)
-            print(m[0])
\ No newline at end of file
+            out_file.write(m[1])
+            print(m[0])
@@ -0,0 +1,70 @@
+#!/usr/bin/env python
+
+# Python PyProt script to filter for MOL2 molecules that contain 2 functional
+# groups within a certain distance range of each other.
+# Takes a single-structure or multi-structure MOL2 file.
+
+
+# run
+# ./mol2_filter_intramol_distance.py -h
+# for help
+#
+
+
+import argparse
+from functools import partial
+from pyprot.mol2filter import create_chargetype_list
+from pyprot.mol2filter import ChargetypeMatcher
+from pyprot.mol2filter import distance_match
+from pyprot.mol2filter import screen_mol2s
+from pyprot.mol2io import iter_multimol2
+from pyprot.fileio import open_file
+
+
+parser = argparse.ArgumentParser(
+    description='Filter for MOL2 molecules that contain 2 functional groups \n'\
+    '(atom types in charge ranges) within a certain distance range of each other.',
+    epilog='Example:\n'\
+            './mol2_filter_intramol_distance.py -i ./my.mol2 -c "O.2,-0.8,-0.5;O.3,-0.9,-0.5" -d "0,4" -o ./filtered.mol2',
+    formatter_class=argparse.RawTextHelpFormatter
+    )
+
+parser.add_argument('-i', '--input', type=str, help='MOL2 input file.')
+parser.add_argument('-o', '--output', type=str, help='MOL2 output file for filtered results.\n'\
+                    '(compressed if it ends with .gz, .bz2, or .xz)')
+parser.add_argument('-c', '--criteria', type=str, help='2 query atoms and charge ranges, e.g., "O.2,-0.8,-0.5;O.3,-0.9,-0.5".')
+parser.add_argument('-d', '--distance', type=str, help='Min. and max. distance allowed between the 2 atoms, e.g., "0,4".')
+parser.add_argument('-j', '--jobs', type=int, default=1, help='Number of processes for screening (default: 1).')
+parser.add_argument('-u', '--unordered', action='store_true', help='If flag is provided, matches are written as soon as they are found\n'\
+                    'instead of in input order (with --jobs > 1).')
+
+
+args = parser.parse_args()
+
+if not args.input:
+    print('Please provide a valid input file. Run ./mol2_filter_intramol_distance.py -h for help.')
+    quit()
+if not args.output:
+    print('Please provide a output file path. Run ./mol2_filter_intramol_distance.py -h for help.')
+    quit()
+if not args.criteria:
+    print('Please provide search criteria. Run ./mol2_filter_intramol_distance.py -h for help.')
+    quit()
+if not args.distance:
+    print('Please provide distance criteria. Run ./mol2_filter_intramol_distance.py -h for help.')
+    quit()
+
+clist = create_chargetype_list(group_charge_pairs=args.criteria, atom_list=None)
+if len(clist) != 2:
+    print('Please provide exactly 2 search criteria. Run ./mol2_filter_intramol_distance.py -h for help.')
+    quit()
+distance = [float(d) for d in args.distance.split(',')]
+
+mmol2 = iter_multimol2(multimol2=args.input)
+filterfunc = partial(distance_match, chargetype_list=ChargetypeMatcher(clist), distance=distance)
+
+with open_file(args.output, 'w') as out_file:
+    for m, res in screen_mol2s(mmol2, filterfunc, n_jobs=args.jobs, ordered=not args.unordered):
+        if res:
+            out_file.write(m[1])
+            print(m[0])
@@ -0,0 +1,38 @@
+#!/usr/bin/env python
+
+# Python PyProt script that writes a byte-offset index of a multi-MOL2 file
+# for random access to molecules by name.
+#
+# run
+# ./mol2_index.py -h
+# for help
+#
+
+
+import argparse
+from pyprot.mol2io import index_multimol2
+
+
+parser = argparse.ArgumentParser(
+    description='Writes a byte-offset index of a multi-MOL2 file (molecule name, offset,\n'\
+    'and length) to a sidecar file. mol2_split.py and the MOL2 filter scripts use the\n'\
+    'index automatically if it is present at the default location.',
+    epilog='Example:\n'\
+            './mol2_index.py -i ./library.mol2\n'\
+            '[writes ./library.mol2.idx]',
+    formatter_class=argparse.RawTextHelpFormatter
+    )
+
+parser.add_argument('-i', '--input', type=str, help='Multi-MOL2 input file.')
+parser.add_argument('-o', '--output', type=str, help='(Optional) Index output file (default: INPUT.idx).')
+
+
+args = parser.parse_args()
+
+
+if not args.input:
+    print('Please provide an input file via the -i flag. Use --help for more information.\n')
+    quit()
+
+index = index_multimol2(args.input, index_file=args.output)
+print('Indexed %d molecules.' % len(index))
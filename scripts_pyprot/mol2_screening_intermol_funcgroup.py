@@ -12,9 +12,13 @@
 
 
 import argparse
-from pyprot.mol2filter import intermol_distance_match
+from functools import partial
+from pyprot.mol2filter import DistanceReference
 from pyprot.mol2filter import create_chargetype_list
+from pyprot.mol2filter import screen_mol2s
 from pyprot.mol2io import split_multimol2
+from pyprot.mol2io import iter_multimol2
+from pyprot.fileio import open_file
 
 
 parser = argparse.ArgumentParser(
@@ -27,10 +31,14 @@ parser = argparse.ArgumentParser(
 
 parser.add_argument('-i1', '--input1', type=str, help='MOL2 input file of the reference molecule.')
 parser.add_argument('-i2', '--input2', type=str, help='MOL2 input file of the query molecules.')
-parser.add_argument('-o', '--output', type=str, help='MOL2 output file for filtered results.')
+parser.add_argument('-o', '--output', type=str, help='MOL2 output file for filtered results.\n'\
+                    '(compressed if it ends with .gz, .bz2, or .xz)')
 parser.add_argument('-c', '--criteria', type=str, help='Query atom and charge ranges, e.g., "O.2,-1.2,2;O.3,-20.0,100.0".')
 parser.add_argument('-d', '--distance', type=str, help='Min. and max. distance allowed between functional groups, e.g., "0,10".')
 parser.add_argument('-m', '--matchall', action='store_true', help='If flag is provided, molecules must satisfy all criteria.')
+parser.add_argument('-j', '--jobs', type=int, default=1, help='Number of processes for screening (default: 1).')
+parser.add_argument('-u', '--unordered', action='store_true', help='If flag is provided, matches are written as soon as they are found\n'\
+                    'instead of in input order (with --jobs > 1).')
 
 
 args = parser.parse_args()
@@ -58,18 +66,15 @@ reference = next(reference)
 ref_cont = reference[1].split('\n')
 ref_name = reference[0]
 
-query = split_multimol2(multimol2=args.input2)
+query = iter_multimol2(multimol2=args.input2)
+distance = [float(d) for d in args.distance.split(',')]
+reference = DistanceReference(ref_cont, clist)
+filterfunc = partial(reference.match_batch, distance=distance)
 
 
-with open(args.output, 'w') as out_file:
-    for q in query:
-        res = intermol_distance_match(
-                    mol2_ref=ref_cont, 
-                    mol2_query=q[1].split('\n'), 
-                    chargetype_list=clist,
-                    distance=[0,5]
-                    )
-
+with open_file(args.output, 'w') as out_file:
+    for q, res in screen_mol2s(query, filterfunc, n_jobs=args.jobs,
+                                 ordered=not args.unordered, batch=True):
       
         print('\n{}--{} | '.format(ref_name, q[0]), end='')
         
@@ -81,7 +86,6 @@ with open(args.output, 'w') as out_file:
                 zeros += 1
         
         if (args.matchall and zeros == 0) or (not args.matchall and zeros > 0):
-            for line in q[1]:
-                out_file.write(line)
+            out_file.write(q[1])
 
-    print()
\ No newline at end of file
+    print()
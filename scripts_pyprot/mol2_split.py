@@ -12,7 +12,8 @@
 import sys
 import os
 import argparse
-from pyprot.mol2io import split_multimol2
+from pyprot.mol2io import iter_multimol2
+from pyprot.fileio import open_file
 
 
 
@@ -23,6 +24,11 @@ parser = argparse.ArgumentParser(
 
 parser.add_argument('-i', '--input', type=str, help='MOL2 input file.')
 parser.add_argument('-o', '--output', type=str, help='Output directory for the individual mol2 files.')
+parser.add_argument('-n', '--names', type=str, help='(Optional) Text file with one molecule name per line;\n'\
+                    'only these molecules are written. Uses the index of the\n'\
+                    'MOL2 file if present (see mol2_index.py).')
+parser.add_argument('-z', '--compress', type=str, choices=['gz', 'bz2', 'xz'],
+                    help='(Optional) Writes compressed mol2 files (*.mol2.gz, ...).')
 
 
 args = parser.parse_args()
@@ -40,12 +46,18 @@ if not args.output:
 if not os.path.exists(args.output):
     os.mkdir(args.output)
 
-single_mol2s = split_multimol2(args.input)
+names = None
+if args.names:
+    with open(args.names, 'r') as names_file:
+        names = [line.strip() for line in names_file if line.strip()]
+
+single_mol2s = iter_multimol2(args.input, molecule_ids=names, output='bytes')
 for mol2 in single_mol2s:
     out_mol2 = os.path.join(args.output, mol2[0]) + '.mol2'
-    with open(out_mol2, 'w') as out_file:
-        for line in mol2[1]:
-            out_file.write(line)
+    if args.compress:
+        out_mol2 += '.' + args.compress
+    with open_file(out_mol2, 'wb') as out_file:
+        out_file.write(mol2[1])
 
 
 
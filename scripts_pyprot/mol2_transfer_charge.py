@@ -3,7 +3,7 @@
 # Sebastian Raschka 2014
 #
 # Python PyProt script that takes a reference MOL2 file as input and transfer its atom charges
-# to a second MOL2 file.
+# to a second (multi-)MOL2 file.
 #
 # run
 # ./mol2_transfer_charge.py -h
@@ -11,12 +11,17 @@
 #
 
 import argparse
-from pyprot.mol2manip import swap_charge
+import sys
+from functools import partial
+from pyprot.mol2manip import ChargeTemplate
+from pyprot.mol2filter import screen_mol2s
 from pyprot.mol2io import split_multimol2
+from pyprot.mol2io import iter_multimol2
+from pyprot.fileio import open_file
 
 parser = argparse.ArgumentParser(
     description='Takes a reference mol2 file as input and applies its charges\n'\
-        'to a second mol2 file',
+        'to every molecule in a second (multi-)mol2 file',
     formatter_class=argparse.RawTextHelpFormatter
     )
 
@@ -33,6 +38,9 @@ parser.add_argument('-t', '--target_column', type=int, default=-1,
         help='Position of the charge'\
         'column in the to-be-fixed molecule.\n-1 by default '\
         'for the last column.\nE.g., -2 if charge is in the second last column.')
+parser.add_argument('-j', '--jobs', type=int, default=1, help='Number of processes (default: 1).')
+parser.add_argument('-u', '--unordered', action='store_true', help='If flag is provided, molecules are written as soon as they are processed\n'\
+                    'instead of in input order (with --jobs > 1).')
 
 args = parser.parse_args()
 
@@ -47,25 +55,31 @@ if not args.input2:
 
 
 
-# get mol2 in line list format
+# parse the template charges once
 ref_mol2 = split_multimol2(args.input1)
-ref_mol2 = next(ref_mol2)[1].split('\n')
+template = ChargeTemplate(next(ref_mol2)[1], template_col=args.reference_column)
 
-fix_mol2 = split_multimol2(args.input2)
-fix_mol2 = next(fix_mol2)[1].split('\n')
+fix_mol2s = iter_multimol2(args.input2)
 
 
+# apply the charge fix to chunks of target molecules,
+# molecules that do not match the template are reported and skipped
+transfer = partial(template.apply_batch, target_col=args.target_column, errors='return')
+results = screen_mol2s(fix_mol2s, transfer, n_jobs=args.jobs,
+                       ordered=not args.unordered, batch=True)
 
-# apply the charge fix
-out_cont = swap_charge(
-        template_mol2=ref_mol2,
-        target_mol2=fix_mol2,
-        template_col=args.reference_column,
-        target_col=args.target_column
-        )
-
-if args.output:
-    with open(args.output, 'w') as out_file:
+skipped = 0
+out_file = open_file(args.output, 'w') if args.output else sys.stdout
+try:
+    for mol2, (out_cont, error) in results:
+        if error is not None:
+            sys.stderr.write('Skipped %s: %s\n' % (mol2[0], error))
+            skipped += 1
+            continue
         out_file.write('\n'.join(out_cont))
-else:
-    print('\n'.join(out_cont))
+finally:
+    if args.output:
+        out_file.close()
+
+if skipped:
+    sys.stderr.write('%d molecule(s) skipped\n' % skipped)
@@ -0,0 +1,97 @@
+#!/usr/bin/env python
+
+# Sebastian Raschka 2014
+#
+# Python PyProt script to apply an operation (B-factor statistics, center of mass, ...)
+# to all PDB files of a directory, glob pattern, or file list and to collect the results
+# in one tab-separated table.
+#
+# run
+# ./pdb_batch.py -h
+# for help
+#
+
+import argparse
+import sys
+from functools import partial
+from pyprot.pdbbatch import find_pdbs, process_pdbs, collect_table, OPERATIONS
+from pyprot.fileio import open_file
+
+parser = argparse.ArgumentParser(
+    description='Applies an operation to many PDB files with a pool of processes\n'\
+                'and writes the results of all files to one tab-separated table.',
+    epilog='Example:\n'\
+            'pdb_batch.py -i ~/pdb_mirror -r -op bfactor_stats -j 8 -o bfactors.tsv\n\n'\
+            'Files that cannot be processed are reported on stderr\n'\
+            '(and in the --errors table) without stopping the run.',
+    formatter_class=argparse.RawTextHelpFormatter
+    )
+
+
+parser.add_argument('-i', '--input', type=str, nargs='+', help='PDB files, directories, or glob patterns\n'\
+                    '(quoted, e.g., "mirror/*/*.pdb.gz").')
+parser.add_argument('-o', '--output', type=str, help='(Optional) Output table (.tsv, compressed if it ends\n'\
+                    'with .gz, .bz2, or .xz). Prints to stdout by default.')
+parser.add_argument('-op', '--operation', type=str, default='summary', choices=sorted(OPERATIONS),
+                    help='Operation per PDB file (default: summary).')
+parser.add_argument('-p', '--protein', action='store_true', help='Includes ATOM entries (default).')
+parser.add_argument('-l', '--ligand', action='store_true', help='Includes HETATM entries.')
+parser.add_argument('-a', '--atoms', type=str, default='all', choices=['all', 'mainchain', 'calpha'],
+                    help='Atoms for bfactor_stats (default: all).')
+parser.add_argument('-g', '--group', type=str, choices=['chain', 'residue', 'ligand'],
+                    help='(Optional) One row per chain, residue, or ligand\n'\
+                    'for center_of_mass and group_stats.')
+parser.add_argument('-r', '--recursive', action='store_true', help='Searches input directories recursively.')
+parser.add_argument('-j', '--jobs', type=int, default=1, help='Number of processes (default: 1).')
+parser.add_argument('-c', '--chunksize', type=int, default=16, help='Number of files per task (default: 16).')
+parser.add_argument('-e', '--errors', type=str, help='(Optional) Table of the files that failed.')
+parser.add_argument('-t', '--table_cache', type=str, choices=['mtime', 'hash'],
+                    help='(Optional) Reloads the parsed atoms from binary table files\n'\
+                    '(<file>.atab, written on the first run) instead of parsing.\n'\
+                    'Changed files are detected by modification time or hash.')
+
+
+args = parser.parse_args()
+
+if not args.input:
+    print('{0}\nPlease provide input files or directories.\n{0}'.format(50* '-'))
+    parser.print_help()
+    quit()
+
+pdb_list = find_pdbs(args.input, recursive=args.recursive)
+if not pdb_list:
+    print('{0}\nPDB list is empty. Please check the input files or directories.\n{0}'.format(50* '-'))
+    parser.print_help()
+    quit()
+
+protein = args.protein or not args.ligand
+ligand = args.ligand
+
+kwargs = {'protein': protein, 'ligand': ligand}
+if args.operation == 'bfactor_stats':
+    kwargs['atoms'] = args.atoms
+elif args.operation == 'center_of_mass':
+    kwargs['by'] = args.group
+elif args.operation == 'group_stats':
+    kwargs['by'] = args.group or 'residue'
+else:
+    kwargs = {}
+func = partial(OPERATIONS[args.operation], **kwargs)
+
+
+def report(path, error):
+    if error is not None:
+        sys.stderr.write('%s: %s\n' % (path, error))
+
+results = process_pdbs(pdb_list, func, n_jobs=args.jobs, chunksize=args.chunksize, callback=report,
+                       table_cache=args.table_cache)
+table, errors = collect_table(results)
+
+if args.output:
+    with open_file(args.output, 'w') as out_file:
+        table.to_csv(out_file, sep='\t', index=False)
+else:
+    print(table.to_csv(sep='\t', index=False), end='')
+
+if args.errors:
+    errors.to_csv(args.errors, sep='\t', index=False)
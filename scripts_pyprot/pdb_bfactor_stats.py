@@ -24,6 +24,9 @@ parser.add_argument('-i', '--input', type=str, help='Input PDB file.')
 parser.add_argument('-p', '--protein', action='store_true', help='includes ATOM residues.')
 parser.add_argument('-l', '--ligand', action='store_true', help='includes HETATM residues.')
 parser.add_argument('-a', '--atoms', type=str, default='all', help='options: all, mainchain, calpha')
+parser.add_argument('-g', '--group', type=str, choices=['chain', 'residue'],
+                    help='(Optional) Prints a tab-separated table with the B-factor\n'\
+                    'statistics of every chain or residue.')
 
 
 args = parser.parse_args()
@@ -53,6 +56,10 @@ if not args.protein and not args.ligand:
 
 in_pdb = pyprot.Pdb(args.input)
 
+if args.group:
+    b_stats = in_pdb.bfactor_stats(protein=protein, ligand=ligand, atoms=args.atoms, by=args.group)
+    print(b_stats.to_csv(sep='\t', index=False), end='')
+    quit()
 
 b_stats = in_pdb.bfactor_stats(protein=protein, ligand=ligand, atoms=args.atoms)
 print('Median B-factor: %s' %round(b_stats[0], 3))
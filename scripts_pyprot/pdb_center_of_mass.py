@@ -30,6 +30,9 @@ parser = argparse.ArgumentParser(
 parser.add_argument('-i', '--input', type=str, help='Input PDB file.')
 parser.add_argument('-p', '--protein', action='store_true', help='Center of mass for atoms in ATOM sections only')
 parser.add_argument('-l', '--ligand', action='store_true', help='Center of mass for atoms in HETATM sections only')
+parser.add_argument('-g', '--group', type=str, choices=['chain', 'residue', 'ligand'],
+                    help='(Optional) Prints a tab-separated table with the center of mass\n'\
+                    'of every chain, residue, or ligand (HETATM residues without water).')
 
 
 args = parser.parse_args()
@@ -42,11 +45,14 @@ if not args.input:
 pdb = pyprot.Pdb(args.input)
 
 
+protein, ligand = True, True
 if args.ligand and not args.protein:
-    print(pdb.center_of_mass(protein=False, ligand=True))
-
+    protein = False
 elif not args.ligand and args.protein:
-    print(pdb.center_of_mass(protein=True, ligand=False))
+    ligand = False
 
+if args.group:
+    centers = pdb.center_of_mass(protein=protein, ligand=ligand, by=args.group)
+    print(centers.to_csv(sep='\t', index=False), end='')
 else:
-    print(pdb.center_of_mass(protein=True, ligand=True))
+    print(pdb.center_of_mass(protein=protein, ligand=ligand))
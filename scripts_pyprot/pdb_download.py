@@ -11,9 +11,11 @@
 #
 
 import argparse
-import pyprot
+import sys
 import os
 import pyprind
+from pyprot.pdbdownload import download_pdbs, RCSB_URL
+from pyprot.pdbcache import get_default_cache
 
 parser = argparse.ArgumentParser(
     description='Autmatically downloads PDB files from the Protein Data Bank (rcsb.org).',
@@ -25,6 +27,20 @@ parser = argparse.ArgumentParser(
 
 parser.add_argument('-i', '--input', type=str, help='Path to a text file with PDB codes.')
 parser.add_argument('-o', '--output', type=str, help='Path of an output directory')
+parser.add_argument('-j', '--jobs', type=int, default=8, help='Number of concurrent downloads (default: 8).')
+parser.add_argument('-r', '--retries', type=int, default=3, help='Number of retries per file after\n'\
+                    'connection errors or server errors (default: 3).')
+parser.add_argument('--overwrite', action='store_true', help='If flag is provided, PDB files that already\n'\
+                    'exist in the output directory are downloaded again.\n'\
+                    'By default, they are skipped, so that an interrupted\n'\
+                    'download can be resumed.')
+parser.add_argument('--url', type=str, default=RCSB_URL, help='URL template where %%s is replaced by the PDB code,\n'\
+                    'e.g., http://localhost:8000/%%s.pdb for a local mirror\n'\
+                    '(default: rcsb.org).')
+parser.add_argument('--no-cache', action='store_true', help='If flag is provided, the local PDB cache\n'\
+                    '(PYPROT_CACHE_DIR, default: ~/.cache/pyprot) is not used.')
+parser.add_argument('--offline', action='store_true', help='If flag is provided, PDB files are only\n'\
+                    'copied from the local PDB cache.')
 
 
 
@@ -59,10 +75,20 @@ if not n:
     parser.print_help()
     quit()    
 
-pbar = pyprind.ProgBar(n)
+cache = None if args.no_cache else get_default_cache()
+if args.offline:
+    if cache is None:
+        print('{0}\n--offline requires the local PDB cache.\n{0}'.format(50* '-'))
+        quit()
+    cache.offline = True
+
+pbar = pyprind.ProgBar(len(set(pdb_list)))
+
+results = download_pdbs(pdb_list, args.output, n_jobs=args.jobs, url_template=args.url,
+                        overwrite=args.overwrite, retries=args.retries, cache=cache,
+                        callback=lambda code, error: pbar.update())
+
+failed = [(code, error) for code, error in results.items() if error is not None]
+for code, error in failed:
+    sys.stderr.write('%s: %s\n' % (code, error))
 
-for pdb in pdb_list:
-    pdb_obj = pyprot.Pdb()
-    pdb_obj.cont = pdb_obj.fetch_rcsb(pdb_code=pdb)
-    pdb_obj.save_pdb(os.path.join(args.output, pdb)+'.pdb')
-    pbar.update()
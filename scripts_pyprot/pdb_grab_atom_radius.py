@@ -15,6 +15,7 @@
 
 import pyprot 
 import argparse
+import os
 
 parser = argparse.ArgumentParser(
     description='Extracts atoms within a radius from a PDB file.\n'\
@@ -37,6 +38,15 @@ parser.add_argument('-c', '--coordinates',
         default='0,0,0',
         help='center for extracting atoms (default "0,0,0")')
 
+parser.add_argument('-f', '--centers',
+        type=str,
+        metavar='centers.txt',
+        help='file with multiple centers, either one "X,Y,Z" per line or a PDB file\n'\
+             'whose ATOM/HETATM coordinates are used as centers (e.g., a ligand)')
+
+parser.add_argument('-s', '--separate', action='store_true',
+        help='with --centers, reports the atoms per center instead of the union')
+
 # optional arguments
 parser.add_argument('-n', '--include', type=str, 
         default='ATOM,HETATM', 
@@ -57,10 +67,35 @@ pdb = pyprot.Pdb(args.input)
 
 
 
-coords = args.coordinates.split(',')
-coords = [float(i) for i in coords]
+def read_centers(path):
+    centers_pdb = pyprot.Pdb(path)
+    tab = centers_pdb.atom_table
+    if tab.select(protein=True, ligand=True).any():
+        return tab.coords[tab.select(protein=True, ligand=True)]
+    centers = []
+    for line in centers_pdb.cont:
+        centers.append([float(i) for i in line.replace(',', ' ').split()])
+    return centers
+
+
+if args.centers:
+    if not os.path.isfile(args.centers):
+        print('Error: File %s not found' % args.centers)
+        quit()
+    centers = read_centers(args.centers)
+    if args.separate:
+        residues = []
+        for center, hits in zip(centers, pdb.grab_radius_multi(args.radius, centers)):
+            residues.append('REMARK center %.3f,%.3f,%.3f' % tuple(center))
+            residues += hits
+    else:
+        residues = pdb.grab_radius_multi(args.radius, centers, union=True)
+
+else:
+    coords = args.coordinates.split(',')
+    coords = [float(i) for i in coords]
 
-residues = pdb.grab_radius(args.radius, coords)    
+    residues = pdb.grab_radius(args.radius, coords)    
 
 if args.out:
     with open(args.out, 'w') as out:
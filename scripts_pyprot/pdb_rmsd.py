@@ -32,6 +32,7 @@ parser.add_argument('-l', '--ligand', action='store_true', help='Calculates RMSD
 parser.add_argument('-c', '--carbon', action='store_true', default=False, help='Calculates the RMSD between carbon atoms only.')
 parser.add_argument('-mc', '--mainchain', action='store_true', default=False, help='Calculates RMSD between protein main chain atoms.')
 parser.add_argument('-ca', '--calpha', action='store_true',  default=False, help='Calculates the RMSD between alpha-carbon atoms only.')
+parser.add_argument('-s', '--superpose', action='store_true', default=False, help='Optimally superposes the target onto the reference (Kabsch) before the RMSD calculation.')
 
 
 args = parser.parse_args()
@@ -60,17 +61,17 @@ if args.carbon and args.calpha:
     quit()
 
 if args.ligand and args.carbon:
-    print(pdb1.rmsd(sec_molecule=pdb2, ligand=True, atoms="c"))
+    print(pdb1.rmsd(sec_molecule=pdb2, ligand=True, atoms="c", superpose=args.superpose))
 elif args.ligand and args.calpha:
-    print(pdb1.rmsd(sec_molecule=pdb2, ligand=True, atoms="ca"))
+    print(pdb1.rmsd(sec_molecule=pdb2, ligand=True, atoms="ca", superpose=args.superpose))
 elif args.ligand:
-    print(pdb1.rmsd(sec_molecule=pdb2, ligand=True, atoms="no_h"))
+    print(pdb1.rmsd(sec_molecule=pdb2, ligand=True, atoms="no_h", superpose=args.superpose))
 elif args.calpha:
-    print(pdb1.rmsd(sec_molecule=pdb2, ligand=False, atoms="ca"))
+    print(pdb1.rmsd(sec_molecule=pdb2, ligand=False, atoms="ca", superpose=args.superpose))
 elif args.carbon:
-    print(pdb1.rmsd(sec_molecule=pdb2, ligand=False, atoms="c"))
+    print(pdb1.rmsd(sec_molecule=pdb2, ligand=False, atoms="c", superpose=args.superpose))
 elif args.mainchain:
-    print(pdb1.rmsd(sec_molecule=pdb2, ligand=False, atoms="mc"))
+    print(pdb1.rmsd(sec_molecule=pdb2, ligand=False, atoms="mc", superpose=args.superpose))
 else:
     print(True)
-    print(pdb1.rmsd(sec_molecule=pdb2, ligand=False, atoms="no_h"))
+    print(pdb1.rmsd(sec_molecule=pdb2, ligand=False, atoms="no_h", superpose=args.superpose))
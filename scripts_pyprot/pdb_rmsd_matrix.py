@@ -0,0 +1,92 @@
+#!/usr/bin/env python
+
+# Python PyProt script to calculate the pairwise RMSD between all
+# structures in a set of PDB files, e.g., ligand conformers or MD frames.
+#
+# run
+# ./pdb_rmsd_matrix.py -h
+# for help
+#
+
+import argparse
+import os
+import numpy as np
+import pyprot
+from pyprot.pdbstats import stack_coords
+from pyprot.superpose import rmsd_matrix
+
+parser = argparse.ArgumentParser(
+    description='Calculates the RMSD between all pairs of PDB structures\n'\
+        'and writes the condensed distance matrix (upper triangle, row by row).\n'\
+        'By default, all atoms but hydrogen atoms of the protein are included in the RMSD calculation.\n'\
+        'NOTE: All structures must contain the same number of atoms in similar order.',
+    epilog='Example:\n'\
+            'pdb_rmsd_matrix.py -i ~/Desktop/conformers/ -l -s -o ~/Desktop/rmsd.txt',
+    formatter_class=argparse.RawTextHelpFormatter
+    )
+
+parser.add_argument('-i', '--input', type=str, nargs='+', help='PDB files or a directory of PDB files.')
+parser.add_argument('-o', '--output', type=str, help='Output file (.txt or .npy). Prints to the screen if not provided.')
+
+parser.add_argument('-l', '--ligand', action='store_true', help='Calculates RMSD between ligand (HETATM) atoms.')
+parser.add_argument('-c', '--carbon', action='store_true', default=False, help='Calculates the RMSD between carbon atoms only.')
+parser.add_argument('-mc', '--mainchain', action='store_true', default=False, help='Calculates RMSD between protein main chain atoms.')
+parser.add_argument('-ca', '--calpha', action='store_true',  default=False, help='Calculates the RMSD between alpha-carbon atoms only.')
+parser.add_argument('-s', '--superpose', action='store_true', default=False, help='Optimally superposes every pair (Kabsch) before the RMSD calculation.')
+parser.add_argument('-j', '--jobs', type=int, default=1, help='Number of processes (default: 1).')
+
+
+args = parser.parse_args()
+
+if not args.input:
+    print('{0}\nPlease provide input PDB files or a directory.\n{0}'.format(50* '-'))
+    parser.print_help()
+    quit()
+
+if args.ligand and args.mainchain:
+    print('--ligand and --mainchain are incompatible options.')
+    parser.print_help()
+    quit()
+
+if args.carbon and args.calpha:
+    print('\nERROR: Please provide EITHER -c OR -ca, not both.\n')
+    parser.print_help()
+    quit()
+
+pdb_list = []
+for path in args.input:
+    if os.path.isdir(path):
+        pdb_list += sorted([os.path.join(path, f) for f in os.listdir(path) if f.endswith('.pdb')])
+    else:
+        pdb_list.append(path)
+
+if len(pdb_list) < 2:
+    print('{0}\nPlease provide at least 2 PDB files.\n{0}'.format(50* '-'))
+    parser.print_help()
+    quit()
+
+atoms = 'no_h'
+if args.carbon:
+    atoms = 'c'
+elif args.calpha:
+    atoms = 'ca'
+elif args.mainchain:
+    atoms = 'mc'
+
+try:
+    coords = stack_coords([pyprot.Pdb(pdb) for pdb in pdb_list], ligand=args.ligand, atoms=atoms)
+except ValueError as e:
+    print('ERROR: %s' % e)
+    quit()
+
+dist = rmsd_matrix(coords, superpose=args.superpose, n_jobs=args.jobs)
+
+if args.output and args.output.endswith('.npy'):
+    np.save(args.output, dist)
+elif args.output:
+    np.savetxt(args.output, dist, fmt='%.4f', header='\n'.join(pdb_list))
+else:
+    for name in pdb_list:
+        print('# %s' % name)
+    for val in dist:
+        print('%.4f' % val)
@@ -22,6 +22,8 @@ parser = argparse.ArgumentParser(
 parser.add_argument('-i', '--input', type=str, help='Input directory.', required=True)
 parser.add_argument('-o', '--output', type=str, help='Output directory.', required=True)
 parser.add_argument('-c', '--conect', action='store_true', help='Writes CONECT records to ligand file.')
+parser.add_argument('-z', '--compress', type=str, choices=['gz', 'bz2', 'xz'],
+                    help='(Optional) Writes compressed PDB files (*.pdb.gz, ...).')
 
 args = parser.parse_args()
 
@@ -37,7 +39,7 @@ for d in (atom_out, hetatm_out):
         os.mkdir(d)
 
 pdb_list = [os.path.join(args.input, pdb) for pdb in os.listdir(args.input)
-            if pdb.endswith('.pdb')]
+            if pdb.endswith(('.pdb', '.pdb.gz', '.pdb.bz2', '.pdb.xz'))]
 
 
 
@@ -58,7 +60,11 @@ for pdb in pdb_list:
     else:
         pdb_hetatm = pyprot.Pdb(pdb_obj.conect)        
 
-    pdb_atom.save_pdb(os.path.join(atom_out, os.path.basename(pdb)))
-    pdb_hetatm.save_pdb(os.path.join(hetatm_out, os.path.basename(pdb)))
+    pdb_name = os.path.basename(pdb)
+    pdb_name = pdb_name[:pdb_name.rindex('.pdb') + 4]
+    if args.compress:
+        pdb_name += '.' + args.compress
+    pdb_atom.save_pdb(os.path.join(atom_out, pdb_name))
+    pdb_hetatm.save_pdb(os.path.join(hetatm_out, pdb_name))
 
 
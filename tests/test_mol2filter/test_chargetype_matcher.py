@@ -0,0 +1,63 @@
+"""
+Unit tests for the ChargetypeMatcher class in mol2filter.py
+
+"""
+
+import numpy as np
+from pyprot.mol2filter import ChargetypeMatcher
+from pyprot.mol2filter import count_matches
+from pyprot.mol2filter import match_all
+from pyprot.mol2filter import _filter_atoms
+from pyprot.mol2io import split_multimol2
+
+mol2file = "./tests/data/mol2s/confs.mol2"
+CLIST = [['O.2', -1.2, 2.0], ['O.3', -0.5, -0.1], ['N.am'], ['O.2', -0.1, 0.0], ['S.o2', -1.0, 1.0]]
+
+def _matching_lines(mol2_cont, chargetype_list):
+    """ ATOM lines once per matching criterion, checked line by line. """
+    matched, in_atoms = [], False
+    for line in mol2_cont:
+        if line.startswith('@<TRIPOS>'):
+            in_atoms = line.startswith('@<TRIPOS>ATOM')
+            continue
+        fields = line.split()
+        if not in_atoms or len(fields) < 9:
+            continue
+        for atom in chargetype_list:
+            if fields[5] == atom[0] and (len(atom) < 3 or atom[1] <= float(fields[8]) <= atom[2]):
+                matched.append(line)
+    return matched
+
+def test_chargetype_matcher():
+    matcher = ChargetypeMatcher(CLIST)
+    assert(len(matcher) == 5)
+    assert(sorted(matcher.type_codes) == ['N.am', 'O.2', 'O.3', 'S.o2'])
+    assert(list(matcher.criterion_type) == [0, 1, 2, 0, 3])
+    assert(list(matcher.max_charge) == [2.0, -0.1, np.inf, 0.0, 1.0])
+    assert(list(matcher.ranged) == [True, True, False, True, True])
+
+    mol2 = next(split_multimol2(mol2file, output='lines'))[1]
+    atom_lines, hits = matcher.match(mol2)
+    assert(len(atom_lines) == 37)
+    assert(hits.shape == (37, 5))
+    assert(list(hits.sum(axis=0)) == [2, 1, 1, 0, 0])
+
+def test_chargetype_matcher_reference():
+    matcher = ChargetypeMatcher(CLIST)
+    for mol2_id, mol2 in split_multimol2(mol2file, output='lines'):
+        assert(_filter_atoms(mol2, matcher) == _matching_lines(mol2, CLIST))
+        assert(count_matches(mol2, matcher) == len(_matching_lines(mol2, CLIST)))
+        assert(match_all(mol2, matcher) == False)
+        assert(match_all(mol2, CLIST[:3]) == match_all(mol2, ChargetypeMatcher(CLIST[:3])))
+
+def test_chargetype_matcher_status_bits():
+    matcher = ChargetypeMatcher(CLIST)
+    mol2 = next(split_multimol2(mol2file, output='lines'))[1]
+    atom_lines, hits = matcher.match(mol2)
+    flagged = [line.rstrip('\n') + ' BACKBONE\n' if line in atom_lines else line
+               for line in mol2]
+    flagged_lines, flagged_hits = matcher.match(flagged)
+    assert(len(flagged_lines) == 37)
+    assert(flagged_lines[0].split()[-1] == 'BACKBONE')
+    assert((flagged_hits == hits).all())
+    assert(count_matches(flagged, matcher) == count_matches(mol2, matcher))
@@ -0,0 +1,55 @@
+"""
+Unit tests for distance_match function in mol2filter.py
+
+"""
+
+from pyprot.mol2filter import distance_match
+from pyprot.mol2filter import mol2_to_coords
+from pyprot.mol2io import split_multimol2
+
+mol2file = "./tests/data/mol2s/confs.mol2"
+
+def _matching_lines(mol2_cont, chargetype_list):
+    """ ATOM lines once per matching criterion, checked line by line. """
+    matched, in_atoms = [], False
+    for line in mol2_cont:
+        if line.startswith('@<TRIPOS>'):
+            in_atoms = line.startswith('@<TRIPOS>ATOM')
+            continue
+        fields = line.split()
+        if not in_atoms or len(fields) < 9:
+            continue
+        for atom in chargetype_list:
+            if fields[5] == atom[0] and (len(atom) < 3 or atom[1] <= float(fields[8]) <= atom[2]):
+                matched.append(line)
+    return matched
+
+def _distance_match_loop(mol2_cont, chargetype_list, distance):
+    atoms1 = _matching_lines(mol2_cont, chargetype_list[:1])
+    atoms2 = _matching_lines(mol2_cont, chargetype_list[1:])
+    for line1 in atoms1:
+        for line2 in atoms2:
+            if line1 == line2:
+                continue
+            xyz1, xyz2 = mol2_to_coords(line1), mol2_to_coords(line2)
+            dist = sum([(j-i)**2 for i,j in zip(xyz1, xyz2)])**0.5
+            if dist >= distance[0] and dist <= distance[1]:
+                return True
+    return False
+
+def test_distance_match():
+    mol2 = next(split_multimol2(mol2file, output='lines'))[1]
+    assert(distance_match(mol2, [['O.2', -1.2, 0.0], ['N.am', -1.0, 0.0]], [0, 4]) == True)
+    assert(distance_match(mol2, [['O.2', -1.2, 0.0], ['N.am', -1.0, 0.0]], 2.0) == False)
+    assert(distance_match(mol2, [['O.2', -1.2, 0.0], ['S.o2']], 100.0) == False)
+    # an atom is never paired with itself
+    assert(distance_match(mol2, [['N.am'], ['N.am']], [0, 100]) == False)
+    assert(distance_match(mol2, [['O.2'], ['O.2']], [0, 100]) == True)
+
+def test_distance_match_reference():
+    clists = [[['O.2', -1.2, 0.0], ['N.am', -1.0, 0.0]], [['C.ar'], ['O.3']], [['O.2'], ['O.2']]]
+    for mol2_id, mol2 in split_multimol2(mol2file, output='lines'):
+        for clist in clists:
+            for distance in ([0, 3.5], [3.0, 6.0], [5.5, 8.0]):
+                assert(distance_match(mol2, clist, distance) ==
+                       _distance_match_loop(mol2, clist, distance))
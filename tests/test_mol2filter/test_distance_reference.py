@@ -0,0 +1,54 @@
+"""
+Unit tests for the DistanceReference class in mol2filter.py
+
+"""
+
+from functools import partial
+import numpy as np
+from pyprot.mol2filter import DistanceReference
+from pyprot.mol2filter import intermol_distance_match
+from pyprot.mol2filter import screen_mol2s
+from pyprot.mol2io import split_multimol2
+
+mol2file = "./tests/data/mol2s/confs.mol2"
+CLIST = [['O.2', -1.0, 0.0], ['N.am', -0.8181, -0.2181], ['C.ar']]
+
+def _atom_coords(mol2_cont, atom):
+    coords, in_atoms = [], False
+    for line in mol2_cont:
+        if line.startswith('@<TRIPOS>'):
+            in_atoms = line.startswith('@<TRIPOS>ATOM')
+            continue
+        fields = line.split()
+        if in_atoms and len(fields) >= 9 and fields[5] == atom[0]:
+            if len(atom) < 3 or atom[1] <= float(fields[8]) <= atom[2]:
+                coords.append([float(f) for f in fields[2:5]])
+    return np.array(coords).reshape(-1, 3)
+
+def _intermol_distance_loop(mol2_ref, mol2_query, chargetype_list, distance):
+    match_dict = dict()
+    for idx, atom in enumerate(chargetype_list):
+        query = _atom_coords(mol2_query, atom)
+        count = 0
+        for xyz in _atom_coords(mol2_ref, atom):
+            dist = np.sqrt(((query - xyz)**2).sum(axis=1))
+            count += int(((dist >= distance[0]) & (dist <= distance[1])).any())
+        match_dict[idx] = [atom, count]
+    return match_dict
+
+def test_distance_reference():
+    mol2s = [m[1] for m in split_multimol2(mol2file, output='lines')][:40]
+    reference = DistanceReference(mol2s[0], CLIST)
+    assert([c.shape for c in reference.coords] == [(2, 3), (1, 3), (6, 3)])
+    for distance in ([0, 100], [0, 2], [1.5, 4.0]):
+        expect = [_intermol_distance_loop(mol2s[0], q, CLIST, distance) for q in mol2s]
+        assert(reference.match_batch(mol2s, distance) == expect)
+        assert([reference.match(q, distance) for q in mol2s] == expect)
+        assert([intermol_distance_match(reference, q, None, distance) for q in mol2s] == expect)
+
+def test_distance_reference_screen():
+    mol2s = list(split_multimol2(mol2file))
+    reference = DistanceReference(mol2s[0][1], CLIST)
+    func = partial(reference.match_batch, distance=[0, 2])
+    res = [r[1] for r in screen_mol2s(mol2s, func, chunksize=16, batch=True)]
+    assert(res == [reference.match(m[1].split('\n'), [0, 2]) for m in mol2s])
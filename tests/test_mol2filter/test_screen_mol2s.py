@@ -0,0 +1,31 @@
+"""
+Unit tests for screen_mol2s function in mol2filter.py
+
+"""
+
+from functools import partial
+from pyprot.mol2filter import screen_mol2s
+from pyprot.mol2filter import count_matches
+from pyprot.mol2filter import match_all
+from pyprot.mol2io import split_multimol2
+
+mol2file = "./tests/data/mol2s/confs.mol2"
+CLIST = [['O.2', -1.2, 2.0], ['O.3', -0.5, -0.1]]
+
+def test_screen_mol2s():
+    mol2s = list(split_multimol2(mol2file))
+    expect = [count_matches(m[1].split('\n'), CLIST) for m in mol2s]
+    func = partial(count_matches, chargetype_list=CLIST)
+    res = list(screen_mol2s(mol2s, func))
+    assert([r[0] for r in res] == mol2s)
+    assert([r[1] for r in res] == expect)
+    res = list(screen_mol2s(split_multimol2(mol2file, output='lines'), func))
+    assert([r[1] for r in res] == expect)
+
+def test_screen_mol2s_jobs():
+    mol2s = list(split_multimol2(mol2file))
+    func = partial(match_all, chargetype_list=CLIST)
+    serial = list(screen_mol2s(mol2s, func))
+    assert(list(screen_mol2s(mol2s, func, n_jobs=2, chunksize=7)) == serial)
+    unordered = list(screen_mol2s(mol2s, func, n_jobs=2, chunksize=7, ordered=False))
+    assert(sorted(unordered) == sorted(serial))
@@ -0,0 +1,68 @@
+"""
+Unit tests for reading and writing compressed PDB and MOL2 files
+via pyprot.fileio
+
+"""
+
+import bz2
+import gzip
+import lzma
+import pyprot
+from pyprot.fileio import open_file, detect_compression
+from pyprot.mol2io import split_multimol2, iter_multimol2, index_multimol2
+
+PDB = './tests/data/pdbs/3EIY.pdb'
+MOL2 = './tests/data/mol2s/confs.mol2'
+COMPRESS = {'gz': gzip.compress, 'bz2': bz2.compress, 'xz': lzma.compress}
+
+def write_compressed(src, dest, compression):
+    with open(src, 'rb') as f:
+        data = COMPRESS[compression](f.read())
+    with open(dest, 'wb') as f:
+        f.write(data)
+
+def test_detect_compression(tmp_path):
+    for compression in ('gz', 'bz2', 'xz'):
+        # detected by content, not by name
+        dest = str(tmp_path / ('3eiy_%s.pdb' % compression))
+        write_compressed(PDB, dest, compression)
+        assert(detect_compression(dest) == compression)
+    assert(detect_compression(PDB) is None)
+
+def test_read_pdb(tmp_path):
+    plain = pyprot.Pdb(PDB)
+    for compression in ('gz', 'bz2', 'xz'):
+        dest = str(tmp_path / ('3eiy.pdb.' + compression))
+        write_compressed(PDB, dest, compression)
+        pdb = pyprot.Pdb(dest)
+        assert(pdb.cont == plain.cont)
+        assert(pdb.coordsec_to_ary(dest).equals(plain.coordsec_to_ary(PDB)))
+
+def test_write_pdb(tmp_path):
+    plain = pyprot.Pdb(PDB)
+    for compression in ('gz', 'bz2', 'xz'):
+        dest = str(tmp_path / ('3eiy.pdb.' + compression))
+        assert(plain.save_pdb(dest))
+        assert(detect_compression(dest) == compression)
+        assert(pyprot.Pdb(dest).cont == plain.cont)
+
+        dest = str(tmp_path / ('coords.pdb.' + compression))
+        plain.coordsec_to_file(dest)
+        with open_file(dest, 'r') as f:
+            compressed = f.read()
+        plain.coordsec_to_file(str(tmp_path / 'coords.pdb'))
+        with open(str(tmp_path / 'coords.pdb'), 'r') as f:
+            assert(compressed == f.read())
+
+def test_split_multimol2(tmp_path):
+    plain = list(split_multimol2(MOL2))
+    for compression in ('gz', 'bz2', 'xz'):
+        dest = str(tmp_path / ('confs.mol2.' + compression))
+        write_compressed(MOL2, dest, compression)
+        assert(list(split_multimol2(dest, bufsize=100)) == plain)
+        assert(list(iter_multimol2(dest)) == plain)
+        try:
+            index_multimol2(dest)
+            assert(False)
+        except ValueError:
+            pass
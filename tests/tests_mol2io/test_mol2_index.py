@@ -0,0 +1,69 @@
+"""
+Unit tests for the multi-mol2 byte-offset index in mol2io.py
+
+"""
+
+import os
+import shutil
+from pyprot.mol2io import split_multimol2
+from pyprot.mol2io import index_multimol2
+from pyprot.mol2io import read_mol2_index
+from pyprot.mol2io import fetch_mol2s
+from pyprot.mol2io import iter_multimol2
+
+mol2file = "./tests/data/mol2s/confs.mol2"
+
+def test_index_multimol2(tmp_path):
+    index_file = str(tmp_path / "confs.mol2.idx")
+    index = index_multimol2(mol2file, index_file=index_file)
+    assert(len(index) == 200)
+    assert(index[0] == ["ZINC00000016_1", 0, 3750])
+    assert(read_mol2_index(mol2file, index_file=index_file) == index)
+
+def test_read_mol2_index_outdated(tmp_path):
+    mol2copy = str(tmp_path / "confs.mol2")
+    shutil.copy(mol2file, mol2copy)
+    index_multimol2(mol2copy)
+    assert(len(read_mol2_index(mol2copy)) == 200)
+
+    # same size, different content: the modification time gives it away
+    with open(mol2copy, 'r') as mol2:
+        cont = mol2.read()
+    with open(mol2copy, 'w') as mol2:
+        mol2.write(cont.replace('ZINC00000016_1', 'ZINC00000016_X'))
+    stat = os.stat(mol2copy)
+    os.utime(mol2copy, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    assert(os.path.getsize(mol2copy) == os.path.getsize(mol2file))
+    try:
+        read_mol2_index(mol2copy)
+        assert(False)
+    except ValueError:
+        pass
+
+def test_fetch_mol2s(tmp_path):
+    res = list(split_multimol2(mol2file))
+    index = index_multimol2(mol2file, index_file=str(tmp_path / "confs.mol2.idx"))
+    assert(list(fetch_mol2s(mol2file, index=index)) == res)
+    hits = list(fetch_mol2s(mol2file, ["ZINC00000016_5", "ZINC00000016_2"], index=index))
+    assert(hits == [res[4], res[1]])
+    try:
+        list(fetch_mol2s(mol2file, ["not_a_molecule"], index=index))
+        assert(False)
+    except KeyError:
+        pass
+
+def test_iter_multimol2(tmp_path):
+    mol2copy = str(tmp_path / "confs.mol2")
+    shutil.copy(mol2file, mol2copy)
+    res = list(split_multimol2(mol2copy))
+    ids = ["ZINC00000016_5", "ZINC00000016_2"]
+    assert(list(iter_multimol2(mol2copy, ids)) == [res[1], res[4]])
+    index_multimol2(mol2copy)
+    assert(os.path.exists(mol2copy + ".idx"))
+    assert(list(iter_multimol2(mol2copy, ids)) == [res[1], res[4]])
+    assert(list(iter_multimol2(mol2copy)) == res)
+
+    # an outdated index is ignored
+    with open(mol2copy, 'a') as mol2:
+        mol2.write('\n' + res[0][1])
+    assert(len(list(iter_multimol2(mol2copy))) == 201)
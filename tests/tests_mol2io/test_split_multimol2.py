@@ -14,3 +14,19 @@ def test_split_multimol2():
     assert(len(res) == 200)
     assert(res[2][0] == "ZINC00000016_3")
     assert(res[4][1].startswith("@<TRIPOS>MOLECULE") == True)
+
+def test_split_multimol2_output():
+    res = list(split_multimol2(mol2file))
+    lines = list(split_multimol2(mol2file, output='lines'))
+    raw = list(split_multimol2(mol2file, output='bytes'))
+    assert([m[0] for m in lines] == [m[0] for m in res])
+    assert(lines[4][1] == res[4][1].splitlines())
+    assert(raw[4][1].decode('utf-8') == res[4][1])
+    with open(mol2file, 'rb') as in_file:
+        assert(b''.join([m[1] for m in raw]) == in_file.read())
+
+def test_split_multimol2_bufsize():
+    res = list(split_multimol2(mol2file))
+    assert(list(split_multimol2(mol2file, bufsize=7)) == res)
+    with open(mol2file, 'r') as in_file:
+        assert(''.join([m[1] for m in res]) == in_file.read())
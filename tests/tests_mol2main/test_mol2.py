@@ -0,0 +1,55 @@
+"""
+Unit tests for the Mol2 class in mol2main.py
+
+"""
+
+import numpy as np
+from pyprot import Mol2
+from pyprot.mol2main import replace_field
+from pyprot.mol2io import split_multimol2
+from pyprot.mol2filter import count_matches, distance_match
+
+mol2file = "./tests/data/mol2s/confs.mol2"
+LINE = "     11 O1          0.0847   -6.3706   -0.6593 O.2       1 <0>        -0.0409"
+
+def test_mol2_arrays():
+    mol2 = next(split_multimol2(mol2file, output='mol2'))[1]
+    assert(mol2.name == "ZINC00000016_1")
+    assert(len(mol2) == 37)
+    assert(mol2.xyz.shape == (37, 3))
+    assert(mol2.bonds.shape == (38, 3))
+    assert(list(mol2.xyz[0]) == [-5.0187, -7.8208, -3.4745])
+    assert(mol2.atom_type[0] == 'C.ar')
+    assert(mol2.charge[0] == -0.0736)
+    assert(list(mol2.bonds[0]) == [1, 1, 3])
+    assert(mol2.bond_type[0] == 'ar')
+
+def test_mol2_lossless():
+    for mol2_id, mol2_str in split_multimol2(mol2file):
+        mol2 = Mol2(mol2_str)
+        assert(mol2.to_str() == mol2_str)
+        assert(Mol2(mol2_str.encode('utf-8')).to_lines() == mol2_str.split('\n'))
+
+def test_mol2_modified():
+    mol2_str = next(split_multimol2(mol2file))[1]
+    mol2 = Mol2(mol2_str)
+    mol2.charge[0] = -12.5
+    mol2.atom_type[1] = 'N.pl3'
+    lines = mol2.to_lines()
+    assert(lines[8] == "      1 C1         -5.0187   -7.8208   -3.4745 C.ar      1 <0>       -12.5000")
+    assert(lines[9].split()[5] == 'N.pl3')
+    assert(len(lines[9]) == len(mol2_str.split('\n')[9]))
+    assert(lines[10:] == mol2_str.split('\n')[10:])
+    assert(Mol2(lines).charge[0] == -12.5)
+
+def test_mol2_filter():
+    clist = [['O.2', -1.2, 0.0], ['N.am']]
+    for mol2_id, mol2_str in split_multimol2(mol2file):
+        mol2 = Mol2(mol2_str)
+        assert(count_matches(mol2, clist) == count_matches(mol2_str.split('\n'), clist))
+        assert(distance_match(mol2, clist, [0, 4]) == distance_match(mol2_str, clist, [0, 4]))
+
+def test_replace_field():
+    assert(replace_field(LINE, 8, '-1.0000') == LINE[:-7] + '-1.0000')
+    assert(replace_field(LINE, -1, '1.1') == LINE[:-7] + '    1.1')
+    assert(replace_field(LINE, 5, 'N.am', align='left') == LINE.replace('O.2 ', 'N.am'))
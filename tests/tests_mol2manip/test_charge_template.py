@@ -0,0 +1,74 @@
+"""
+Unit tests for the ChargeTemplate class in mol2manip.py
+
+"""
+
+from pyprot.mol2manip import ChargeTemplate
+from pyprot.mol2io import split_multimol2
+from pyprot.mol2filter import screen_mol2s
+from functools import partial
+
+mol2file = "./tests/data/mol2s/confs.mol2"
+TEMPLATE = next(split_multimol2(mol2file, output='lines'))[1]
+TEMPLATE = [line[:-7] + '-1.2345' if line.endswith('-0.0736') else line for line in TEMPLATE]
+
+def _replace_last_field(target, charges):
+    out, in_atoms, charges = [], False, iter(charges)
+    for line in target:
+        if line.startswith('@<TRIPOS>'):
+            in_atoms = line.startswith('@<TRIPOS>ATOM')
+        elif in_atoms and line.strip():
+            end = len(line.rstrip())
+            line = line[:end - len(line.split()[-1])] + next(charges) + line[end:]
+        out.append(line)
+    return out
+
+def test_charge_template():
+    template = ChargeTemplate(TEMPLATE)
+    assert(len(template) == 37)
+    assert(template.charges[:2] == ['-1.2345', '-0.0770'])
+
+def test_charge_template_apply():
+    template = ChargeTemplate(TEMPLATE)
+    targets = [m[1] for m in split_multimol2(mol2file, output='lines')][:20]
+    out = template.apply_batch(targets)
+    assert(out == [_replace_last_field(t, template.charges) for t in targets])
+    assert(out[3][8].endswith(' -1.2345'))
+    assert(template.apply('\n'.join(targets[3])) == out[3])
+
+def test_charge_template_whitespace():
+    template = ChargeTemplate(TEMPLATE)
+    target = [line + '00' if line.endswith('-0.0770') else line for line in TEMPLATE]
+    out = template.apply(target)
+    assert(out[9] == TEMPLATE[9][:-7] + '  -0.0770')
+    assert(len(out[9]) == len(target[9]))
+    try:
+        template.apply(target[:10])
+        assert(False)
+    except ValueError:
+        pass
+
+def test_charge_template_apply_batch_errors():
+    template = ChargeTemplate(TEMPLATE)
+    mol2s = list(split_multimol2(mol2file, output='lines'))[:10]
+    # one pose lost its last atom line
+    bad = mol2s[4][1]
+    bad_idx = bad.index(next(line for line in bad if line.startswith('@<TRIPOS>BOND')))
+    mol2s[4] = [mol2s[4][0], bad[:bad_idx - 1] + bad[bad_idx:]]
+    try:
+        template.apply_batch([m[1] for m in mol2s])
+        assert(False)
+    except ValueError:
+        pass
+
+    out = template.apply_batch([m[1] for m in mol2s], errors='return')
+    assert(len(out) == 10)
+    assert(out[4] == (None, 'ValueError: template has 37 atoms, target has 36 atoms'))
+    assert([res for res, error in out[:4]] == [template.apply(m[1]) for m in mol2s[:4]])
+    assert(all(error is None for res, error in out[:4] + out[5:]))
+
+    transfer = partial(template.apply_batch, errors='return')
+    results = list(screen_mol2s(mol2s, transfer, n_jobs=2, chunksize=3, batch=True))
+    failed = [mol2[0] for mol2, (res, error) in results if error is not None]
+    assert(len(results) == 10)
+    assert(failed == [mol2s[4][0]])
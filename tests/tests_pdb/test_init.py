@@ -16,3 +16,9 @@ def test_init():
     assert(len(pdb1.atom_ter) == 1331)
     assert(len(pdb1.hetatm) == 151)
     assert(len(pdb1.conect) == 54)
+
+def test_init_record_idx():
+    assert(len(pdb1.record_idx['atom']) == 1330)
+    assert(pdb1.atom == [pdb1.cont[i] for i in pdb1.record_idx['atom']])
+    assert(pdb1.chains == pdb1._get_chains())
+    assert(pdb1.coord_ary.shape[0] == len(pdb1.atom_ter) + len(pdb1.hetatm))
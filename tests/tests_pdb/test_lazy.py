@@ -0,0 +1,29 @@
+"""
+Unit tests for the lazily computed attributes of the Pdb class
+from pyprot.pdbmain.
+
+"""
+
+import pyprot
+
+def test_lazy_attributes():
+    pdb1 = pyprot.Pdb("./tests/data/pdbs/3EIY.pdb")
+    assert('atom' not in pdb1.__dict__)
+    assert('coord_ary' not in pdb1.__dict__)
+    assert(len(pdb1.atom) == 1330)
+    assert('atom' in pdb1.__dict__)
+    assert('coord_ary' not in pdb1.__dict__)
+
+def test_invalidate():
+    pdb1 = pyprot.Pdb("./tests/data/pdbs/3EIY.pdb")
+    assert(len(pdb1.hetatm) == 151)
+    assert(pdb1.coord_ary.shape[0] == 1482)
+
+    pdb1.cont = pdb1.atom
+    assert(len(pdb1.hetatm) == 0)
+    assert(len(pdb1.atom) == 1330)
+    assert(pdb1.coord_ary.shape[0] == 1330)
+
+    pdb1.cont.append(pdb1.cont[0].replace('ATOM  ', 'HETATM'))
+    pdb1.invalidate()
+    assert(len(pdb1.hetatm) == 1)
@@ -0,0 +1,79 @@
+"""
+Unit tests for batch processing of PDB files in pyprot.pdbbatch
+
+"""
+
+import gzip
+import os
+import shutil
+from functools import partial
+import pyprot
+from pyprot.pdbbatch import find_pdbs, process_pdbs, collect_table, batch_table
+from pyprot.pdbbatch import bfactor_stats, center_of_mass, summary
+
+PDBS = ['./tests/data/pdbs/3EIY.pdb', './tests/data/pdbs/small_3EIY_h.pdb']
+
+def make_dir(tmp_path):
+    for pdb in PDBS:
+        shutil.copy(pdb, str(tmp_path))
+    with open(PDBS[0], 'rb') as f, gzip.open(str(tmp_path / '1aaa.pdb.gz'), 'wb') as out:
+        out.write(f.read())
+    with open(str(tmp_path / 'notes.txt'), 'w') as f:
+        f.write('not a PDB file')
+    return str(tmp_path)
+
+def test_find_pdbs(tmp_path):
+    src = make_dir(tmp_path)
+    names = [os.path.basename(p) for p in find_pdbs(src)]
+    assert(names == ['1aaa.pdb.gz', '3EIY.pdb', 'small_3EIY_h.pdb'])
+    assert(len(find_pdbs([src, os.path.join(src, '*.pdb')])) == 3)
+    assert(find_pdbs(os.path.join(src, 'missing.pdb')) == [os.path.join(src, 'missing.pdb')])
+    assert(find_pdbs(os.path.join(src, 'missing*.pdb')) == [])
+
+def test_process_pdbs():
+    paths = PDBS + ['./tests/data/pdbs/missing.pdb']
+    seen = []
+    results = list(process_pdbs(paths, bfactor_stats, chunksize=2,
+                                callback=lambda path, error: seen.append(path)))
+    assert(seen == paths)
+    assert([r[0] for r in results] == paths)
+    assert(results[1][1]['median'] == pyprot.Pdb(PDBS[1]).bfactor_median())
+    assert(results[2][1] is None and results[2][2].startswith('FileNotFoundError'))
+
+def test_batch_table_jobs(tmp_path):
+    src = make_dir(tmp_path)
+    table, errors = batch_table(src, bfactor_stats)
+    assert(table.columns.tolist() == ['file', 'median', 'mean', 'std_dev', 'std_err', 'n_atoms'])
+    assert(table.shape[0] == 3 and errors.shape[0] == 0)
+    assert(table['mean'].tolist()[0] == table['mean'].tolist()[1])
+
+    func = partial(center_of_mass, ligand=True, by='chain')
+    serial, _ = batch_table(src, func)
+    parallel, _ = batch_table(src, func, n_jobs=2, chunksize=1)
+    assert(serial.equals(parallel))
+    assert(serial['chain'].tolist() == ['A', 'A', 'A'])
+
+def test_batch_table_cache(tmp_path):
+    src = make_dir(tmp_path)
+    table, _ = batch_table(src, bfactor_stats)
+    for check in ('mtime', 'hash', 'mtime'):
+        cached, errors = batch_table(src, bfactor_stats, n_jobs=2, table_cache=check)
+        assert(cached.equals(table) and errors.shape[0] == 0)
+    counts, _ = batch_table(src, summary, table_cache='mtime')
+    assert(counts.equals(batch_table(src, summary)[0]))
+    assert(counts['chains'].tolist() == ['A', 'A', 'A'])
+    tables = sorted(name for name in os.listdir(src) if name.endswith('.atab'))
+    assert(tables == ['1aaa.pdb.gz.atab', '3EIY.pdb.atab', 'small_3EIY_h.pdb.atab'])
+    try:
+        batch_table(src, bfactor_stats, table_cache='size')
+        assert(False)
+    except ValueError:
+        pass
+
+def test_collect_table():
+    results = [('a.pdb', {'x': 1.0}, None), ('b.pdb', None, 'ValueError: bad'),
+               ('c.pdb', 3, None)]
+    table, errors = collect_table(results)
+    assert(table['file'].tolist() == ['a.pdb', 'c.pdb'])
+    assert(table['result'].tolist()[1] == 3)
+    assert(errors.values.tolist() == [['b.pdb', 'ValueError: bad']])
@@ -0,0 +1,66 @@
+"""
+Unit tests for the PdbCache in pyprot.pdbcache
+
+"""
+
+import os
+import time
+import pyprot
+from pyprot.pdbcache import PdbCache
+from pyprot.pdbdownload import PdbDownloader, DownloadError
+
+with open('./tests/data/pdbs/3EIY.pdb', 'rb') as f:
+    PDB_BYTES = f.read()
+
+def test_put_get(tmp_path):
+    cache = PdbCache(str(tmp_path))
+    assert(cache.get('3eiy') is None)
+    path = cache.put('3EIY', PDB_BYTES)
+    assert(path == os.path.join(str(tmp_path), 'pdb', 'ei', '3eiy.pdb.gz'))
+    assert(os.path.getsize(path) < len(PDB_BYTES) / 3)
+    assert(cache.get('3eiy') == PDB_BYTES)
+    assert(cache.get('3eiy', fmt='cif') is None)
+    assert('3eiy' in cache)
+    assert(os.listdir(os.path.dirname(path)) == ['3eiy.pdb.gz'])
+
+def test_corrupt_entry(tmp_path):
+    cache = PdbCache(str(tmp_path))
+    path = cache.put('3eiy', PDB_BYTES)
+    with open(path, 'wb') as f:
+        f.write(b'\x1f\x8b truncated')
+    assert(cache.get('3eiy') is None)
+    assert(not os.path.exists(path))
+
+def test_lru_eviction(tmp_path):
+    cache = PdbCache(str(tmp_path))
+    for i, code in enumerate(['1aaa', '1bbb', '1ccc']):
+        path = cache.put(code, PDB_BYTES + code.encode())
+        os.utime(path, (time.time() - 100 + i, time.time() - 100 + i))
+    entry_size = cache.size() // 3
+
+    # reading 1aaa makes 1bbb the least recently used entry
+    assert(cache.get('1aaa') is not None)
+    cache.max_bytes = 3 * entry_size + entry_size // 2
+    cache.put('1ddd', PDB_BYTES + b'1ddd')
+    assert('1bbb' not in cache)
+    assert('1aaa' in cache and '1ccc' in cache and '1ddd' in cache)
+    assert(cache.size() <= cache.max_bytes)
+    assert(cache.clear() == 3)
+    assert(cache.size() == 0)
+
+def test_offline(tmp_path):
+    cache = PdbCache(str(tmp_path), offline=True)
+    loader = PdbDownloader('http://127.0.0.1:9/%s.pdb', cache=cache, retries=0)
+    try:
+        loader.fetch('3eiy')
+        assert(False)
+    except DownloadError as e:
+        assert('offline' in str(e))
+    cache.put('3eiy', PDB_BYTES)
+    assert(loader.fetch('3EIY') == PDB_BYTES)
+
+    pdb = pyprot.Pdb()
+    cont = pdb.fetch_rcsb('3eiy', cache=cache)
+    assert(cont[0].startswith('HEADER'))
+    assert(len(cont) == len([l for l in PDB_BYTES.decode().split('\n') if l.strip()]))
+    assert(pdb.fetch_rcsb('1htg', cache=cache) == [])
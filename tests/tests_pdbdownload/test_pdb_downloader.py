@@ -0,0 +1,92 @@
+"""
+Unit tests for the PdbDownloader in pyprot.pdbdownload
+against a local HTTP server.
+
+"""
+
+import gzip
+import http.server
+import os
+import threading
+from pyprot.pdbdownload import PdbDownloader, download_pdbs
+
+with open('./tests/data/pdbs/3EIY.pdb', 'rb') as f:
+    PDB_BYTES = f.read()
+
+FILES = {'/3eiy.pdb': gzip.compress(PDB_BYTES),
+         '/1htg.pdb': b'HEADER    1HTG\n'}
+
+
+class Handler(http.server.BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    requests = []
+    ports = set()
+    fail_once = {'/1rx1.pdb'}
+
+    def do_GET(self):
+        Handler.requests.append(self.path)
+        Handler.ports.add(self.client_address[1])
+        if self.path in Handler.fail_once:
+            Handler.fail_once.discard(self.path)
+            self.send_response(503)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+        if self.path == '/1rx1.pdb':
+            body = b'HEADER    1RX1\n'
+        elif self.path in FILES:
+            body = FILES[self.path]
+        else:
+            self.send_response(404)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def serve():
+    server = http.server.ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, 'http://127.0.0.1:%d/%%s.pdb' % server.server_address[1]
+
+def test_fetch_gzip_keepalive():
+    server, url = serve()
+    Handler.ports.clear()
+    with PdbDownloader(url, n_jobs=1) as loader:
+        assert(loader.fetch('3EIY') == PDB_BYTES)
+        assert(loader.fetch('1htg') == b'HEADER    1HTG\n')
+        assert(loader.fetch('3eiy') == PDB_BYTES)
+    assert(len(Handler.ports) == 1)
+    server.shutdown()
+
+def test_download_retry_resume(tmp_path):
+    server, url = serve()
+    Handler.requests.clear()
+    codes = ['3eiy', '1HTG', '1rx1', 'xxxx', '3EIY', ' 1htg']
+    seen = []
+    results = download_pdbs(codes, str(tmp_path), n_jobs=3, url_template=url,
+                            callback=lambda code, error: seen.append(code))
+    assert(sorted(seen) == ['1htg', '1rx1', '3eiy', 'xxxx'])
+    assert(results['3eiy'] is None and results['1htg'] is None)
+    assert(results['1rx1'] is None)
+    assert(results['xxxx'] == 'HTTP Error 404')
+    assert(Handler.requests.count('/1rx1.pdb') == 2)
+    assert(Handler.requests.count('/xxxx.pdb') == 1)
+    # duplicate codes are downloaded once
+    assert(Handler.requests.count('/3eiy.pdb') == 1 and Handler.requests.count('/1htg.pdb') == 1)
+    with open(os.path.join(str(tmp_path), '3eiy.pdb'), 'rb') as f:
+        assert(f.read() == PDB_BYTES)
+    assert(sorted(os.listdir(str(tmp_path))) == ['1htg.pdb', '1rx1.pdb', '3eiy.pdb'])
+
+    # existing files are skipped
+    Handler.requests.clear()
+    results = download_pdbs(codes, str(tmp_path), n_jobs=2, url_template=url)
+    assert(Handler.requests == ['/xxxx.pdb'])
+    assert(results['3eiy'] is None)
+    server.shutdown()
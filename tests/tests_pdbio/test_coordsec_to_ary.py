@@ -0,0 +1,45 @@
+import numpy as np
+import pyprot
+
+def test_coordsec_to_ary():
+
+    in_pdb = "./tests/data/pdbs/3EIY.pdb"
+
+    pdb1 = pyprot.Pdb(in_pdb)
+    df = pdb1.coordsec_to_ary(in_pdb)
+
+    assert(df.shape == (1482, 17))
+    assert(df.shape[0] == len(pdb1.atom_ter) + len(pdb1.hetatm))
+    assert(df['xcoord'].dtype == float)
+    assert(df['atomnum'].iloc[0] == 1)
+    assert(df.iloc[0, :16].tolist() == ['ATOM', 1, 'N', '', 'SER', 'A', 2, '',
+                                        2.527, 54.656, -1.667, 1.0, 52.73, '', 'N', ''])
+    het = df[df['record'] == 'HETATM'].iloc[0]
+    assert(het['atomname'] == 'K' and het['residuenum'] == 176 and het['occupancy'] == 0.5)
+
+    # TER records have no coordinates
+    ter = df[df['record'] == 'TER'].iloc[0]
+    assert(ter['atomnum'] == 1331 and ter['residuename'] == 'LYS')
+    assert(np.isnan(ter[['xcoord', 'ycoord', 'zcoord', 'occupancy', 'bfactor']].tolist()).all())
+
+def test_coordsec_to_ary_anisou():
+
+    in_pdb = "./tests/data/pdbs/3B7V.pdb"
+
+    pdb1 = pyprot.Pdb(in_pdb)
+    df = pdb1.coordsec_to_ary(in_pdb)
+    assert(df['record'].value_counts().to_dict() == {'ANISOU': 1823, 'ATOM': 1629,
+                                                     'HETATM': 198, 'TER': 3})
+    # ANISOU columns are not numbers, so the coordinate columns stay text
+    anisou = df[df['record'] == 'ANISOU'].iloc[0]
+    assert(anisou['atomnum'] == 1 and anisou['xcoord'] == '4034')
+    assert(df['origline'].iloc[0].startswith('ATOM      1  N   PRO A   1'))
+
+def test_coordsec_to_ary_list():
+
+    pdb1 = pyprot.Pdb("./tests/data/pdbs/short_RIV_3_mod.pdb")
+    df = pdb1.coordsec_to_ary(pdb1.cont)
+    assert(df.shape == (15, 17))
+    assert(df.iloc[-1, :16].tolist() == ['HETATM', 3442, 'O', '', 'HOH', 'L', 292, '',
+                                         11.904, -4.213, 38.248, 1.0, 47.47, '', 'O', ''])
+    assert(df['origline'].iloc[-1] == pdb1.hetatm[-1])
@@ -1,4 +1,6 @@
+import numpy as np
 import pyprot
+from pyprot.pdbio import PdbIO
 
 def test_atom_ter_hetatm_trio():
     
@@ -11,4 +13,47 @@ def test_atom_ter_hetatm_trio():
     
     with open(out_pdb, 'r') as in_1, open(expected_pdb, 'r') as in_2:
         for line1, line2 in zip(in_1, in_2):
-            assert(line1 == line2)
\ No newline at end of file
+            assert(line1 == line2)
+
+def test_identical_file(tmp_path):
+    in_pdb = "./tests/tests_pdbio/data/atom_ter_hetatm_in.pdb"
+    expected_pdb = "./tests/tests_pdbio/data/atom_ter_hetatm_out_expected.pdb"
+    out_pdb = str(tmp_path / 'out.pdb')
+    pyprot.Pdb(in_pdb).coordsec_to_file(out_pdb, chunksize=7)
+    with open(out_pdb, 'rb') as in_1, open(expected_pdb, 'rb') as in_2:
+        assert(in_1.read() == in_2.read())
+
+def test_column_layout(tmp_path):
+    # ANISOU records, 4-character atom names, empty chain IDs
+    for in_pdb in ("./tests/data/pdbs/3B7V.pdb", "./tests/data/pdbs/small_3EIY_h.pdb",
+                   "./tests/data/pdbs/lig_conf_1.pdb"):
+        out_pdb = str(tmp_path / 'out.pdb')
+        pdb1 = pyprot.Pdb(in_pdb)
+        pdb1.coordsec_to_file(out_pdb)
+        with open(out_pdb, 'r') as in_1:
+            lines = in_1.read().split('\n')
+        assert(lines.pop() == '')
+        assert(len(lines) == pdb1.coord_ary.shape[0])
+        for line, orig in zip(lines, pdb1.coord_ary['origline']):
+            assert(len(line) == 80)
+            orig = orig.rstrip('\n')[:80].ljust(80)
+            # atom and residue names of the original layout are left-aligned
+            assert(line[:12] + line[16:17] + line[20:] == orig[:12] + orig[16:17] + orig[20:])
+            assert(line[12:16].strip() == orig[12:16].strip())
+
+def test_float_format():
+    rng = np.random.RandomState(0)
+    values = np.concatenate([rng.uniform(-999, 999, 5000),
+                             np.arange(-2000, 2000) / 1000 + 0.0005,
+                             [-0.0, -0.0001, 0.0004999, np.nan]])
+    df = pyprot.Pdb("./tests/data/pdbs/small_3EIY_noH.pdb").coord_ary
+    df = df.iloc[np.arange(values.shape[0]) % df.shape[0]].reset_index(drop=True)
+    df['xcoord'] = values
+    df['bfactor'] = values / 20
+    lines = PdbIO._format_coordsec(df).decode().split('\n')[:-1]
+    for line, v in zip(lines, values):
+        if np.isnan(v):
+            assert(line[30:38] == ' ' * 8)
+        else:
+            assert(line[30:38] == '%8.3f' % v)
+            assert(line[60:66] == '%6.2f' % (v / 20))
@@ -45,3 +45,15 @@ def test_grab_radius():
             'HETATM 1445  O   HOH A 257       2.292  33.719   9.368  1.00 44.24           O'
         ]
     assert(res == out)
+
+def test_grab_radius_multi():
+    centers = [[4.698, 36.387, 11.996], [9.037, 34.959, 9.857], [500.0, 500.0, 500.0]]
+    res = pdb1.grab_radius_multi(5.2, centers)
+    assert(len(res) == 3)
+    assert(res[0] == pdb1.grab_radius(5.2, centers[0]))
+    assert(res[1] == pdb1.grab_radius(5.2, centers[1]))
+    assert(res[2] == [])
+
+    union = pdb1.grab_radius_multi(5.2, centers, union=True)
+    assert(set(union) == set(res[0]) | set(res[1]))
+    assert(union == [row for row in pdb1.cont if row in set(union)])
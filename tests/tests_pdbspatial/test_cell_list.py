@@ -0,0 +1,64 @@
+"""
+Unit tests for the CellList class in pyprot.pdbspatial.
+
+"""
+
+import numpy as np
+from pyprot.pdbspatial import CellList
+
+rng = np.random.RandomState(0)
+points = rng.uniform(-30, 30, size=(2000, 3))
+points[7] = np.nan
+
+def brute_force(center, radius):
+    distance = np.sqrt(((points - center)**2).sum(axis=1))
+    return np.flatnonzero(distance <= radius)
+
+def test_query_radius_single():
+    cells = CellList(points, cell_size=3.0)
+    for radius in (0.0, 2.5, 6.0, 100.0):
+        center = rng.uniform(-40, 40, size=3)
+        assert(np.array_equal(cells.query_radius(center, radius),
+                              brute_force(center, radius)))
+
+def test_query_radius_multi():
+    cells = CellList(points, cell_size=3.0)
+    centers = rng.uniform(-40, 40, size=(50, 3))
+    hits = cells.query_radius(centers, 7.5)
+    assert(len(hits) == 50)
+    for center, hit in zip(centers, hits):
+        assert(np.array_equal(hit, brute_force(center, 7.5)))
+
+def test_query_pairs():
+    cells = CellList(points)
+    centers = points[:3]
+    center_idx, point_idx = cells.query_pairs(centers, 5.0)
+    assert(np.all(np.diff(center_idx) >= 0))
+    for i in range(3):
+        assert(np.array_equal(point_idx[center_idx == i], brute_force(centers[i], 5.0)))
+    assert(7 not in point_idx)
+
+def test_query_pairs_candidate_limit(monkeypatch):
+    # dense points, large radius, and many centers
+    dense = rng.uniform(0, 60, size=(20000, 3))
+    cells = CellList(dense)
+    centers = rng.uniform(0, 60, size=(400, 3))
+
+    # records the number of candidate pairs of every pass
+    sizes = []
+    candidate_passes = CellList._candidate_passes
+    def recording_passes(self, chunk, offsets, max_candidates):
+        for cand_c, cand_p in candidate_passes(self, chunk, offsets, max_candidates):
+            sizes.append(cand_c.shape[0])
+            yield cand_c, cand_p
+    monkeypatch.setattr(CellList, '_candidate_passes', recording_passes)
+    center_idx, point_idx = cells.query_pairs(centers, 20.0, max_candidates=2**18)
+    monkeypatch.undo()
+    assert(len(sizes) > 1)
+    assert(max(sizes) <= 2**18)
+
+    ref_c, ref_p = CellList(dense).query_pairs(centers, 20.0)
+    assert(np.array_equal(center_idx, ref_c) and np.array_equal(point_idx, ref_p))
+    for i in (0, 200, 399):
+        distance = np.sqrt(((dense - centers[i])**2).sum(axis=1))
+        assert(np.array_equal(point_idx[center_idx == i], np.flatnonzero(distance <= 20.0)))
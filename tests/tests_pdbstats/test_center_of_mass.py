@@ -12,3 +12,21 @@ pdb1 = pyprot.Pdb('./tests/data/pdbs/3EIY.pdb')
 
 def test_center_of_mass():
     assert pdb1.center_of_mass(protein=True, ligand=False) == [8.979, 41.661, 12.495]
+
+def test_center_of_mass_chain():
+    centers = pdb1.center_of_mass(protein=True, ligand=False, by='chain')
+    assert(centers['chain'].tolist() == ['A'])
+    assert(centers[['x', 'y', 'z']].values.tolist() == [[8.979, 41.661, 12.495]])
+
+def test_center_of_mass_residue():
+    centers = pdb1.center_of_mass(protein=True, ligand=True, by='residue')
+    assert(centers.shape[0] == len(set((l[21], l[22:26]) for l in pdb1.atom + pdb1.hetatm)))
+    assert(centers['n_atoms'].sum() == 1481)
+    first = pyprot.Pdb([l for l in pdb1.atom if l[22:26] == '   2'])
+    assert(centers.iloc[0][['x', 'y', 'z']].tolist() == first.center_of_mass())
+
+def test_center_of_mass_ligand():
+    centers = pdb1.center_of_mass(by='ligand')
+    assert(centers['resname'].tolist() == ['K', 'NA', 'NA', 'POP', 'PG4', 'PEG', 'PEG'])
+    assert(centers.iloc[0][['x', 'y', 'z']].tolist() == [24.99, 43.276, 0.005])
+    assert(pyprot.Pdb(pdb1.atom).center_of_mass(by='ligand').shape[0] == 0)
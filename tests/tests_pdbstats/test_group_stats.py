@@ -0,0 +1,44 @@
+"""
+Unit tests for the group_stats method in PdbStats class
+from pyprot.pdbstats
+
+"""
+
+import pyprot
+from pyprot import statsbasic
+
+pdb1 = pyprot.Pdb('./tests/data/pdbs/3EIY.pdb')
+
+def test_group_stats_residue():
+    stats = pdb1.group_stats(by='residue', fields=['bfactor', 'z'])
+    assert(stats.columns.tolist() == ['chain', 'resnum', 'resname', 'field', 'n_atoms',
+                                      'mean', 'median', 'std_dev', 'std_err'])
+    assert(stats.shape[0] == 2 * len(set(l[22:26] for l in pdb1.atom)))
+    assert(stats['field'].tolist()[:4] == ['bfactor', 'z', 'bfactor', 'z'])
+
+    first = [float(l[60:66]) for l in pdb1.atom if l[22:26] == '   2']
+    row = stats.iloc[0]
+    assert((row['chain'], row['resnum'], row['resname']) == ('A', 2, 'SER'))
+    assert(row['n_atoms'] == len(first))
+    assert(row['mean'] == round(statsbasic.mean(first), 3))
+    assert(row['median'] == round(statsbasic.median(first), 3))
+    assert(row['std_dev'] == round(statsbasic.std_dev(first), 3))
+    assert(row['std_err'] == round(statsbasic.std_err(first), 3))
+
+def test_group_stats_selection():
+    tab = pdb1.atom_table
+    stats = pdb1.group_stats(by=None, fields='occupancy', mask=tab.is_calpha)
+    assert(stats.values.tolist() == [['occupancy', 174, 1.0, 1.0, 0.0, 0.0]])
+
+    stats = pdb1.group_stats(by='ligand', fields='bfactor')
+    assert(stats['resname'].tolist() == ['K', 'NA', 'NA', 'POP', 'PG4', 'PEG', 'PEG'])
+    assert(stats['std_dev'].tolist()[:3] == [0.0, 0.0, 0.0])
+    assert(pyprot.Pdb(pdb1.atom).group_stats(by='ligand').shape[0] == 0)
+
+def test_bfactor_stats_by():
+    for atoms in ('all', 'mainchain', 'calpha'):
+        stats = pdb1.bfactor_stats(atoms=atoms)
+        assert(stats == (pdb1.bfactor_median(atoms=atoms), pdb1.bfactor_mean(atoms=atoms),
+                         pdb1.bfactor_std_dev(atoms=atoms), pdb1.bfactor_std_err(atoms=atoms)))
+        chain = pdb1.bfactor_stats(atoms=atoms, by='chain').iloc[0]
+        assert(chain[['median', 'mean', 'std_dev', 'std_err']].tolist() == list(stats))
@@ -0,0 +1,57 @@
+"""
+Unit tests for the AtomTable class in pyprot.pdbtable.
+
+"""
+
+import numpy as np
+import pyprot
+
+pdb1 = pyprot.Pdb("./tests/data/pdbs/3EIY.pdb")
+
+def test_atom_table():
+    tab = pdb1.atom_table
+    assert(len(tab) == len(pdb1.atom_ter) + len(pdb1.hetatm))
+    assert(tab.is_atom.sum() == 1330)
+    assert(tab.is_hetatm.sum() == 151)
+    assert(tab.is_ter.sum() == 1)
+    assert(tab.is_calpha.sum() == len(pdb1.calpha))
+    assert(tab.is_mainchain.sum() == len(pdb1.mainchain))
+    assert(tab.coords.shape == (1482, 3))
+    assert(tab.coords[0].tolist() == [2.527, 54.656, -1.667])
+    assert(tab.serial[0] == 1)
+    assert(tab.resnum[0] == 2)
+    assert(tab.bfactor[0] == 52.73)
+    assert(np.isnan(tab.coords[tab.is_ter]).all())
+
+def test_atom_table_categories():
+    tab = pdb1.atom_table
+    assert(tab.names('resname')[0] == 'SER')
+    assert(tab.names('atomname')[1] == 'CA')
+    assert('NA' in tab.categories['element'])
+    assert(tab.isin('resname', ['HOH']).sum() ==
+           len([row for row in pdb1.hetatm if row[17:20] == 'HOH']))
+    lines = [pdb1.cont[i] for i in tab.line_idx[tab.is_atom]]
+    assert(lines == pdb1.atom)
+
+def test_atom_table_group():
+    tab = pdb1.atom_table
+    rows, group_idx, keys = tab.group('residue', tab.is_atom)
+    assert(rows.shape == group_idx.shape == (1330,))
+    assert(keys['resnum'][:3].tolist() == [2, 3, 4])
+    assert(keys['resname'][:3].tolist() == ['SER', 'PHE', 'SER'])
+    assert(group_idx[0] == 0 and group_idx[-1] == keys['resnum'].shape[0] - 1)
+    assert((np.diff(group_idx) >= 0).all())
+    rows, group_idx, keys = tab.group(['element'], tab.is_hetatm & tab.is_atom)
+    assert(rows.shape[0] == 0 and keys['element'].shape[0] == 0)
+
+def test_atom_table_malformed_numbers():
+    lines = pdb1.atom[:3]
+    # hybrid-36 residue number and an invalid serial number
+    lines[1] = lines[1][:22] + 'A000' + lines[1][26:]
+    lines[2] = lines[2][:6] + '  ***' + lines[2][11:]
+    pdb = pyprot.Pdb(lines)
+    tab = pdb.atom_table
+    assert(tab.resnum[1] == pyprot.pdbtable.MISSING_INT)
+    assert(tab.serial[2] == pyprot.pdbtable.MISSING_INT)
+    assert(pdb.select_residues([0, 2]) == [lines[0], lines[2]])
+    assert(pdb.select_atoms([0, 10]) == lines[:2])
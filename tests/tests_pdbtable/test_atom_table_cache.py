@@ -0,0 +1,115 @@
+"""
+Unit tests for saving and reloading AtomTable binary files
+in pyprot.pdbtable.
+
+"""
+
+import os
+import shutil
+import numpy as np
+import pyprot
+from pyprot.pdbtable import AtomTable, load_atom_table, table_cache_valid, TABLE_ARRAYS
+
+PDB = './tests/data/pdbs/1T48_995.pdb'
+
+def assert_equal_tables(tab1, tab2):
+    for name in TABLE_ARRAYS:
+        ary1, ary2 = getattr(tab1, name), getattr(tab2, name)
+        assert(ary1.dtype == ary2.dtype and ary1.shape == ary2.shape), name
+        assert(np.array_equal(ary1, ary2, equal_nan=ary1.dtype.kind == 'f')), name
+    for field, cats in tab1.categories.items():
+        assert((cats == tab2.categories[field]).all())
+
+def test_conect():
+    tab = pyprot.Pdb(PDB).atom_table
+    assert(tab.conect.shape[1] == 5)
+    assert(tab.conect[:2].tolist() == [[2393, 2394, 0, 0, 0], [2394, 2393, 2395, 2400, 0]])
+    assert(pyprot.Pdb('./tests/data/pdbs/3EIY.pdb').atom_table.conect[0].tolist() == [70, 1332, 0, 0, 0])
+    assert(pyprot.Pdb(pyprot.Pdb(PDB).atom).atom_table.conect.shape == (0, 5))
+
+def test_save_load(tmp_path):
+    pdb = pyprot.Pdb(PDB)
+    dest = str(tmp_path / 'table.atab')
+    assert(pdb.save_atom_table(dest) == dest)
+    for mmap in (True, False):
+        tab = AtomTable.load(dest, mmap=mmap)
+        assert_equal_tables(pdb.atom_table, tab)
+    assert(tab.names('resname')[0] == pdb.atom_table.names('resname')[0])
+    rows, group_idx, keys = tab.group('residue')
+    assert(keys['resnum'].tolist() == pdb.atom_table.group('residue')[2]['resnum'].tolist())
+
+    empty = str(tmp_path / 'empty.atab')
+    pyprot.Pdb(['HEADER    EMPTY']).atom_table.save(empty)
+    assert(len(AtomTable.load(empty)) == 0)
+
+def test_load_atom_table(tmp_path):
+    src = str(tmp_path / '1t48.pdb')
+    shutil.copy(PDB, src)
+    tab = load_atom_table(src)
+    cache_file = src + '.atab'
+    assert(os.path.isfile(cache_file))
+    assert(table_cache_valid(cache_file, src))
+    assert(isinstance(load_atom_table(src).coords, np.ndarray))
+    assert_equal_tables(tab, load_atom_table(src))
+
+    # touched, but unchanged content
+    os.utime(src, ns=(0, 0))
+    assert(not table_cache_valid(cache_file, src))
+    assert(table_cache_valid(cache_file, src, check='hash'))
+
+    # a hash match stores the new modification time
+    assert_equal_tables(tab, load_atom_table(src, check='hash'))
+    assert(table_cache_valid(cache_file, src))
+
+    # changed content: the table is parsed again
+    with open(src, 'r') as f:
+        lines = f.readlines()
+    with open(src, 'w') as f:
+        f.writelines(lines[:100])
+    assert(not table_cache_valid(cache_file, src, check='hash'))
+    assert(len(load_atom_table(src, check='hash')) == len(pyprot.Pdb(src).atom_table))
+    assert(table_cache_valid(cache_file, src))
+
+    # corrupt table files are replaced
+    with open(cache_file, 'wb') as f:
+        f.write(b'garbage')
+    assert(len(load_atom_table(src)) == len(pyprot.Pdb(src).atom_table))
+    assert(table_cache_valid(cache_file, src))
+
+def test_load_atom_table_hash_once(tmp_path, monkeypatch):
+    src = str(tmp_path / '1t48.pdb')
+    shutil.copy(PDB, src)
+    load_atom_table(src, check='hash')
+    os.utime(src, ns=(10**18, 10**18))
+    load_atom_table(src, check='hash')
+
+    def no_sha1(path):
+        raise AssertionError('unchanged source hashed again')
+    monkeypatch.setattr(pyprot.pdbtable, '_sha1', no_sha1)
+    assert(len(load_atom_table(src, check='hash')) == len(pyprot.Pdb(src).atom_table))
+
+def test_pdb_from_table(tmp_path):
+    src = str(tmp_path / '1t48.pdb')
+    shutil.copy(PDB, src)
+    pdb = pyprot.Pdb.from_table(src)
+    assert(os.path.isfile(src + '.atab'))
+    assert_equal_tables(pdb.atom_table, pyprot.Pdb(src).atom_table)
+
+    # the second time, the table is memory-mapped from the table file
+    # and the PDB file is read only when its lines are needed
+    pdb = pyprot.Pdb.from_table(src)
+    assert(not pdb.atom_table.coords.flags.writeable)
+    assert_equal_tables(pdb.atom_table, pyprot.Pdb(src).atom_table)
+    assert(pdb.bfactor_stats() == pyprot.Pdb(src).bfactor_stats())
+    assert(pdb._cont is None)
+    assert(pdb.atom == pyprot.Pdb(src).atom)
+    assert(pdb.cont == pyprot.Pdb(src).cont)
+    assert(pdb.fileloc == src)
+
+    # an unchecked table file could refer to the lines of another file
+    for check in ('size', None):
+        try:
+            pyprot.Pdb.from_table(src, check=check)
+            assert(False)
+        except ValueError:
+            pass
@@ -92,3 +92,58 @@ def test_std_err():
     pyprot.statsbasic.std_err([150.5, 170, 160, 161, 170.5]) == 3.6926
 
     
+
+def test_array_input():
+    import numpy as np
+    data = [6,36,15,7,39,49,41,42,43,47,40]
+    for func in (pyprot.statsbasic.mean, pyprot.statsbasic.median, pyprot.statsbasic.quartile1,
+                 pyprot.statsbasic.quartile3, pyprot.statsbasic.iqr, pyprot.statsbasic.std_dev):
+        assert func(np.array(data)) == func(data)
+    assert pyprot.statsbasic.quartile1([10]) == None
+    assert pyprot.statsbasic.variance([]) == None
+
+def test_statistics_module():
+    import random
+    import statistics
+    random.seed(1)
+    # the sample variance is used for more than 2 values
+    for length in range(3, 30):
+        data = [round(random.uniform(-50, 50), 2) for i in range(length)]
+        half = length // 2
+        lower, upper = sorted(data)[:half], sorted(data)[length - half:]
+        expect = {'mean': statistics.mean(data),
+                  'median': statistics.median(data),
+                  'quartile1': statistics.median(lower),
+                  'quartile3': statistics.median(upper),
+                  'iqr': statistics.median(upper) - statistics.median(lower),
+                  'variance': statistics.variance(data),
+                  'std_err': statistics.stdev(data) / length**0.5}
+        for name, ref in expect.items():
+            new = getattr(pyprot.statsbasic, name)(data)
+            assert round(new, 8) == round(ref, 8), name
+
+def test_running_stats():
+    data = [59147.29, 61379.14, 55683.19, 56272.76, 52055.88, 47696.74,
+            60577.53, 49793.44, 35562.29, 58586.76, 47091.37, 36906.96]
+    running = pyprot.statsbasic.RunningStats(data[:5])
+    for value in data[5:8]:
+        running.add(value)
+    running.merge(pyprot.statsbasic.RunningStats().update(data[8:]))
+    assert running.n == len(data)
+    assert round(running.mean(), 8) == round(pyprot.statsbasic.mean(data), 8)
+    assert round(running.std_dev(), 8) == round(pyprot.statsbasic.std_dev(data), 8)
+    assert round(running.std_err(), 8) == round(pyprot.statsbasic.std_err(data), 8)
+    assert pyprot.statsbasic.RunningStats().mean() == None
+
+def test_quantile_sketch():
+    import numpy as np
+    data = np.random.RandomState(0).gamma(5, 6, 10000)
+    sketch = pyprot.statsbasic.QuantileSketch(rel_err=0.01, data_list=data[:3000])
+    sketch.merge(pyprot.statsbasic.QuantileSketch(rel_err=0.01, data_list=data[3000:]))
+    assert sketch.n == 10000
+    for q in (0.0, 0.25, 0.5, 0.75, 1.0):
+        exact = np.sort(data)[int(q * 9999)]
+        assert abs(sketch.quantile(q) - exact) <= 0.01 * exact
+    mixed = pyprot.statsbasic.QuantileSketch(data_list=[-3, -1, 0, 2, 5])
+    assert mixed.median() == 0.0
+    assert abs(mixed.quantile(0) + 3) <= 0.03
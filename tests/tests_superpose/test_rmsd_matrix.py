@@ -0,0 +1,43 @@
+"""
+Unit tests for rmsd_matrix in pyprot.superpose
+
+"""
+
+import numpy as np
+import pyprot
+from pyprot.pdbstats import stack_coords
+from pyprot.superpose import rmsd_matrix, rmsd
+
+lig1 = pyprot.Pdb("./tests/data/pdbs/lig_conf_1.pdb")
+lig2 = pyprot.Pdb("./tests/data/pdbs/lig_conf_2.pdb")
+
+def test_stack_coords():
+    coords = stack_coords([lig1, lig2, lig1], ligand=True)
+    assert(coords.shape[0] == 3)
+    assert(coords.shape[2] == 3)
+
+def test_stack_coords_mismatch():
+    pdb = pyprot.Pdb("./tests/data/pdbs/3EIY.pdb")
+    try:
+        stack_coords([lig1, lig2, pdb], ligand=True)
+        raise AssertionError('no ValueError')
+    except ValueError as e:
+        assert('molecule 2 (./tests/data/pdbs/3EIY.pdb)' in str(e))
+
+def test_rmsd_matrix_pdb():
+    coords = stack_coords([lig1, lig2, lig1], ligand=True)
+    dist = rmsd_matrix(coords)
+    assert([round(d, 4) for d in dist] == [1.9959, 0.0, 1.9959])
+    dist = rmsd_matrix(coords, superpose=True)
+    assert(round(dist[0], 4) == lig1.rmsd(lig2, ligand=True, superpose=True))
+
+def test_rmsd_matrix_chunks():
+    rng = np.random.RandomState(0)
+    coords = rng.normal(size=(11, 8, 3)) * 3.0
+    for superpose in (False, True):
+        expect = [rmsd(coords[i], coords[j], superpose=superpose)
+                  for i in range(11) for j in range(i + 1, 11)]
+        dist = rmsd_matrix(coords, superpose=superpose, chunksize=4)
+        assert(np.allclose(dist, expect))
+        dist = rmsd_matrix(coords, superpose=superpose, chunksize=4, n_jobs=2)
+        assert(np.allclose(dist, expect))
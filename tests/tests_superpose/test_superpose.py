@@ -0,0 +1,39 @@
+"""
+Unit tests for pyprot.superpose
+
+"""
+
+import numpy as np
+import pyprot
+from pyprot.superpose import kabsch, superpose, rmsd
+
+lig1 = pyprot.Pdb("./tests/data/pdbs/lig_conf_1.pdb")
+lig2 = pyprot.Pdb("./tests/data/pdbs/lig_conf_2.pdb")
+
+def rotation_z(angle):
+    c, s = np.cos(angle), np.sin(angle)
+    return np.array([[c, -s, 0.0], [s, c, 0.0], [0.0, 0.0, 1.0]])
+
+def test_kabsch():
+    coords = lig1.atom_table.coords[lig1.atom_table.is_hetatm]
+    rot = rotation_z(0.7)
+    moved = coords @ rot + [1.0, -2.0, 3.0]
+    assert(np.allclose(kabsch(moved, coords), rot.T))
+    assert(np.allclose(superpose(moved, coords), coords))
+    assert(round(rmsd(coords, moved, superpose=True), 6) == 0.0)
+    assert(rmsd(coords, moved) > 1.0)
+
+def test_kabsch_no_reflection():
+    coords = lig1.atom_table.coords[lig1.atom_table.is_hetatm]
+    mirrored = coords * [1.0, 1.0, -1.0]
+    assert(round(np.linalg.det(kabsch(mirrored, coords)), 6) == 1.0)
+
+def test_rmsd_superpose():
+    assert(lig1.rmsd(lig2, ligand=True) == 1.9959)
+    superposed = lig1.rmsd(lig2, ligand=True, superpose=True)
+    assert(superposed <= 1.9959)
+
+    moved = pyprot.Pdb("./tests/data/pdbs/lig_conf_2.pdb")
+    tab = moved.atom_table
+    tab.coords = tab.coords @ rotation_z(1.3) + [5.0, 0.0, -1.0]
+    assert(lig1.rmsd(moved, ligand=True, superpose=True) == superposed)